@@ -11,14 +11,35 @@ import sys
 from typing import Dict, List, Optional
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 命令执行层（见shared_runner.py），同时把trae-manager/tools加入sys.path
+from shared_runner import run_command
+try:
+    from skill_store import SkillStore
+except ImportError:
+    # 内容寻址存储随trae-manager提供，单独安装本技能时不可用
+    SkillStore = None
+
 
 class AutoInstaller:
     """自动安装器"""
     
-    def __init__(self):
-        """初始化安装器"""
+    def __init__(self, use_store: bool = False):
+        """
+        初始化安装器
+        
+        Args:
+            use_store: 技能安装到内容寻址存储（~/.trae-cn/store），技能目录为指向版本的链接
+        """
         self.trae_skills_dir = os.path.expanduser("~/.trae-cn/skills")
         self.mcp_dir = "./mcp-servers"
+        self.skill_store = None
+        if use_store:
+            if SkillStore is None:
+                print("⚠️ 未找到trae-manager的skill_store，按普通方式安装", file=sys.stderr)
+            else:
+                self.skill_store = SkillStore()
         
     def install_mcp(self, mcp_name: str, source: str = "npm") -> Dict:
         """
@@ -53,10 +74,10 @@ class AutoInstaller:
             os.makedirs(install_dir)
             
             # npm init
-            subprocess.run(["npm", "init", "-y"], cwd=install_dir, check=True, capture_output=True)
+            run_command(["npm", "init", "-y"], cwd=install_dir, check=True, capture_output=True)
             
             # npm install
-            result = subprocess.run(
+            result = run_command(
                 ["npm", "install", package],
                 cwd=install_dir,
                 capture_output=True,
@@ -84,7 +105,7 @@ class AutoInstaller:
             
             repo_url = f"https://github.com/{repo}.git" if not repo.startswith("https://") else repo
             
-            result = subprocess.run(
+            result = run_command(
                 ["git", "clone", "--depth", "1", repo_url, install_dir],
                 capture_output=True,
                 text=True,
@@ -130,6 +151,9 @@ class AutoInstaller:
     
     def _install_skill_from_github(self, repo: str, target_dir: str) -> Dict:
         """从GitHub安装技能"""
+        if self.skill_store is not None:
+            return self._install_skill_from_github_to_store(repo, target_dir)
+        
         try:
             # 备份已存在的技能
             if os.path.exists(target_dir):
@@ -142,7 +166,7 @@ class AutoInstaller:
             # 克隆仓库
             repo_url = f"https://github.com/{repo}.git" if not repo.startswith("https://") else repo
             
-            result = subprocess.run(
+            result = run_command(
                 ["git", "clone", "--depth", "1", repo_url, target_dir],
                 capture_output=True,
                 text=True,
@@ -161,12 +185,49 @@ class AutoInstaller:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def _install_skill_from_github_to_store(self, repo: str, target_dir: str) -> Dict:
+        """克隆到临时目录后存入内容寻址存储（不含.git），与已有版本相同的文件不重复存储"""
+        import tempfile
+        
+        repo_url = f"https://github.com/{repo}.git" if not repo.startswith("https://") else repo
+        clone_dir = tempfile.mkdtemp(prefix="trae-skill-")
+        try:
+            result = run_command(
+                ["git", "clone", "--depth", "1", repo_url, clone_dir],
+                capture_output=True,
+                text=True,
+                timeout=120
+            )
+            if result.returncode != 0:
+                return {"success": False, "error": result.stderr}
+            
+            stats = self.skill_store.install(os.path.basename(target_dir), clone_dir, target_dir, ignore=(".git",))
+            return {
+                "success": True,
+                "message": f"✅ 技能安装成功: {repo}",
+                "path": target_dir,
+                "store": stats
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            shutil.rmtree(clone_dir, ignore_errors=True)
+    
     def _install_skill_from_local(self, source_path: str, target_dir: str) -> Dict:
         """从本地安装技能"""
         try:
             if not os.path.exists(source_path):
                 return {"success": False, "error": f"源路径不存在: {source_path}"}
             
+            if self.skill_store is not None:
+                stats = self.skill_store.install(os.path.basename(target_dir), source_path, target_dir)
+                return {
+                    "success": True,
+                    "message": f"✅ 技能安装成功",
+                    "path": target_dir,
+                    "store": stats
+                }
+            
             # 备份
             if os.path.exists(target_dir):
                 backup_dir = f"{target_dir}.backup"
@@ -224,7 +285,7 @@ class AutoInstaller:
     def _run_command(self, cmd: List[str], cwd: str) -> Dict:
         """运行命令"""
         try:
-            result = subprocess.run(
+            result = run_command(
                 cmd,
                 cwd=cwd,
                 capture_output=True,
@@ -281,6 +342,7 @@ def main():
     install_skill = subparsers.add_parser('install-skill', help='安装技能')
     install_skill.add_argument('name', help='技能名称或仓库')
     install_skill.add_argument('--source', choices=['github', 'local'], default='github', help='来源')
+    install_skill.add_argument('--store', action='store_true', help='通过内容寻址存储安装（硬链接去重，可回滚）')
     
     # deps
     deps = subparsers.add_parser('deps', help='安装依赖')
@@ -292,7 +354,7 @@ def main():
     
     args = parser.parse_args()
     
-    installer = AutoInstaller()
+    installer = AutoInstaller(use_store=getattr(args, 'store', False))
     
     if args.command == 'install-mcp':
         result = installer.install_mcp(args.name, args.source)
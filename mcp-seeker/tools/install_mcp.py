@@ -11,6 +11,11 @@ import sys
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+# 命令执行层（见shared_runner.py）
+from shared_runner import run_command
+
 
 class MCPInstaller:
     """MCP安装器"""
@@ -165,7 +170,7 @@ class MCPInstaller:
         
         try:
             # 使用npm init和install
-            result = subprocess.run(
+            result = run_command(
                 ["npm", "init", "-y"],
                 cwd=install_dir,
                 capture_output=True,
@@ -177,7 +182,7 @@ class MCPInstaller:
                 return {"success": False, "error": f"npm init失败: {result.stderr}"}
             
             # 安装MCP包
-            result = subprocess.run(
+            result = run_command(
                 ["npm", "install", package_name],
                 cwd=install_dir,
                 capture_output=True,
@@ -211,7 +216,7 @@ class MCPInstaller:
                 repo_url = repo
             
             # 克隆仓库
-            result = subprocess.run(
+            result = run_command(
                 ["git", "clone", "--depth", "1", repo_url, "."],
                 cwd=install_dir,
                 capture_output=True,
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+"""
+OpenSkillsManager测试
+使用桩openskills可执行文件（按openskills的输出格式读取同一技能目录），
+校验原生读取路径与子进程路径结果一致
+"""
+import os
+import sys
+import textwrap
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+
+import openskills_manager
+from openskills_manager import OpenSkillsManager
+
+# 桩openskills：list输出文本格式（设置STUB_LIST_JSON时支持--json，STUB_LIST_JSON_FAIL指向的文件存在时
+# 删除该文件并让本次--json调用失败），read输出带Reading/Base directory外框，
+# update按STUB_SLOW_SKILLS中的技能休眠STUB_SLOW_SECONDS秒
+STUB_OPENSKILLS = textwrap.dedent('''\
+    #!{python}
+    import json
+    import os
+    import sys
+    import time
+
+    DIRS = [
+        ("project", os.path.join(".agent", "skills")),
+        ("global", os.path.join("~", ".agent", "skills")),
+        ("project", os.path.join(".claude", "skills")),
+        ("global", os.path.join("~", ".claude", "skills")),
+    ]
+
+
+    def skills():
+        found = {{}}
+        for location, path in DIRS:
+            path = os.path.abspath(os.path.expanduser(path))
+            if not os.path.isdir(path):
+                continue
+            for name in sorted(os.listdir(path)):
+                skill_md = os.path.join(path, name, "SKILL.md")
+                if name not in found and os.path.isfile(skill_md):
+                    found[name] = (location, os.path.join(path, name), skill_md)
+        return found
+
+
+    def description(skill_md):
+        with open(skill_md, encoding="utf-8") as f:
+            lines = f.read().split("\\n")
+        if lines[0].strip() == "---":
+            for line in lines[1:]:
+                if line.strip() == "---":
+                    break
+                if line.startswith("description:"):
+                    return line.split(":", 1)[1].strip().strip("\\"'")
+        return ""
+
+
+    args = sys.argv[1:]
+    if args == ["--version"]:
+        print("1.0.0-stub")
+    elif args == ["list"]:
+        found = skills()
+        ordered = sorted(found.items(), key=lambda item: (item[1][0] != "project", item[0]))
+        print("Available Skills:")
+        print()
+        for name, (location, _, skill_md) in ordered:
+            print(f"  {{name:<20}} ({{location}})")
+            print(f"    {{description(skill_md)}}")
+            print()
+        project = sum(1 for _, (location, _, _) in ordered if location == "project")
+        print(f"Summary: {{project}} project, {{len(ordered) - project}} global ({{len(ordered)}} total)")
+    elif args == ["list", "--json"] and os.environ.get("STUB_LIST_JSON"):
+        marker = os.environ.get("STUB_LIST_JSON_FAIL")
+        if marker and os.path.exists(marker):
+            os.unlink(marker)
+            print("Error: EAI_AGAIN registry.npmjs.org", file=sys.stderr)
+            sys.exit(1)
+        print(json.dumps([
+            {{"name": name, "location": location, "description": description(skill_md)}}
+            for name, (location, _, skill_md) in sorted(skills().items())
+        ]))
+    elif len(args) == 2 and args[0] == "read":
+        found = skills().get(args[1])
+        if found is None:
+            print(f"Skill not found: {{args[1]}}", file=sys.stderr)
+            sys.exit(1)
+        with open(found[2], encoding="utf-8") as f:
+            body = f.read()
+        sys.stdout.write(f"Reading: {{args[1]}}\\nBase directory: {{found[1]}}\\n\\n{{body}}\\n\\nSkill read: {{args[1]}}\\n")
+    elif len(args) == 2 and args[0] == "update":
+        if args[1] in os.environ.get("STUB_SLOW_SKILLS", "").split(","):
+            time.sleep(float(os.environ.get("STUB_SLOW_SECONDS", "5")))
+        else:
+            time.sleep(0.05)
+        print(f"Updated: {{args[1]}}")
+    else:
+        print(f"error: unknown option {{' '.join(args)}}", file=sys.stderr)
+        sys.exit(1)
+''')
+
+
+def _write_skill(root, name, description, body="正文\n"):
+    skill_dir = root / name
+    skill_dir.mkdir(parents=True)
+    (skill_dir / "SKILL.md").write_text(
+        f"---\nname: {name}\ndescription: {description}\n---\n\n# {name}\n\n{body}",
+        encoding="utf-8"
+    )
+
+
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    """项目目录与HOME下各有一组技能，PATH中放入桩openskills"""
+    project = tmp_path / "project"
+    home = tmp_path / "home"
+    _write_skill(project / ".claude" / "skills", "alpha", "Alpha skill")
+    _write_skill(project / ".claude" / "skills", "shared", "项目级同名技能")
+    _write_skill(home / ".claude" / "skills", "gamma", "Gamma skill", body="多行\n正文\n")
+    _write_skill(home / ".claude" / "skills", "shared", "全局同名技能")
+    _write_skill(home / ".agent" / "skills", "delta", "Delta skill")
+
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    stub = bin_dir / "openskills"
+    stub.write_text(STUB_OPENSKILLS.format(python=sys.executable), encoding="utf-8")
+    stub.chmod(0o755)
+
+    monkeypatch.chdir(project)
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ.get('PATH', '')}")
+    monkeypatch.setenv("TRAE_TELEMETRY", "0")
+    monkeypatch.setattr(openskills_manager, "CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path
+
+
+def _manager(workspace, native: bool) -> OpenSkillsManager:
+    """创建管理器；native=False时关闭原生路径，只走子进程"""
+    manager = OpenSkillsManager()
+    cache_dir = workspace / ("cache-native" if native else "cache-cli")
+    manager.installed_cache_file = str(cache_dir / "openskills_installed.json")
+    manager.binary_cache_file = str(cache_dir / "openskills_bin.json")
+    if not native:
+        manager._native_list = lambda: None
+        manager._native_read = lambda *args, **kwargs: None
+    return manager
+
+
+def test_native_list_matches_cli(workspace):
+    native = _manager(workspace, native=True)
+    cli = _manager(workspace, native=False)
+
+    native_skills = native.list_skills()
+    cli_skills = cli.list_skills()
+
+    assert cli.timings, "子进程路径应调用openskills"
+    assert not native.timings, "原生路径不应启动子进程"
+    assert [s["name"] for s in native_skills] == ["alpha", "shared", "delta", "gamma"]
+    assert native_skills == cli_skills
+
+
+@pytest.mark.parametrize("skill_name", ["alpha", "shared", "gamma", "delta"])
+@pytest.mark.parametrize("options", [
+    {},
+    {"max_bytes": 12},
+    {"frontmatter_only": True},
+])
+def test_native_read_matches_cli(workspace, skill_name, options):
+    native = _manager(workspace, native=True)
+    cli = _manager(workspace, native=False)
+
+    native_result = native.read_skill(skill_name, **options)
+    cli_result = cli.read_skill(skill_name, **options)
+
+    assert not native.timings
+    assert native_result["success"] and cli_result["success"]
+    assert native_result == cli_result
+
+
+def test_read_missing_skill_falls_back_to_cli(workspace):
+    manager = _manager(workspace, native=True)
+
+    result = manager.read_skill("missing")
+
+    assert not result["success"]
+    assert manager.timings, "未找到技能时应回退到openskills子进程"
+
+
+def test_parallel_update_times_out_slow_skill(workspace, monkeypatch):
+    monkeypatch.setenv("STUB_SLOW_SKILLS", "gamma")
+    monkeypatch.setenv("STUB_SLOW_SECONDS", "10")
+    manager = _manager(workspace, native=True)
+    events = []
+
+    result = manager.update_skills(
+        ["alpha", "gamma", "delta"], parallel=True, workers=3, timeout=1, on_event=events.append
+    )
+
+    statuses = {r["skill"]: r["status"] for r in result["results"]}
+    assert statuses == {"alpha": "success", "gamma": "timeout", "delta": "success"}
+    assert not result["success"]
+    assert result["error"] == "gamma"
+
+    # 每个技能各有一个start和一个done事件，done事件携带最终状态
+    for name, status in statuses.items():
+        skill_events = [e for e in events if e["skill"] == name]
+        assert [e["event"] for e in skill_events] == ["start", "done"]
+        assert skill_events[0]["status"] == "running"
+        assert skill_events[1]["status"] == status
+
+    durations = {r["skill"]: r["duration"] for r in result["results"]}
+    assert 1 <= durations["gamma"] < 5
+    assert durations["alpha"] < 1 and durations["delta"] < 1
+    assert result["total_duration"] == pytest.approx(sum(durations.values()))
+    # 并发执行：整体耗时由最慢的技能决定，小于各技能耗时之和
+    assert durations["gamma"] <= result["duration"] < result["total_duration"]
+
+
+def test_list_json_probe_is_reused_across_processes(workspace):
+    first = _manager(workspace, native=False)
+    first._refresh_installed_list()
+    # 桩不支持--json：探测失败后回退到文本输出
+    assert [t["command"] for t in first.timings] == ["list", "list"]
+
+    # 新进程（新实例）从磁盘缓存得知不支持--json，只调用一次
+    second = _manager(workspace, native=False)
+    second._refresh_installed_list()
+    assert [t["command"] for t in second.timings] == ["list"]
+    assert second.installed_skills == first.installed_skills
+
+    # 可执行文件变化后重新探测
+    stub = workspace / "bin" / "openskills"
+    os.utime(stub, ns=(stub.stat().st_atime_ns, stub.stat().st_mtime_ns + 1_000_000_000))
+    third = _manager(workspace, native=False)
+    third._refresh_installed_list()
+    assert [t["command"] for t in third.timings] == ["list", "list"]
+
+
+def test_transient_list_json_failure_keeps_probe(workspace, monkeypatch):
+    monkeypatch.setenv("STUB_LIST_JSON", "1")
+    first = _manager(workspace, native=False)
+    first._refresh_installed_list()
+    assert [t["command"] for t in first.timings] == ["list"]
+    assert first._list_json_supported is True
+
+    # 一次临时失败：本次回退到文本输出，但不把--json记为不支持
+    marker = workspace / "fail-once"
+    marker.touch()
+    monkeypatch.setenv("STUB_LIST_JSON_FAIL", str(marker))
+    second = _manager(workspace, native=False)
+    second._refresh_installed_list()
+    assert [t["command"] for t in second.timings] == ["list", "list"]
+    assert sorted(s["name"] for s in second.installed_skills) == sorted(s["name"] for s in first.installed_skills)
+    assert second._list_json_supported is True
+
+    third = _manager(workspace, native=False)
+    third._refresh_installed_list()
+    assert [t["command"] for t in third.timings] == ["list"]
+    assert third._list_json_supported is True
+
+
+def test_content_cache_is_bounded(workspace, monkeypatch):
+    monkeypatch.setattr(openskills_manager, "CONTENT_CACHE_SIZE", 2)
+    manager = _manager(workspace, native=True)
+    names = ["alpha", "shared", "gamma", "delta"]
+
+    first = {name: manager.read_skill(name) for name in names}
+    assert len(manager._content_cache) == 2
+    assert manager._content_cache_chars == sum(len(c) for c in manager._content_cache.values())
+
+    # 被淘汰的技能重新读取，结果不变
+    assert {name: manager.read_skill(name) for name in names} == first
+    assert len(manager._content_cache) == 2
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+SkillCatalog测试
+校验倒排索引预筛选后的搜索结果与对全部条目逐一打分的结果一致
+"""
+import os
+import random
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tools"))
+
+from skill_catalog import SEED_SKILLS, SkillCatalog, _tokens
+
+WORDS = ["pdf", "docx", "web", "scraping", "data", "analysis", "react", "vue", "css", "go", "js",
+         "tailwind", "chart", "test", "api", "数据", "分析", "文档"]
+
+QUERIES = [
+    "pdf", "css", "go", "tailwindcss", "use css and tailwind", "react vue", "web-scraping tool",
+    "data analysis with pdf", "mytestapi", "数据分析", "gojs", "x", "docx转pdf", "chart-api helper",
+]
+
+
+def _baseline_search(catalog: SkillCatalog, query: str, limit: int):
+    """不做预筛选：对全部条目打分"""
+    query_lower = query.lower().strip()
+    query_tokens = set(_tokens(query_lower))
+    results = []
+    for i, skill in enumerate(catalog.skills):
+        score = catalog._score(skill, query_lower, query_tokens)
+        if score > 0:
+            results.append((score, i))
+    results.sort(key=lambda x: (-x[0], x[1]))
+    return [dict(catalog.skills[i], score=score) for score, i in results[:limit]]
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    rng = random.Random(5)
+    skills = [dict(s) for s in SEED_SKILLS]
+    for _ in range(300):
+        name = "-".join(rng.sample(WORDS, rng.randint(1, 2)))
+        description = " ".join(rng.sample(WORDS, rng.randint(0, 4)))
+        skills.append({"name": name, "repo": "test/skills", "description": description})
+    skills.append({"name": "go", "repo": "test/skills", "description": ""})
+    skills.append({"name": "js", "repo": "test/skills", "description": "JavaScript"})
+
+    catalog = SkillCatalog(["test/skills"], catalog_path=str(tmp_path / "catalog.json"))
+    catalog.repo_data = {"test/skills": {"source": "mirror", "indexed_at": 0, "skills": skills}}
+    catalog._build_index()
+    return catalog
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_unfiltered_scorer(catalog, query):
+    assert catalog.search(query, limit=500) == _baseline_search(catalog, query, 500)
+    assert catalog.search(query, limit=5) == _baseline_search(catalog, query, 5)
+
+
+def test_name_contained_in_query_is_found(catalog):
+    names = {s["name"] for s in catalog.search("tailwindcss", limit=500)}
+    assert "css" in names and "tailwind" in names
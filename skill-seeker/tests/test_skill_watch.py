@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+SkillIndexWatcher测试
+通过SkillStore安装技能（已安装目录是原子替换的符号链接），校验监听中的索引随之更新
+"""
+import os
+import sys
+import time
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(TESTS_DIR), "tools"))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(TESTS_DIR)), "trae-manager", "tools"))
+
+from skill_index import LocalSkillIndex
+from skill_store import SkillStore
+from skill_watch import SkillIndexWatcher, inotify_available
+
+
+def _write_skill(skill_dir, description):
+    skill_dir.mkdir(parents=True, exist_ok=True)
+    (skill_dir / "SKILL.md").write_text(
+        f"---\nname: demo\ndescription: {description}\n---\n\n# demo\n\n{description}\n",
+        encoding="utf-8"
+    )
+
+
+def _wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return predicate()
+
+
+@pytest.mark.parametrize("use_inotify", [
+    pytest.param(True, marks=pytest.mark.skipif(not inotify_available(), reason="需要inotify")),
+    False,
+])
+def test_store_install_updates_watched_index(tmp_path, use_inotify):
+    skills_dir = tmp_path / "skills"
+    skills_dir.mkdir()
+    store = SkillStore(str(tmp_path / "store"))
+    index = LocalSkillIndex(str(skills_dir), str(tmp_path / "index.json"))
+    watcher = SkillIndexWatcher(index, poll_interval=0.05, use_inotify=use_inotify).start()
+
+    def description(name):
+        entry = index.get(name)
+        return entry["description"] if entry else None
+
+    try:
+        assert watcher.mode == ("inotify" if use_inotify else "poll")
+
+        # 新技能：已安装目录是新建的符号链接
+        _write_skill(tmp_path / "src-v1" / "demo", "version one")
+        store.install("demo", str(tmp_path / "src-v1" / "demo"), str(skills_dir / "demo"))
+        assert os.path.islink(skills_dir / "demo")
+        assert _wait_for(lambda: description("demo") == "version one")
+
+        # 新版本：符号链接被原子替换为指向新版本目录
+        _write_skill(tmp_path / "src-v2" / "demo", "version two")
+        store.install("demo", str(tmp_path / "src-v2" / "demo"), str(skills_dir / "demo"))
+        assert _wait_for(lambda: description("demo") == "version two")
+
+        # 回滚后同样生效，删除链接后从索引移除
+        store.rollback("demo")
+        assert _wait_for(lambda: description("demo") == "version one")
+        os.unlink(skills_dir / "demo")
+        assert _wait_for(lambda: description("demo") is None)
+    finally:
+        watcher.stop()
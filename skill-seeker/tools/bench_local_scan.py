@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+本地技能扫描基准测试
+在临时目录中生成大量技能目录，比较 listdir+isdir+exists 逐个读取 与 scandir+线程池索引 的耗时
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from skill_index import LocalSkillIndex, SCAN_WORKERS
+
+SKILL_BODY = """# {name}
+
+{name} 的示例描述，用于基准测试。
+
+## 使用场景
+
+""" + "这是一段填充正文 lorem ipsum dolor sit amet。\n" * 40
+
+
+def build_tree(root: str, count: int):
+    """生成count个技能目录"""
+    for i in range(count):
+        name = f"bench-skill-{i:05d}"
+        skill_dir = os.path.join(root, name)
+        os.makedirs(skill_dir)
+        with open(os.path.join(skill_dir, "SKILL.md"), 'w', encoding='utf-8') as f:
+            f.write(SKILL_BODY.format(name=name))
+
+
+def legacy_scan(skills_dir: str) -> int:
+    """原实现：listdir + isdir + exists，并完整读取SKILL.md两次（描述 + 语义词集）"""
+    count = 0
+    for skill_name in os.listdir(skills_dir):
+        skill_path = os.path.join(skills_dir, skill_name)
+        if not os.path.isdir(skill_path):
+            continue
+
+        skill_md = os.path.join(skill_path, "SKILL.md")
+        if os.path.exists(skill_path) and os.path.exists(skill_md):
+            with open(skill_md, 'r', encoding='utf-8') as f:
+                set(f.read().lower().split())
+
+        if os.path.exists(skill_md):
+            with open(skill_md, 'r', encoding='utf-8') as f:
+                f.read().split('\n')
+        count += 1
+    return count
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='本地技能扫描基准测试')
+    parser.add_argument('--count', type=int, default=10000, help='技能目录数量')
+    parser.add_argument('--workers', type=int, default=SCAN_WORKERS, help='线程池大小')
+    parser.add_argument('--dir', help='在指定目录（如网络挂载目录）下生成测试数据')
+
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="skill-bench-", dir=args.dir)
+    skills_dir = os.path.join(root, "skills")
+    index_path = os.path.join(root, "skill_index.json")
+
+    try:
+        print(f"🛠️ 生成 {args.count} 个技能目录: {skills_dir}")
+        os.makedirs(skills_dir)
+        build_tree(skills_dir, args.count)
+
+        legacy_time, _ = timed(legacy_scan, skills_dir)
+
+        index = LocalSkillIndex(skills_dir, index_path)
+        cold_time, _ = timed(index.scan, args.workers)
+        index.save()
+
+        index = LocalSkillIndex(skills_dir, index_path)
+        warm_time, _ = timed(index.scan, args.workers)
+
+        print(f"\n📊 结果 ({args.count} 个技能, {args.workers} 线程)")
+        print(f"  listdir + isdir + exists (原实现): {legacy_time * 1000:9.1f} ms")
+        print(f"  scandir + 线程池 (冷索引):          {cold_time * 1000:9.1f} ms")
+        print(f"  scandir + 线程池 (热索引):          {warm_time * 1000:9.1f} ms")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
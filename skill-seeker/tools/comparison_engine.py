@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+技能比较引擎
+把候选技能放入列矩阵（下载量、评分、功能数、流行度），一次性完成各维度排名，
+并按sources.json中comparison.weights计算归一化加权总分；有numpy时向量化计算
+"""
+import heapq
+from typing import Dict, List
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 列矩阵中的维度（列顺序）
+COLUMNS = ("downloads", "ratings", "features", "popularity")
+
+DEFAULT_WEIGHTS = {"downloads": 0.3, "features": 0.3, "ratings": 0.25, "popularity": 0.15}
+
+# 加权总分保留的小数位
+SCORE_DIGITS = 12
+
+
+def column_values(skill: Dict) -> Dict:
+    """提取技能在各维度上的原始值"""
+    downloads = skill.get("downloads", 0)
+    ratings = skill.get("ratings", 0)
+    return {
+        "downloads": downloads,
+        "ratings": ratings,
+        "features": len(skill.get("features", [])),
+        "popularity": downloads * ratings
+    }
+
+
+class ComparisonEngine:
+    """多维度比较引擎"""
+
+    def __init__(self, weights: Dict = None):
+        """
+        初始化引擎
+
+        Args:
+            weights: 维度权重，默认使用DEFAULT_WEIGHTS；未知维度忽略
+        """
+        weights = weights if weights is not None else DEFAULT_WEIGHTS
+        self.weights = {c: float(weights.get(c, 0)) for c in COLUMNS}
+
+    def evaluate(self, skills: List[Dict], top: int = None) -> Dict:
+        """
+        对候选技能进行一次性评估
+
+        Args:
+            skills: 技能信息列表
+            top: 只需要前N名时传入，排名用部分选择而不是全量排序
+
+        Returns:
+            {
+                "values": {维度: [原始值]},
+                "rankings": {维度: [按值降序的技能下标，值相同保持原顺序；top模式只含前N名]},
+                "scores": [归一化加权总分],
+                "overall": [按总分降序的技能下标；top模式只含前N名]
+            }
+        """
+        values = {c: [] for c in COLUMNS}
+        for skill in skills:
+            for c, value in column_values(skill).items():
+                values[c].append(value)
+
+        if not skills:
+            return {"values": values, "rankings": {c: [] for c in COLUMNS}, "scores": [], "overall": []}
+
+        if top is not None and top >= len(skills):
+            top = None
+
+        if np is not None:
+            rankings, scores, overall = self._evaluate_numpy(values, top)
+        else:
+            rankings, scores, overall = self._evaluate_python(values, top)
+
+        return {"values": values, "rankings": rankings, "scores": scores, "overall": overall}
+
+    def _evaluate_numpy(self, values: Dict, top: int = None):
+        """向量化计算：列矩阵 → 稳定降序argsort（或部分选择）、min-max归一化、加权求和"""
+        matrix = np.array([values[c] for c in COLUMNS], dtype=np.float64).T
+
+        if top is None:
+            # 对取负的列做稳定升序排序即为稳定降序（值相同保持原顺序）
+            order = np.argsort(-matrix, axis=0, kind="stable")
+            rankings = {c: order[:, j].tolist() for j, c in enumerate(COLUMNS)}
+        else:
+            rankings = {c: _top_indices_numpy(matrix[:, j], top) for j, c in enumerate(COLUMNS)}
+
+        low = matrix.min(axis=0)
+        span = matrix.max(axis=0) - low
+        normalized = np.divide(
+            matrix - low, span,
+            out=np.zeros_like(matrix), where=span > 0
+        )
+        weights = np.array([self.weights[c] for c in COLUMNS], dtype=np.float64)
+        total = weights.sum()
+        scores = normalized @ weights / total if total > 0 else np.zeros(len(matrix))
+        # 舍去浮点累加顺序带来的误差，使并列判断与纯Python实现一致
+        scores = np.round(scores, SCORE_DIGITS)
+
+        if top is None:
+            overall = np.argsort(-scores, kind="stable").tolist()
+        else:
+            overall = _top_indices_numpy(scores, top)
+        return rankings, scores.tolist(), overall
+
+    def _evaluate_python(self, values: Dict, top: int = None):
+        """无numpy时的纯Python实现，结果与向量化版本一致"""
+        count = len(values[COLUMNS[0]])
+        indices = range(count)
+
+        rankings = {}
+        normalized = {}
+        for c in COLUMNS:
+            column = values[c]
+            rankings[c] = _top_indices_python(column, top)
+            low = min(column)
+            span = max(column) - low
+            normalized[c] = [(v - low) / span if span > 0 else 0.0 for v in column]
+
+        total = sum(self.weights.values())
+        scores = [
+            round(sum(self.weights[c] * normalized[c][i] for c in COLUMNS) / total, SCORE_DIGITS)
+            if total > 0 else 0.0
+            for i in indices
+        ]
+
+        overall = _top_indices_python(scores, top)
+        return rankings, scores, overall
+
+
+def _top_indices_python(column: List, top: int = None) -> List[int]:
+    """按值降序的下标（值相同按下标升序）；top给定时用堆做部分选择"""
+    key = lambda i: (-column[i], i)
+    if top is None:
+        return sorted(range(len(column)), key=key)
+    return heapq.nsmallest(top, range(len(column)), key=key)
+
+
+def _top_indices_numpy(column, top: int) -> List[int]:
+    """argpartition选出前top名，再只对这top个排序；边界处的并列值按下标取，与稳定排序一致"""
+    part = np.argpartition(-column, top - 1)[:top]
+    kth = column[part].min()
+    above = np.flatnonzero(column > kth)
+    ties = np.flatnonzero(column == kth)[:top - len(above)]
+    selected = np.concatenate([above, ties])
+    return selected[np.lexsort((selected, -column[selected]))].tolist()
@@ -4,69 +4,657 @@ OpenSkills管理工具
 集成OpenSkills CLI到Skill Seeker
 """
 import os
+import re
 import json
+import shutil
 import subprocess
 import sys
-from typing import List, Dict, Any, Optional
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Callable, Optional
 from pathlib import Path
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+# 命令执行层（见shared_runner.py）
+from shared_runner import run_command
+from skill_index import HEADER_READ_LIMIT, parse_skill_header
+from skill_catalog import SkillCatalog
+
+CACHE_DIR = os.path.expanduser("~/.trae-cn/cache")
+
+# openskills的技能目录：(位置, 路径)，按openskills的查找优先级排列
+OPENSKILLS_SKILL_DIRS = [
+    ("project", os.path.join(".agent", "skills")),
+    ("global", os.path.join("~", ".agent", "skills")),
+    ("project", os.path.join(".claude", "skills")),
+    ("global", os.path.join("~", ".claude", "skills")),
+]
+
+
+# SKILL.md内容LRU缓存的容量：条目数和总字符数
+CONTENT_CACHE_SIZE = 64
+CONTENT_CACHE_CHARS = 8 * 1024 * 1024
+
+# 已安装列表缓存与解析器的格式版本，解析规则或缓存结构变化时递增
+LIST_SCHEMA_VERSION = 1
+
+_ANSI_ESCAPE = re.compile(r'\x1b\[[0-9;]*m')
+_LIST_HEADER = re.compile(r'^\s*Available Skills:\s*$')
+_LIST_EMPTY = re.compile(r'^\s*No skills installed', re.IGNORECASE)
+_LIST_SKILL_LINE = re.compile(r'^ {2}(?P<name>\S+)\s+\((?P<location>project|global)\)$')
+_LIST_DESCRIPTION_LINE = re.compile(r'^ {4,}\S')
+_LIST_SUMMARY = re.compile(r'^\s*Summary:\s*(?P<project>\d+) project, (?P<global>\d+) global \((?P<total>\d+) total\)\s*$')
+# CLI拒绝--json参数时的报错（commander等参数解析器的常见写法）
+_OPTION_REJECTED = re.compile(r'unknown option|unrecognized|unexpected argument|too many arguments|--json',
+                              re.IGNORECASE)
+
+
+class ListFormatError(ValueError):
+    """openskills list输出格式无法识别"""
+
+
+def _extract_frontmatter(text: str) -> Optional[str]:
+    """提取开头的YAML frontmatter（含---分隔行），不存在返回空串，未闭合返回None"""
+    lines = text.split('\n')
+    if not lines or lines[0].strip() != '---':
+        return ""
+    for i, line in enumerate(lines[1:], 1):
+        if line.strip() == '---':
+            return '\n'.join(lines[:i + 1]) + '\n'
+    return None
+
+
+def _strip_read_frame(output: str) -> str:
+    """去掉openskills read输出中的Reading/Base directory/Skill read外框"""
+    lines = output.split('\n')
+    if len(lines) >= 3 and lines[0].startswith("Reading: ") and lines[1].startswith("Base directory: "):
+        lines = lines[3:]
+        while lines and not lines[-1]:
+            lines.pop()
+        if lines and lines[-1].startswith("Skill read: "):
+            lines.pop()
+            if lines and not lines[-1]:
+                lines.pop()
+    return '\n'.join(lines)
+
+
 class OpenSkillsManager:
     """OpenSkills管理器"""
     
     def __init__(self):
         """初始化管理器"""
         self.command = "npx openskills"
-        self.installed_skills = []
+        self.installed_cache_file = os.path.join(CACHE_DIR, "openskills_installed.json")
+        self.binary_cache_file = os.path.join(CACHE_DIR, "openskills_bin.json")
+        # 解析后的命令前缀，见_resolve_command
+        self._command_prefix = None
+        # 每次调用的耗时记录
+        self.timings = []
+        # 已安装列表按需加载，见installed_skills属性
+        self._installed_skills = None
+        # SKILL.md内容LRU缓存：(路径, mtime, max_bytes, frontmatter_only) -> 内容，
+        # 按CONTENT_CACHE_SIZE/CONTENT_CACHE_CHARS淘汰最久未使用的条目
+        self._content_cache = OrderedDict()
+        self._content_cache_chars = 0
+        self._content_lock = threading.Lock()
+        # openskills list是否支持--json，None表示尚未探测；探测结果随已安装列表缓存落盘
+        self._list_json_supported = None
+        self._list_json_probe = None
+        # 官方技能目录，见_catalog
+        self._skill_catalog = None
+    
+    @property
+    def installed_skills(self) -> List[Dict]:
+        """已安装技能列表（首次访问时从磁盘缓存或openskills list加载）"""
+        if self._installed_skills is None:
+            self._installed_skills = self._load_installed_list()
+        return self._installed_skills
+    
+    def _skill_dirs(self) -> List[tuple]:
+        """openskills技能目录的绝对路径列表：(位置, 路径)"""
+        return [
+            (location, os.path.abspath(os.path.expanduser(path)))
+            for location, path in OPENSKILLS_SKILL_DIRS
+        ]
+    
+    def _native_layout(self) -> bool:
+        """是否识别出openskills的磁盘布局（至少存在一个技能目录）"""
+        return any(os.path.isdir(path) for _, path in self._skill_dirs())
+    
+    def _find_skill(self, skill_name: str) -> Optional[tuple]:
+        """按openskills的查找顺序定位技能，返回 (位置, 技能目录)"""
+        for location, path in self._skill_dirs():
+            skill_dir = os.path.join(path, skill_name)
+            if os.path.isfile(os.path.join(skill_dir, "SKILL.md")):
+                return location, skill_dir
+        return None
+    
+    def _native_list(self) -> Optional[List[Dict]]:
+        """
+        直接读取技能目录列出已安装技能（与openskills list语义一致）
+        
+        同名技能只保留查找顺序中的第一个；项目级在前，各组内按名称排序
+        
+        Returns:
+            技能列表，未识别出磁盘布局时返回None
+        """
+        if not self._native_layout():
+            return None
+        
+        skills = []
+        seen = set()
+        for location, path in self._skill_dirs():
+            try:
+                entries = sorted(os.scandir(path), key=lambda e: e.name)
+            except OSError:
+                continue
+            
+            for entry in entries:
+                if entry.name in seen or not entry.is_dir():
+                    continue
+                skill_md = os.path.join(entry.path, "SKILL.md")
+                if not os.path.isfile(skill_md):
+                    continue
+                seen.add(entry.name)
+                try:
+                    description = parse_skill_header(skill_md)["metadata"].get("description", "")
+                except OSError:
+                    description = ""
+                skills.append({
+                    "name": entry.name,
+                    "source": location,
+                    "installed": True,
+                    "description": description
+                })
+        
+        skills.sort(key=lambda s: (s["source"] != "project", s["name"]))
+        return skills
+    
+    def _native_read(self, skill_name: str, max_bytes: int = None,
+                     frontmatter_only: bool = False) -> Optional[Dict]:
+        """
+        直接读取SKILL.md（完整读取时输出格式与openskills read一致）
+        
+        Args:
+            skill_name: 技能名称
+            max_bytes: 只返回SKILL.md的前N个字节
+            frontmatter_only: 只返回YAML frontmatter
+        
+        Returns:
+            读取结果，未识别出磁盘布局或未找到技能时返回None（由调用方回退到子进程）
+        """
+        found = self._find_skill(skill_name)
+        if found is None:
+            return None
+        
+        _, skill_dir = found
+        try:
+            body = self._read_body(os.path.join(skill_dir, "SKILL.md"), max_bytes, frontmatter_only)
+        except (OSError, UnicodeDecodeError):
+            return None
+        
+        if max_bytes is not None or frontmatter_only:
+            return {
+                "success": True,
+                "content": body,
+                "skill_name": skill_name,
+                "partial": True
+            }
+        
+        content = (
+            f"Reading: {skill_name}\n"
+            f"Base directory: {skill_dir}\n"
+            f"\n"
+            f"{body}\n"
+            f"\n"
+            f"Skill read: {skill_name}\n"
+        )
+        return {
+            "success": True,
+            "content": content,
+            "skill_name": skill_name
+        }
+    
+    def _read_body(self, skill_md: str, max_bytes: int = None, frontmatter_only: bool = False) -> str:
+        """读取SKILL.md内容，按 (路径, mtime, 读取方式) 缓存"""
+        key = (skill_md, os.stat(skill_md).st_mtime_ns, max_bytes, frontmatter_only)
+        content = self._cached_content(key)
+        if content is not None:
+            return content
+        
+        full = self._cached_content((skill_md, key[1], None, False))
+        
+        if frontmatter_only:
+            if full is None:
+                # frontmatter在文件开头，先有界读取，未闭合时再读全文
+                with open(skill_md, 'rb') as f:
+                    head = f.read(HEADER_READ_LIMIT)
+                content = _extract_frontmatter(head.decode('utf-8', errors='ignore'))
+                if content is None and len(head) == HEADER_READ_LIMIT:
+                    with open(skill_md, 'r', encoding='utf-8') as f:
+                        content = _extract_frontmatter(f.read())
+            else:
+                content = _extract_frontmatter(full)
+            content = content or ""
+        elif max_bytes is not None:
+            if full is None:
+                with open(skill_md, 'rb') as f:
+                    content = f.read(max_bytes).decode('utf-8', errors='ignore')
+            else:
+                content = full.encode('utf-8')[:max_bytes].decode('utf-8', errors='ignore')
+        else:
+            with open(skill_md, 'r', encoding='utf-8') as f:
+                content = f.read()
+        
+        self._cache_content(key, content)
+        return content
+    
+    def _cached_content(self, key: tuple) -> Optional[str]:
+        """查询内容缓存（命中时移到最近使用）"""
+        with self._content_lock:
+            content = self._content_cache.get(key)
+            if content is not None:
+                self._content_cache.move_to_end(key)
+            return content
+    
+    def _cache_content(self, key: tuple, content: str):
+        """写入内容缓存，超出条目数或总字符数时淘汰最久未使用的内容"""
+        if len(content) > CONTENT_CACHE_CHARS:
+            return
+        with self._content_lock:
+            previous = self._content_cache.pop(key, None)
+            if previous is not None:
+                self._content_cache_chars -= len(previous)
+            self._content_cache[key] = content
+            self._content_cache_chars += len(content)
+            while (len(self._content_cache) > CONTENT_CACHE_SIZE
+                   or self._content_cache_chars > CONTENT_CACHE_CHARS):
+                _, evicted = self._content_cache.popitem(last=False)
+                self._content_cache_chars -= len(evicted)
+    
+    def read_many(self, skill_names: List[str], max_bytes: int = None,
+                  frontmatter_only: bool = False, workers: int = 8) -> Dict[str, Dict]:
+        """
+        并发读取多个技能
+        
+        Args:
+            skill_names: 技能名称列表
+            max_bytes: 只返回SKILL.md的前N个字节
+            frontmatter_only: 只返回YAML frontmatter
+            workers: 最大并发数
+            
+        Returns:
+            {技能名: 读取结果}，顺序与输入一致
+        """
+        names = list(dict.fromkeys(skill_names))
+        if not names:
+            return {}
+        
+        def read_one(name: str) -> Dict:
+            return self.read_skill(name, max_bytes=max_bytes, frontmatter_only=frontmatter_only)
+        
+        # 子进程回退路径可能用到，先在主线程中解析命令
+        self._resolve_command()
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(names)))) as executor:
+            results = list(executor.map(read_one, names))
+        
+        return dict(zip(names, results))
+    
+    def _skill_dirs_fingerprint(self) -> List:
+        """技能目录指纹：安装或移除技能会改变目录的mtime"""
+        fingerprint = []
+        for _, path in self._skill_dirs():
+            try:
+                fingerprint.append([path, os.stat(path).st_mtime_ns])
+            except OSError:
+                fingerprint.append([path, None])
+        return fingerprint
+    
+    def _load_installed_list(self) -> List[Dict]:
+        """加载已安装技能列表，技能目录未变化时使用磁盘缓存"""
+        fingerprint = self._skill_dirs_fingerprint()
+        
+        cache = self._read_installed_cache()
+        if cache is not None and cache.get("fingerprint") == fingerprint:
+            return cache["skills"]
+        
         self._refresh_installed_list()
+        return self._installed_skills
+    
+    def _read_installed_cache(self) -> Optional[Dict]:
+        """读取已安装列表缓存，结构版本不符时返回None"""
+        try:
+            with open(self.installed_cache_file, 'r', encoding='utf-8') as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cache.get("schema_version") != LIST_SCHEMA_VERSION or not isinstance(cache.get("skills"), list):
+            return None
+        return cache
+    
+    def _write_installed_cache(self, fingerprint: Optional[List], skills: List[Dict],
+                               list_json: Optional[Dict] = None):
+        """写入已安装列表缓存（连同list --json探测结果）"""
+        data = {
+            "schema_version": LIST_SCHEMA_VERSION,
+            "fingerprint": fingerprint,
+            "skills": skills
+        }
+        list_json = list_json or self._list_json_probe
+        if list_json is not None:
+            data["list_json"] = list_json
+        try:
+            os.makedirs(os.path.dirname(self.installed_cache_file), exist_ok=True)
+            with open(self.installed_cache_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+        except OSError:
+            pass
+    
+    def _invalidate_installed_list(self):
+        """技能变更后使已安装列表失效，下次访问时重新查询"""
+        self._installed_skills = None
+        # 保留最近一次成功解析的列表，仅清除指纹，解析失败时仍可回退
+        cache = self._read_installed_cache()
+        if cache is not None:
+            self._write_installed_cache(None, cache["skills"], cache.get("list_json"))
+    
+    def _list_json_probe_key(self) -> List:
+        """list --json探测结果的缓存键：openskills命令及可执行文件的mtime（npx时为None）"""
+        prefix = self._resolve_command()
+        try:
+            stamp = os.stat(prefix[0]).st_mtime_ns if os.path.isabs(prefix[0]) else None
+        except OSError:
+            stamp = None
+        return [" ".join(prefix), stamp]
+    
+    def _load_list_json_probe(self):
+        """从磁盘缓存恢复list --json探测结果（同一openskills可执行文件时有效）"""
+        cache = self._read_installed_cache()
+        probe = cache.get("list_json") if cache is not None else None
+        if isinstance(probe, dict) and probe.get("key") == self._list_json_probe_key():
+            self._list_json_probe = probe
+            self._list_json_supported = bool(probe.get("supported"))
+    
+    def _save_list_json_probe(self, supported: bool):
+        """记录list --json探测结果，已有缓存时立即写回，供其他进程复用"""
+        self._list_json_supported = supported
+        self._list_json_probe = {"key": self._list_json_probe_key(), "supported": supported}
+        cache = self._read_installed_cache()
+        if cache is not None:
+            self._write_installed_cache(cache.get("fingerprint"), cache["skills"])
+    
+    def _resolve_command(self) -> List[str]:
+        """
+        解析openskills入口，只解析一次
+        
+        优先使用已安装的openskills可执行文件（绝对路径和版本戳缓存到磁盘，
+        可执行文件变化时重新解析），找不到时回退到npx
+        """
+        if self._command_prefix is not None:
+            return self._command_prefix
+        
+        candidates = [
+            shutil.which("openskills"),
+            shutil.which("openskills", path=os.path.abspath(os.path.join("node_modules", ".bin"))),
+        ]
+        path = next((c for c in candidates if c), None)
+        
+        if path:
+            path = os.path.abspath(path)
+            stamp = os.stat(path).st_mtime_ns
+            
+            try:
+                with open(self.binary_cache_file, 'r', encoding='utf-8') as f:
+                    cache = json.load(f)
+            except (OSError, ValueError):
+                cache = {}
+            
+            if cache.get("path") == path and cache.get("mtime_ns") == stamp:
+                self._command_prefix = [path]
+            else:
+                # 新的可执行文件：确认可运行并记录版本
+                try:
+                    result = run_command(
+                        [path, "--version"],
+                        capture_output=True,
+                        text=True,
+                        timeout=30,
+                        check=False
+                    )
+                except Exception:
+                    result = None
+                
+                if result is not None and result.returncode == 0:
+                    self._command_prefix = [path]
+                    try:
+                        os.makedirs(CACHE_DIR, exist_ok=True)
+                        with open(self.binary_cache_file, 'w', encoding='utf-8') as f:
+                            json.dump({
+                                "path": path,
+                                "mtime_ns": stamp,
+                                "version": result.stdout.strip()
+                            }, f, ensure_ascii=False)
+                    except OSError:
+                        pass
+        
+        if self._command_prefix is None:
+            self._command_prefix = ["npx", "openskills"]
+        
+        self.command = " ".join(self._command_prefix)
+        return self._command_prefix
     
-    def _run_command(self, args: List[str]) -> tuple:
+    def _run_command(self, args: List[str], timeout: float = 60) -> tuple:
         """运行OpenSkills命令"""
-        cmd = ["npx", "openskills"] + args
+        result = self._execute(args, timeout)
+        return result["success"], result["stdout"], result["stderr"]
+    
+    def _execute(self, args: List[str], timeout: float = 60) -> Dict:
+        """运行OpenSkills命令，返回包含耗时和是否超时的详细结果"""
+        cmd = self._resolve_command() + args
+        start = time.perf_counter()
+        outcome = {"success": False, "stdout": "", "stderr": "", "timed_out": False}
         try:
-            result = subprocess.run(
+            result = run_command(
                 cmd,
                 capture_output=True,
                 text=True,
-                timeout=60,
+                timeout=timeout,
                 check=False
             )
-            return result.returncode == 0, result.stdout, result.stderr
+            outcome.update(
+                success=result.returncode == 0,
+                stdout=result.stdout,
+                stderr=result.stderr
+            )
+        except subprocess.TimeoutExpired:
+            outcome.update(stderr=f"命令超时 ({timeout}s)", timed_out=True)
         except Exception as e:
-            return False, "", str(e)
+            outcome["stderr"] = str(e)
+        
+        outcome["duration"] = time.perf_counter() - start
+        self.timings.append({
+            "command": args[0] if args else "",
+            "via": self.command,
+            "duration": outcome["duration"]
+        })
+        return outcome
+    
+    def measure_overhead(self, runs: int = 5) -> Dict:
+        """
+        测量每次调用的固定开销（npx解析 vs 直接调用可执行文件）
+        
+        Args:
+            runs: 每种方式的调用次数
+            
+        Returns:
+            各方式的平均/最小耗时（秒）
+        """
+        direct = self._resolve_command()
+        variants = {"npx": ["npx", "openskills"]}
+        if direct[0] != "npx":
+            variants["direct"] = direct
+        
+        report = {}
+        for name, prefix in variants.items():
+            durations = []
+            for _ in range(runs):
+                start = time.perf_counter()
+                try:
+                    run_command(prefix + ["--version"], capture_output=True, timeout=120, check=False)
+                except Exception:
+                    break
+                durations.append(time.perf_counter() - start)
+            
+            if durations:
+                report[name] = {
+                    "command": " ".join(prefix),
+                    "runs": len(durations),
+                    "mean": sum(durations) / len(durations),
+                    "min": min(durations)
+                }
+        
+        return report
     
     def _refresh_installed_list(self):
-        """刷新已安装技能列表"""
+        """刷新已安装技能列表并写入磁盘缓存"""
+        self._installed_skills = []
+        
+        # 先取指纹，list执行期间发生的变更会使缓存在下次访问时失效
+        fingerprint = self._skill_dirs_fingerprint()
+        
+        skills = self._native_list()
+        if skills is None:
+            try:
+                skills = self._list_via_cli()
+            except ListFormatError as e:
+                # 无法识别的输出格式：不把它当成"没有技能"，回退到上次成功解析的列表
+                print(f"⚠️ 无法解析openskills list输出: {e}", file=sys.stderr)
+                cache = self._read_installed_cache()
+                if cache is not None:
+                    self._installed_skills = cache["skills"]
+                return
+            if skills is None:
+                return
+        
+        self._installed_skills = skills
+        self._write_installed_cache(fingerprint, skills)
+    
+    def _list_via_cli(self) -> Optional[List[Dict]]:
+        """
+        通过openskills CLI获取已安装列表
+        
+        优先请求JSON输出；CLI不支持时解析文本输出
+        
+        Returns:
+            技能列表，命令执行失败时返回None
+            
+        Raises:
+            ListFormatError: 输出格式无法识别
+        """
+        if self._list_json_supported is None:
+            self._load_list_json_probe()
+        
+        if self._list_json_supported is not False:
+            result = self._execute(["list", "--json"])
+            if result["success"]:
+                try:
+                    skills = self._parse_list_json(result["stdout"])
+                except ValueError:
+                    skills = None
+                if skills is not None:
+                    if self._list_json_supported is None:
+                        self._save_list_json_probe(True)
+                    return skills
+                # 输出不是可识别的JSON：不支持--json
+                self._save_list_json_probe(False)
+            elif not result["timed_out"] and _OPTION_REJECTED.search(result["stderr"] + result["stdout"]):
+                self._save_list_json_probe(False)
+            # 超时等临时失败：本次回退到文本输出，不改动已记录的探测结果
+        
         success, stdout, stderr = self._run_command(["list"])
-        if success:
-            self.installed_skills = self._parse_list_output(stdout)
+        if not success:
+            return None
+        return self._parse_list_output(stdout)
+    
+    def _parse_list_json(self, output: str) -> Optional[List[Dict]]:
+        """
+        解析JSON格式的list输出
+        
+        接受技能数组或 {"skills": [...]}；结构不符时返回None
+        """
+        data = json.loads(output)
+        if isinstance(data, dict):
+            data = data.get("skills")
+        if not isinstance(data, list):
+            return None
+        
+        skills = []
+        for item in data:
+            if not isinstance(item, dict) or not isinstance(item.get("name"), str):
+                return None
+            skills.append({
+                "name": item["name"],
+                "source": item.get("location") or item.get("source") or "unknown",
+                "installed": True,
+                "description": item.get("description") or ""
+            })
+        return skills
     
     def _parse_list_output(self, output: str) -> List[Dict]:
-        """解析list命令输出"""
+        """
+        严格解析文本格式的list输出（格式版本见LIST_SCHEMA_VERSION）
+        
+        期望的格式：
+            Available Skills:
+            
+              <name>   (project|global)
+                <description>
+            
+            Summary: N project, M global (T total)
+        
+        Raises:
+            ListFormatError: 出现无法识别的行或数量与Summary不符
+        """
         skills = []
-        lines = output.strip().split('\n')
+        summary_total = None
         
-        for line in lines:
-            line = line.strip()
-            if not line or line.startswith('-') or line.startswith('Installed'):
+        for lineno, raw in enumerate(_ANSI_ESCAPE.sub('', output).split('\n'), 1):
+            line = raw.rstrip()
+            if not line.strip() or _LIST_HEADER.match(line) or _LIST_EMPTY.match(line):
                 continue
             
-            # 解析技能名称和来源
-            if ' ' in line:
-                parts = line.split()
-                skill_name = parts[0]
-                source = parts[1] if len(parts) > 1 else "unknown"
-                
+            match = _LIST_SKILL_LINE.match(line)
+            if match:
                 skills.append({
-                    "name": skill_name,
-                    "source": source,
-                    "installed": True
+                    "name": match.group("name"),
+                    "source": match.group("location"),
+                    "installed": True,
+                    "description": ""
                 })
+                continue
+            
+            if _LIST_DESCRIPTION_LINE.match(line) and skills:
+                description = skills[-1]["description"]
+                skills[-1]["description"] = f"{description} {line.strip()}".strip()
+                continue
+            
+            match = _LIST_SUMMARY.match(line)
+            if match:
+                summary_total = int(match.group("total"))
+                continue
+            
+            raise ListFormatError(f"第{lineno}行无法识别: {line.strip()[:80]}")
+        
+        if summary_total is not None and summary_total != len(skills):
+            raise ListFormatError(f"解析出{len(skills)}个技能，但Summary为{summary_total}个")
         
         return skills
     
     def list_skills(self) -> List[Dict]:
         """列出已安装的技能"""
-        self._refresh_installed_list()
         return self.installed_skills
     
     def install_skill(self, source: str) -> Dict:
@@ -84,7 +672,7 @@ class OpenSkillsManager:
         success, stdout, stderr = self._run_command(["install", source])
         
         if success:
-            self._refresh_installed_list()
+            self._invalidate_installed_list()
             return {
                 "success": True,
                 "message": f"✅ 成功安装技能: {source}",
@@ -98,24 +686,41 @@ class OpenSkillsManager:
                 "output": stdout
             }
     
-    def read_skill(self, skill_name: str) -> Dict:
+    def read_skill(self, skill_name: str, max_bytes: int = None,
+                   frontmatter_only: bool = False) -> Dict:
         """
         读取技能内容
         
         Args:
             skill_name: 技能名称
+            max_bytes: 只返回SKILL.md的前N个字节
+            frontmatter_only: 只返回YAML frontmatter
             
         Returns:
             技能内容
         """
+        # 识别出磁盘布局时直接读取文件，否则回退到openskills子进程
+        native = self._native_read(skill_name, max_bytes, frontmatter_only)
+        if native is not None:
+            return native
+        
         success, stdout, stderr = self._run_command(["read", skill_name])
         
         if success:
-            return {
+            result = {
                 "success": True,
                 "content": stdout,
                 "skill_name": skill_name
             }
+            if max_bytes is not None or frontmatter_only:
+                # 子进程输出带有Reading/Base directory等外框，截取前先去掉
+                body = _strip_read_frame(stdout)
+                if frontmatter_only:
+                    body = _extract_frontmatter(body) or ""
+                if max_bytes is not None:
+                    body = body.encode('utf-8')[:max_bytes].decode('utf-8', errors='ignore')
+                result.update(content=body, partial=True)
+            return result
         else:
             return {
                 "success": False,
@@ -123,25 +728,34 @@ class OpenSkillsManager:
                 "skill_name": skill_name
             }
     
-    def update_skills(self, skill_names: List[str] = None) -> Dict:
+    def update_skills(self, skill_names: List[str] = None, parallel: bool = False,
+                      workers: int = 4, timeout: float = 60,
+                      on_event: Callable[[Dict], None] = None) -> Dict:
         """
         更新技能
         
         Args:
             skill_names: 要更新的技能列表，None表示更新所有
+            parallel: 是否逐个技能并发更新
+            workers: 并发模式下的最大并发数
+            timeout: 超时时间（秒），并发模式下为每个技能单独计时
+            on_event: 并发模式下的进度回调，参数为事件字典
             
         Returns:
             更新结果
         """
+        if parallel:
+            return self._update_skills_parallel(skill_names, workers, timeout, on_event)
+        
         if skill_names:
             print(f"🔄 正在更新技能: {', '.join(skill_names)}")
-            success, stdout, stderr = self._run_command(["update"] + skill_names)
+            success, stdout, stderr = self._run_command(["update"] + skill_names, timeout)
         else:
             print("🔄 正在更新所有技能...")
-            success, stdout, stderr = self._run_command(["update"])
+            success, stdout, stderr = self._run_command(["update"], timeout)
         
         if success:
-            self._refresh_installed_list()
+            self._invalidate_installed_list()
             return {
                 "success": True,
                 "message": "✅ 更新完成",
@@ -154,6 +768,71 @@ class OpenSkillsManager:
                 "error": stderr
             }
     
+    def _update_skills_parallel(self, skill_names: Optional[List[str]], workers: int,
+                                timeout: float, on_event: Callable[[Dict], None] = None) -> Dict:
+        """
+        逐个技能并发更新，每个技能独立超时，并通过on_event报告进度
+        
+        结果中duration为整体耗时，total_duration为各技能耗时之和
+        """
+        if not skill_names:
+            skill_names = [s["name"] for s in self.installed_skills]
+        
+        if not skill_names:
+            return {"success": True, "message": "✅ 没有需要更新的技能", "results": [],
+                    "duration": 0.0, "total_duration": 0.0}
+        
+        print(f"🔄 正在并发更新 {len(skill_names)} 个技能 (并发数: {workers})...")
+        
+        def emit(event: Dict):
+            if on_event:
+                on_event(event)
+        
+        def update_one(name: str) -> Dict:
+            emit({"event": "start", "skill": name, "status": "running"})
+            outcome = self._execute(["update", name], timeout)
+            
+            if outcome["success"]:
+                status = "success"
+            elif outcome["timed_out"]:
+                status = "timeout"
+            else:
+                status = "failed"
+            
+            result = {
+                "skill": name,
+                "status": status,
+                "duration": outcome["duration"],
+                "output": outcome["stdout"],
+                "error": outcome["stderr"] if status != "success" else ""
+            }
+            emit(dict(result, event="done"))
+            return result
+        
+        # 在主线程中解析一次命令，避免各线程重复解析
+        self._resolve_command()
+        
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+            results = list(executor.map(update_one, skill_names))
+        duration = time.perf_counter() - start
+        
+        failed = [r["skill"] for r in results if r["status"] != "success"]
+        if len(failed) < len(results):
+            self._invalidate_installed_list()
+        
+        result = {
+            "success": not failed,
+            "message": f"✅ 更新完成 ({len(results)}个)" if not failed
+                       else f"❌ {len(failed)}/{len(results)} 个技能更新失败",
+            "results": results,
+            "duration": duration,
+            "total_duration": sum(r["duration"] for r in results)
+        }
+        if failed:
+            result["error"] = ", ".join(failed)
+        return result
+    
     def remove_skill(self, skill_name: str) -> Dict:
         """
         移除技能
@@ -169,7 +848,7 @@ class OpenSkillsManager:
         success, stdout, stderr = self._run_command(["remove", skill_name])
         
         if success:
-            self._refresh_installed_list()
+            self._invalidate_installed_list()
             return {
                 "success": True,
                 "message": f"✅ 成功移除技能: {skill_name}",
@@ -213,40 +892,37 @@ class OpenSkillsManager:
                 "error": stderr
             }
     
-    def search_openskills_repo(self, query: str) -> List[Dict]:
+    def search_openskills_repo(self, query: str, limit: int = 20) -> List[Dict]:
         """
         搜索OpenSkills官方仓库的技能
         
         Args:
             query: 搜索关键词
+            limit: 返回结果数量
             
         Returns:
-            技能列表
+            按匹配度排序的技能列表
         """
-        # OpenSkills官方技能列表
-        official_skills = [
-            {"name": "pdf", "repo": "anthropics/skills", "description": "PDF编辑和处理"},
-            {"name": "docx", "repo": "anthropics/skills", "description": "Word文档处理"},
-            {"name": "web-scraping", "repo": "anthropics/skills", "description": "网页抓取"},
-            {"name": "data-analysis", "repo": "anthropics/skills", "description": "数据分析"},
-            {"name": "react", "repo": "anthropics/webdev-skills", "description": "React开发"},
-            {"name": "vue", "repo": "anthropics/webdev-skills", "description": "Vue开发"},
-            {"name": "typescript", "repo": "anthropics/webdev-skills", "description": "TypeScript开发"},
-            {"name": "css", "repo": "anthropics/webdev-skills", "description": "CSS样式"},
-        ]
-        
-        results = []
-        query_lower = query.lower()
-        
-        for skill in official_skills:
-            # 匹配技能名称
-            if query_lower in skill["name"].lower():
-                results.append(skill)
-            # 匹配描述
-            elif query_lower in skill["description"].lower():
-                results.append(skill)
-        
-        return results
+        return self._catalog().search(query, limit)
+    
+    def refresh_catalog(self, fetch: bool = True) -> Dict:
+        """重新枚举sources.json中配置的官方仓库，更新技能目录索引"""
+        return self._catalog().refresh(fetch)
+    
+    def _catalog(self) -> SkillCatalog:
+        """官方技能目录（按需加载）"""
+        if self._skill_catalog is None:
+            config_path = os.path.join(
+                os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                "config", "sources.json"
+            )
+            try:
+                with open(config_path, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+            except (OSError, ValueError):
+                config = {}
+            self._skill_catalog = SkillCatalog.from_config(config)
+        return self._skill_catalog
     
     def get_skill_info(self, skill_name: str) -> Dict:
         """获取技能详细信息"""
@@ -304,10 +980,11 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='OpenSkills管理工具')
+    parser.add_argument('--timing', action='store_true', help='输出每次openskills调用的耗时')
     subparsers = parser.add_subparsers(dest='command', help='可用命令')
     
     # list命令
-    list_parser = subparsers.add_parser('list', help='列出已安装技能')
+    subparsers.add_parser('list', help='列出已安装技能')
     
     # install命令
     install_parser = subparsers.add_parser('install', help='安装技能')
@@ -315,11 +992,16 @@ def main():
     
     # read命令
     read_parser = subparsers.add_parser('read', help='读取技能内容')
-    read_parser.add_argument('skill', help='技能名称')
+    read_parser.add_argument('skills', nargs='+', help='技能名称（可多个，并发读取）')
+    read_parser.add_argument('--max-bytes', type=int, help='只读取SKILL.md的前N个字节')
+    read_parser.add_argument('--frontmatter', action='store_true', help='只读取YAML frontmatter')
     
     # update命令
     update_parser = subparsers.add_parser('update', help='更新技能')
     update_parser.add_argument('skills', nargs='*', help='技能名称 (默认更新所有)')
+    update_parser.add_argument('--parallel', action='store_true', help='逐个技能并发更新')
+    update_parser.add_argument('--workers', type=int, default=4, help='并发数')
+    update_parser.add_argument('--timeout', type=float, default=60, help='超时时间（秒），并发模式下按技能计')
     
     # remove命令
     remove_parser = subparsers.add_parser('remove', help='移除技能')
@@ -332,6 +1014,11 @@ def main():
     # search命令
     search_parser = subparsers.add_parser('search', help='搜索官方技能')
     search_parser.add_argument('query', help='搜索关键词')
+    search_parser.add_argument('--refresh', action='store_true', help='搜索前重新索引官方仓库')
+    
+    # bench命令
+    bench_parser = subparsers.add_parser('bench', help='测量npx与直接调用的单次开销')
+    bench_parser.add_argument('--runs', type=int, default=5, help='每种方式的调用次数')
     
     args = parser.parse_args()
     
@@ -346,16 +1033,36 @@ def main():
         print(manager.format_install_result(result))
     
     elif args.command == 'read':
-        result = manager.read_skill(args.skill)
-        if result["success"]:
-            print(f"📖 技能内容: {args.skill}\n")
-            print(result["content"])
-        else:
-            print(f"❌ 读取失败: {result.get('error', '')}")
+        results = manager.read_many(
+            args.skills,
+            max_bytes=args.max_bytes,
+            frontmatter_only=args.frontmatter
+        )
+        for skill_name, result in results.items():
+            if result["success"]:
+                print(f"📖 技能内容: {skill_name}\n")
+                print(result["content"])
+            else:
+                print(f"❌ 读取失败: {result.get('error', '')}")
     
     elif args.command == 'update':
-        result = manager.update_skills(args.skills if args.skills else None)
+        def report(event):
+            if event["event"] == "start":
+                print(f"  ⏳ {event['skill']}", flush=True)
+            else:
+                icon = {"success": "✅", "timeout": "⏰", "failed": "❌"}[event["status"]]
+                print(f"  {icon} {event['skill']} ({event['duration']:.1f}s)", flush=True)
+        
+        result = manager.update_skills(
+            args.skills if args.skills else None,
+            parallel=args.parallel,
+            workers=args.workers,
+            timeout=args.timeout,
+            on_event=report
+        )
         print(result["message"])
+        if "total_duration" in result:
+            print(f"⏱️ 耗时 {result['duration']:.1f}s（各技能合计 {result['total_duration']:.1f}s）")
         if not result["success"]:
             print(f"错误: {result.get('error', '')}")
     
@@ -368,20 +1075,38 @@ def main():
         print(result["message"])
     
     elif args.command == 'search':
+        if args.refresh:
+            for repo, info in manager.refresh_catalog().items():
+                if "error" in info:
+                    print(f"⚠️ 索引失败 {repo}: {info['error']}")
         results = manager.search_openskills_repo(args.query)
         if results:
             print(f"🔍 找到 {len(results)} 个相关技能:\n")
             for skill in results:
                 print(f"📦 {skill['name']}")
                 print(f"   仓库: {skill['repo']}")
-                print(f"   描述: {skill['description']}")
-                print(f"   安装: openskills install {skill['repo']}/{skill['name']}")
+                if skill.get('description'):
+                    print(f"   描述: {skill['description']}")
+                print(f"   安装: openskills install {skill['repo']}/{skill.get('path', skill['name'])}")
                 print()
         else:
             print(f"❌ 未找到与 '{args.query}' 相关的技能")
     
+    elif args.command == 'bench':
+        report = manager.measure_overhead(args.runs)
+        if not report:
+            print("❌ 无法运行openskills")
+        for name, stats in report.items():
+            print(f"⏱️ {name:<6} {stats['command']}")
+            print(f"   平均 {stats['mean'] * 1000:.0f} ms / 最快 {stats['min'] * 1000:.0f} ms ({stats['runs']}次)")
+    
     else:
         parser.print_help()
+    
+    if args.timing and manager.timings:
+        print("\n⏱️ openskills调用耗时:", file=sys.stderr)
+        for t in manager.timings:
+            print(f"   {t['command']:<8} {t['duration'] * 1000:8.1f} ms  ({t['via']})", file=sys.stderr)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,26 @@
+#!/usr/bin/env python3
+"""
+共享命令执行层的统一导入入口
+优先使用trae-manager/tools/command_runner.py（记录命令耗时等遥测）；单独安装本技能
+（没有trae-manager）时退化为直接调用subprocess.run，不记录遥测
+
+用法：from shared_runner import run_command
+"""
+import os
+import sys
+import subprocess
+
+# 共享命令执行层位于trae-manager/tools
+sys.path.insert(0, os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "trae-manager", "tools"
+))
+
+try:
+    from command_runner import run_command
+except ImportError:
+    def run_command(cmd, label=None, **kwargs):
+        """参数与command_runner.run_command一致，直接执行命令"""
+        return subprocess.run(cmd, **kwargs)
+
+__all__ = ["run_command"]
@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+OpenSkills官方技能目录索引
+枚举sources.json中official_skills仓库里的技能（本地git镜像或GitHub目录树），
+持久化为可搜索的索引，供skill_search.py和openskills_manager.py共用
+"""
+import os
+import sys
+import json
+import time
+import urllib.request
+from typing import Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from skill_index import parse_skill_header
+
+# 目录索引版本，结构变化时递增
+CATALOG_VERSION = 1
+
+DEFAULT_CATALOG_PATH = os.path.expanduser("~/.trae-cn/cache/skill_catalog.json")
+
+# 本地镜像目录：<mirror_dir>/<owner>/<repo>
+DEFAULT_MIRROR_DIR = os.path.expanduser("~/.trae-cn/cache/mirrors")
+
+DEFAULT_REPOS = ["anthropics/skills", "anthropics/webdev-skills"]
+
+# 尚未建立索引（如离线）时使用的内置条目
+SEED_SKILLS = [
+    {"name": "pdf", "repo": "anthropics/skills", "description": "PDF编辑和处理"},
+    {"name": "docx", "repo": "anthropics/skills", "description": "Word文档处理"},
+    {"name": "web-scraping", "repo": "anthropics/skills", "description": "网页抓取"},
+    {"name": "data-analysis", "repo": "anthropics/skills", "description": "数据分析"},
+    {"name": "react", "repo": "anthropics/webdev-skills", "description": "React开发"},
+    {"name": "vue", "repo": "anthropics/webdev-skills", "description": "Vue开发"},
+    {"name": "typescript", "repo": "anthropics/webdev-skills", "description": "TypeScript开发"},
+    {"name": "css", "repo": "anthropics/webdev-skills", "description": "CSS样式"},
+]
+
+
+def _tokens(text: str) -> List[str]:
+    """把名称/描述切分为小写词"""
+    return text.lower().replace("-", " ").replace("_", " ").replace("/", " ").split()
+
+
+def _trigrams(text: str) -> set:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class SkillCatalog:
+    """官方技能目录"""
+
+    def __init__(self, repos: List[str] = None, catalog_path: str = None, mirror_dir: str = None):
+        """初始化目录"""
+        self.repos = list(repos or DEFAULT_REPOS)
+        self.catalog_path = catalog_path or DEFAULT_CATALOG_PATH
+        self.mirror_dir = mirror_dir or DEFAULT_MIRROR_DIR
+        self.repo_data = {}
+        self.skills = []
+        self._token_index = {}
+        self._trigram_index = {}
+        self._name_trigram_index = {}
+        self._name_trigram_counts = []
+        self._short_names = []
+        self._load()
+
+    @classmethod
+    def from_config(cls, config: Dict, **kwargs) -> "SkillCatalog":
+        """从sources.json配置创建"""
+        repos = config.get("sources", {}).get("openskills", {}).get("official_skills")
+        return cls(repos, **kwargs)
+
+    def _load(self):
+        """加载磁盘索引"""
+        try:
+            with open(self.catalog_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            data = {}
+
+        if data.get("version") == CATALOG_VERSION:
+            self.repo_data = {
+                repo: info for repo, info in data.get("repos", {}).items()
+                if repo in self.repos
+            }
+
+        self._build_index()
+
+    def save(self):
+        """保存索引到磁盘"""
+        data = {"version": CATALOG_VERSION, "repos": self.repo_data}
+        os.makedirs(os.path.dirname(self.catalog_path), exist_ok=True)
+        tmp_path = f"{self.catalog_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.catalog_path)
+
+    def _build_index(self):
+        """构建内存倒排索引（词 → 条目、名称/描述三元组 → 条目、名称三元组 → 条目）"""
+        self.skills = []
+        for repo in self.repos:
+            if repo in self.repo_data:
+                self.skills.extend(self.repo_data[repo]["skills"])
+            else:
+                self.skills.extend(s for s in SEED_SKILLS if s["repo"] == repo)
+
+        self._token_index = {}
+        self._trigram_index = {}
+        self._name_trigram_index = {}
+        self._name_trigram_counts = []
+        self._short_names = []
+        for i, skill in enumerate(self.skills):
+            for token in set(_tokens(skill["name"]) + _tokens(skill.get("description", ""))):
+                self._token_index.setdefault(token, set()).add(i)
+            name_grams = _trigrams(skill["name"].lower())
+            for gram in name_grams | _trigrams(skill.get("description", "").lower()):
+                self._trigram_index.setdefault(gram, set()).add(i)
+            # 名称包含于查询中（"name in query"）的候选：名称的三元组全部出现在查询中
+            for gram in name_grams:
+                self._name_trigram_index.setdefault(gram, set()).add(i)
+            self._name_trigram_counts.append(len(name_grams))
+            if not name_grams:
+                self._short_names.append(i)
+
+    def refresh(self, fetch: bool = True) -> Dict:
+        """
+        重新枚举各仓库的技能
+
+        有本地镜像时遍历镜像，否则（fetch为True时）通过GitHub API获取目录树
+
+        Args:
+            fetch: 没有本地镜像时是否联网获取
+
+        Returns:
+            {仓库: {"source": ..., "count": ...} 或 {"error": ...}}
+        """
+        report = {}
+        for repo in self.repos:
+            mirror = os.path.join(self.mirror_dir, *repo.split("/"))
+            try:
+                if os.path.isdir(mirror):
+                    skills = self._enumerate_mirror(repo, mirror)
+                    source = "mirror"
+                elif fetch:
+                    skills = self._enumerate_remote(repo)
+                    source = "github"
+                else:
+                    continue
+            except Exception as e:
+                report[repo] = {"error": str(e)}
+                continue
+
+            self.repo_data[repo] = {
+                "source": source,
+                "indexed_at": time.time(),
+                "skills": skills
+            }
+            report[repo] = {"source": source, "count": len(skills)}
+
+        self._build_index()
+        self.save()
+        return report
+
+    def _enumerate_mirror(self, repo: str, mirror: str) -> List[Dict]:
+        """遍历本地镜像中所有包含SKILL.md的目录"""
+        skills = []
+        for dirpath, dirnames, filenames in os.walk(mirror):
+            dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+            if "SKILL.md" not in filenames or dirpath == mirror:
+                continue
+
+            skill_md = os.path.join(dirpath, "SKILL.md")
+            try:
+                header = parse_skill_header(skill_md)
+            except OSError:
+                continue
+
+            rel_path = os.path.relpath(dirpath, mirror).replace(os.sep, "/")
+            skills.append({
+                "name": header["metadata"].get("name") or os.path.basename(dirpath),
+                "repo": repo,
+                "path": rel_path,
+                "description": header["description"]
+            })
+        return skills
+
+    def _enumerate_remote(self, repo: str) -> List[Dict]:
+        """通过GitHub git trees API获取仓库中所有SKILL.md所在目录"""
+        url = f"https://api.github.com/repos/{repo}/git/trees/HEAD?recursive=1"
+        request = urllib.request.Request(url, headers={"Accept": "application/vnd.github+json"})
+        token = os.environ.get("GITHUB_TOKEN")
+        if token:
+            request.add_header("Authorization", f"Bearer {token}")
+
+        with urllib.request.urlopen(request, timeout=15) as response:
+            tree = json.load(response).get("tree", [])
+
+        skills = []
+        for item in tree:
+            path = item.get("path", "")
+            if item.get("type") != "blob" or not path.endswith("/SKILL.md"):
+                continue
+            rel_path = path[:-len("/SKILL.md")]
+            if any(part.startswith(".") for part in rel_path.split("/")):
+                continue
+            skills.append({
+                "name": rel_path.rsplit("/", 1)[-1],
+                "repo": repo,
+                "path": rel_path,
+                "description": ""
+            })
+        return skills
+
+    def search(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        搜索目录
+
+        Args:
+            query: 搜索关键词
+            limit: 返回结果数量
+
+        Returns:
+            按分数排序的技能列表（含score）
+        """
+        query_lower = query.lower().strip()
+        if not query_lower:
+            return []
+
+        query_tokens = set(_tokens(query_lower))
+
+        # 候选：词倒排 ∪ 三元组倒排（查询是名称/描述的子串）∪ 名称三元组计数（名称是查询的子串）；
+        # 查询过短时退化为全量
+        candidates = set()
+        for token in query_tokens:
+            candidates |= self._token_index.get(token, set())
+
+        grams = _trigrams(query_lower)
+        if grams:
+            postings = [self._trigram_index.get(g, set()) for g in grams]
+            candidates |= set.intersection(*postings)
+
+            hits = {}
+            for gram in grams:
+                for i in self._name_trigram_index.get(gram, ()):
+                    hits[i] = hits.get(i, 0) + 1
+            candidates.update(i for i, count in hits.items() if count == self._name_trigram_counts[i])
+            candidates.update(self._short_names)
+        else:
+            candidates = set(range(len(self.skills)))
+
+        results = []
+        for i in candidates:
+            skill = self.skills[i]
+            score = self._score(skill, query_lower, query_tokens)
+            if score > 0:
+                results.append((score, i))
+
+        results.sort(key=lambda x: (-x[0], x[1]))
+        return [dict(self.skills[i], score=score) for score, i in results[:limit]]
+
+    def _score(self, skill: Dict, query_lower: str, query_tokens: set) -> float:
+        """计算匹配分数"""
+        name = skill["name"].lower()
+        description = skill.get("description", "").lower()
+
+        if name == query_lower:
+            return 1.0
+        if query_lower in name:
+            return 0.9
+        if name in query_lower:
+            return 0.8
+
+        score = 0.0
+        skill_tokens = set(_tokens(name)) | set(_tokens(description))
+        if query_tokens and query_tokens & skill_tokens:
+            score = len(query_tokens & skill_tokens) / len(query_tokens) * 0.7
+        if query_lower in description:
+            score = max(score, 0.6)
+        return score
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='OpenSkills官方技能目录索引')
+    parser.add_argument('query', nargs='?', help='搜索关键词')
+    parser.add_argument('--refresh', action='store_true', help='重新枚举官方仓库')
+    parser.add_argument('--offline', action='store_true', help='刷新时只使用本地镜像')
+    parser.add_argument('--limit', type=int, default=10, help='返回结果数量')
+
+    args = parser.parse_args()
+
+    config_path = os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        "config", "sources.json"
+    )
+    with open(config_path, 'r', encoding='utf-8') as f:
+        catalog = SkillCatalog.from_config(json.load(f))
+
+    if args.refresh:
+        for repo, info in catalog.refresh(fetch=not args.offline).items():
+            if "error" in info:
+                print(f"❌ {repo}: {info['error']}")
+            else:
+                print(f"✅ {repo}: {info['count']} 个技能 ({info['source']})")
+
+    if args.query:
+        for skill in catalog.search(args.query, args.limit):
+            print(f"📦 {skill['name']}  [{skill['score']:.2f}]  {skill['repo']}")
+
+
+if __name__ == "__main__":
+    main()
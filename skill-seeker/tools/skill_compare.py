@@ -6,27 +6,81 @@
 import os
 import json
 import sys
-from typing import List, Dict, Any
+import copy
+import heapq
+from itertools import groupby
+from typing import List, Dict, Any, Iterator, Optional
 from datetime import datetime
+from collections import OrderedDict
 
 # 添加父目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from skill_metadata import get_store
+from comparison_engine import ComparisonEngine, DEFAULT_WEIGHTS
+from skill_similarity import SkillSimilarity
+from skill_cost import SkillCostAnalyzer
+
+# 比较结果缓存格式版本，结果结构变化时递增
+CACHE_VERSION = 4
+
+DEFAULT_CACHE_SIZE = 128
 
 
 class SkillComparer:
     """技能比较器"""
     
-    def __init__(self):
-        """初始化比较器"""
-        self.comparison_cache = {}
+    def __init__(self, metadata_path: str = None, config_path: str = None,
+                 cache_size: int = DEFAULT_CACHE_SIZE, cache_path: str = None):
+        """
+        初始化比较器
+        
+        Args:
+            metadata_path: 技能元数据文件，默认data/skill_metadata.json
+            config_path: 配置文件，默认config/sources.json（使用其中comparison.weights）
+            cache_size: 比较结果LRU缓存容量
+            cache_path: 比较结果持久化文件，None表示只缓存在内存中
+        """
+        self.comparison_cache = OrderedDict()
+        self.cache_size = cache_size
+        self.cache_path = cache_path
+        self.metadata = get_store(metadata_path)
+        self.config = self._load_config(config_path)
+        self.engine = ComparisonEngine(self.config.get("comparison", {}).get("weights"))
+        self._similarity = None
+        self._cost_analyzer = None
+        self._load_cache()
+    
+    def _load_config(self, config_path: str = None) -> Dict:
+        """加载配置"""
+        if config_path is None:
+            config_path = os.path.join(
+                os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                "config", "sources.json"
+            )
+        
+        if os.path.exists(config_path):
+            with open(config_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        
+        return {"comparison": {"weights": dict(DEFAULT_WEIGHTS)}}
     
-    def compare(self, skills: List[str], criteria: List[str] = None) -> Dict:
+    def _weights_text(self) -> str:
+        """权重说明文字"""
+        labels = {"downloads": "下载量", "features": "功能", "ratings": "评分", "popularity": "流行度"}
+        return "，".join(
+            f"{labels[c]}{weight:g}" for c, weight in self.engine.weights.items() if weight
+        )
+    
+    def compare(self, skills: List[str], criteria: List[str] = None, top: int = None) -> Dict:
         """
         比较多个技能
         
         Args:
             skills: 技能名称列表
-            criteria: 比较维度 (downloads/features/ratings/popularity/updated)
+            criteria: 比较维度 (downloads/features/ratings/popularity/context_cost)
+            top: 摘要模式，每个维度只给出前N名（部分选择），不生成完整功能对照表
             
         Returns:
             比较结果
@@ -47,11 +101,37 @@ class SkillComparer:
                 "skills_found": len(skill_infos)
             }
         
+        # 上下文开销取决于已安装文件，其结果也参与缓存键
+        costs = self._context_costs(skill_infos) if "context_cost" in criteria else None
+        
+        # 缓存的是按名称排序后的完整排名结果（比较引擎的各维度排名、总分排名、功能对照），
+        # "A vs B" 与 "B vs A" 共享；命中时只把下标换回请求顺序，值相同时保持请求中的先后
+        order = sorted(range(len(skill_infos)), key=lambda i: skill_infos[i]["name"])
+        canonical = [skill_infos[i] for i in order]
+        canonical_costs = [costs[i] for i in order] if costs is not None else None
+        # 摘要模式只选出前N名（比较引擎部分选择）；N不小于技能数时等同完整排名
+        rank_top = top if top is not None and top < len(skill_infos) else None
+        
+        cache_key = self._cache_key(canonical, criteria, canonical_costs, rank_top)
+        ranked = self.comparison_cache.get(cache_key)
+        if ranked is not None:
+            self.comparison_cache.move_to_end(cache_key)
+        else:
+            ranked = self._evaluate(canonical, rank_top, canonical_costs)
+            ranked.pop("costs", None)
+            if rank_top is None:
+                ranked["features"] = self._feature_map(canonical)
+            ranked["use_case_overlap"] = self._use_case_overlap(canonical)
+            self._cache_put(cache_key, ranked)
+        
+        table = self._remap(ranked, order, rank_top, costs)
+        
         # 进行比较
         comparison = {
             "timestamp": datetime.now().isoformat(),
             "skills_compared": [s["name"] for s in skill_infos],
             "criteria": criteria,
+            "top": top,
             "summary": {},
             "detailed_comparison": {},
             "recommendation": ""
@@ -60,11 +140,11 @@ class SkillComparer:
         # 按维度比较
         for criterion in criteria:
             comparison["detailed_comparison"][criterion] = self._compare_by_criterion(
-                skill_infos, criterion
+                skill_infos, criterion, table
             )
         
         # 生成总结
-        comparison["summary"] = self._generate_summary(skill_infos, criteria)
+        comparison["summary"] = self._generate_summary(skill_infos, criteria, table, top)
         
         # 生成推荐
         comparison["recommendation"] = self._generate_recommendation(
@@ -73,393 +153,289 @@ class SkillComparer:
         
         return comparison
     
-    def _get_skill_info(self, skill_name: str) -> Dict:
-        """获取技能信息"""
-        # 预定义的技能数据库
-        skill_database = {
-            # awesome-claude-skills
-            "docx": {
-                "name": "docx",
-                "source": "awesome-claude-skills",
-                "description": "Word文档处理",
-                "downloads": 28100,
-                "features": ["创建文档", "编辑文档", "格式设置", "表格处理"],
-                "ratings": 4.8,
-                "use_cases": ["办公文档", "报告生成", "合同处理"],
-                "pros": ["功能全面", "易于使用", "格式支持好"],
-                "cons": ["仅支持Word格式"]
-            },
-            "pdf": {
-                "name": "pdf",
-                "source": "awesome-claude-skills",
-                "description": "PDF文档处理",
-                "downloads": 25300,
-                "features": ["PDF读取", "PDF编辑", "PDF合并", "PDF转换"],
-                "ratings": 4.7,
-                "use_cases": ["文档查看", "PDF编辑", "文档归档"],
-                "pros": ["格式稳定", "跨平台", "安全性高"],
-                "cons": ["编辑功能有限"]
-            },
-            "pptx": {
-                "name": "pptx",
-                "source": "awesome-claude-skills",
-                "description": "PowerPoint处理",
-                "downloads": 22400,
-                "features": ["创建幻灯片", "编辑演示文稿", "图表生成", "模板应用"],
-                "ratings": 4.6,
-                "use_cases": ["演示文稿", "报告展示", "培训材料"],
-                "pros": ["视觉效果佳", "模板丰富", "动画支持"],
-                "cons": ["文件较大"]
-            },
-            "xlsx": {
-                "name": "xlsx",
-                "source": "awesome-claude-skills",
-                "description": "Excel表格处理",
-                "downloads": 26500,
-                "features": ["数据处理", "公式计算", "图表生成", "数据透视"],
-                "ratings": 4.7,
-                "use_cases": ["数据分析", "财务报表", "数据整理"],
-                "pros": ["计算功能强", "图表丰富", "数据处理高效"],
-                "cons": ["学习曲线较陡"]
-            },
-            "mcp-builder": {
-                "name": "mcp-builder",
-                "source": "awesome-claude-skills",
-                "description": "创建MCP服务器",
-                "downloads": 18500,
-                "features": ["MCP服务器生成", "API集成", "协议实现", "模板创建"],
-                "ratings": 4.9,
-                "use_cases": ["MCP开发", "API封装", "服务集成"],
-                "pros": ["自动化程度高", "模板丰富", "文档完善"],
-                "cons": ["需要编程基础"]
-            },
-            "skill-creator": {
-                "name": "skill-creator",
-                "source": "awesome-claude-skills",
-                "description": "创建自定义技能",
-                "downloads": 15600,
-                "features": ["技能模板", "代码生成", "文档创建", "测试工具"],
-                "ratings": 4.8,
-                "use_cases": ["技能开发", "自定义工具", "工作流创建"],
-                "pros": ["降低开发门槛", "模板丰富", "社区支持"],
-                "cons": ["需要理解技能架构"]
-            },
-            "webapp-testing": {
-                "name": "webapp-testing",
-                "source": "awesome-claude-skills",
-                "description": "Web应用测试",
-                "downloads": 14200,
-                "features": ["自动化测试", "性能测试", "UI测试", "API测试"],
-                "ratings": 4.7,
-                "use_cases": ["Web测试", "质量保证", "CI/CD集成"],
-                "pros": ["测试覆盖全面", "自动化程度高", "报告详细"],
-                "cons": ["配置较复杂"]
-            },
-            "frontend-design": {
-                "name": "frontend-design",
-                "source": "awesome-claude-skills",
-                "description": "前端设计",
-                "downloads": 8600,
-                "features": ["UI设计", "响应式布局", "组件设计", "样式优化"],
-                "ratings": 4.6,
-                "use_cases": ["Web设计", "UI优化", "前端开发"],
-                "pros": ["设计规范", "组件丰富", "易于实现"],
-                "cons": ["设计主观性强"]
-            },
-            "connect-apps": {
-                "name": "connect-apps",
-                "source": "awesome-claude-skills",
-                "description": "连接应用程序",
-                "downloads": 12300,
-                "features": ["应用集成", "API连接", "数据同步", "自动化工作流"],
-                "ratings": 4.8,
-                "use_cases": ["系统集成", "数据同步", "自动化"],
-                "pros": ["集成能力强", "支持应用多", "配置简单"],
-                "cons": ["依赖第三方API"]
-            },
-            "file-organizer": {
-                "name": "file-organizer",
-                "source": "awesome-claude-skills",
-                "description": "文件整理",
-                "downloads": 19800,
-                "features": ["文件分类", "重复检测", "自动整理", "批量重命名"],
-                "ratings": 4.7,
-                "use_cases": ["文件管理", "磁盘整理", "归档处理"],
-                "pros": ["自动化程度高", "智能分类", "节省时间"],
-                "cons": ["需要初始配置"]
-            },
-            
-            # claude-code-infrastructure
-            "backend-dev-guidelines": {
-                "name": "backend-dev-guidelines",
-                "source": "claude-code-infrastructure",
-                "description": "后端开发指南",
-                "downloads": 8900,
-                "features": ["API设计", "数据库操作", "安全最佳实践", "性能优化"],
-                "ratings": 4.9,
-                "use_cases": ["后端开发", "API开发", "企业应用"],
-                "pros": ["生产验证", "最佳实践", "架构清晰"],
-                "cons": ["主要针对Node.js"]
-            },
-            "frontend-dev-guidelines": {
-                "name": "frontend-dev-guidelines",
-                "source": "claude-code-infrastructure",
-                "description": "前端开发指南",
-                "downloads": 9200,
-                "features": ["React模式", "TypeScript规范", "MUI组件", "状态管理"],
-                "ratings": 4.8,
-                "use_cases": ["前端开发", "React项目", "企业应用"],
-                "pros": ["组件丰富", "类型安全", "性能优化"],
-                "cons": ["依赖React生态"]
-            },
-            "skill-developer": {
-                "name": "skill-developer",
-                "source": "claude-code-infrastructure",
-                "description": "技能开发元技能",
-                "downloads": 7600,
-                "features": ["技能架构", "开发流程", "测试方法", "发布指南"],
-                "ratings": 4.9,
-                "use_cases": ["技能开发", "元编程", "工具创建"],
-                "pros": ["系统化方法", "最佳实践", "社区标准"],
-                "cons": ["需要深入理解"]
-            },
-            "route-tester": {
-                "name": "route-tester",
-                "source": "claude-code-infrastructure",
-                "description": "API路由测试",
-                "downloads": 6800,
-                "features": ["路由测试", "认证测试", "性能测试", "自动化"],
-                "ratings": 4.7,
-                "use_cases": ["API测试", "后端验证", "质量保证"],
-                "pros": ["测试全面", "自动化", "报告详细"],
-                "cons": ["需要API文档"]
-            },
-            "error-tracking": {
-                "name": "error-tracking",
-                "source": "claude-code-infrastructure",
-                "description": "错误追踪",
-                "downloads": 8100,
-                "features": ["Sentry集成", "错误监控", "性能追踪", "告警通知"],
-                "ratings": 4.8,
-                "use_cases": ["错误监控", "生产环境", "质量保障"],
-                "pros": ["实时监控", "详细报告", "集成简单"],
-                "cons": ["依赖Sentry服务"]
-            },
-            
-            # superpowers
-            "brainstorming": {
-                "name": "brainstorming",
-                "source": "superpowers",
-                "description": "需求头脑风暴",
-                "downloads": 11200,
-                "features": ["需求分析", "方案探索", "设计完善", "风险评估"],
-                "ratings": 4.9,
-                "use_cases": ["项目启动", "需求分析", "方案设计"],
-                "pros": ["系统化方法", "全面考虑", "降低风险"],
-                "cons": ["需要更多时间"]
-            },
-            "writing-plans": {
-                "name": "writing-plans",
-                "source": "superpowers",
-                "description": "制定实施计划",
-                "downloads": 10500,
-                "features": ["任务分解", "时间规划", "依赖分析", "里程碑设置"],
-                "ratings": 4.8,
-                "use_cases": ["项目管理", "开发规划", "进度跟踪"],
-                "pros": ["计划详细", "可执行性强", "易于跟踪"],
-                "cons": ["需要维护更新"]
-            },
-            "test-driven-development": {
-                "name": "test-driven-development",
-                "source": "superpowers",
-                "description": "测试驱动开发",
-                "downloads": 9800,
-                "features": ["TDD流程", "测试编写", "代码重构", "质量保证"],
-                "ratings": 4.9,
-                "use_cases": ["高质量开发", "代码重构", "Bug预防"],
-                "pros": ["代码质量高", "Bug少", "设计更好"],
-                "cons": ["初期开发较慢"]
-            },
-            "subagent-driven-development": {
-                "name": "subagent-driven-development",
-                "source": "superpowers",
-                "description": "子代理驱动开发",
-                "downloads": 8700,
-                "features": ["子任务分配", "并行开发", "代码审查", "进度跟踪"],
-                "ratings": 4.8,
-                "use_cases": ["大型项目", "团队协作", "快速开发"],
-                "pros": ["开发速度快", "并行处理", "质量可控"],
-                "cons": ["需要协调管理"]
-            },
-            
-            # Vercel Skills
-            "vercel-react-best-practices": {
-                "name": "vercel-react-best-practices",
-                "source": "vercel",
-                "description": "React最佳实践",
-                "downloads": 39600,
-                "features": ["组件模式", "状态管理", "性能优化", "TypeScript"],
-                "ratings": 4.9,
-                "use_cases": ["React开发", "前端项目", "企业应用"],
-                "pros": ["行业标准", "性能优秀", "类型安全"],
-                "cons": ["学习曲线较陡"]
-            },
-            "web-design-guidelines": {
-                "name": "web-design-guidelines",
-                "source": "vercel",
-                "description": "网页设计规范",
-                "downloads": 30100,
-                "features": ["设计系统", "响应式设计", "可访问性", "UI组件"],
-                "ratings": 4.8,
-                "use_cases": ["Web设计", "UI/UX", "设计系统"],
-                "pros": ["设计规范", "系统全面", "易于维护"],
-                "cons": ["设计主观性"]
-            },
-            "seo-audit": {
-                "name": "seo-audit",
-                "source": "vercel",
-                "description": "SEO诊断",
-                "downloads": 2600,
-                "features": ["SEO分析", "排名诊断", "优化建议", "竞品分析"],
-                "ratings": 4.7,
-                "use_cases": ["SEO优化", "网站推广", "流量提升"],
-                "pros": ["分析全面", "建议实用", "效果显著"],
-                "cons": ["需要持续优化"]
+    def _remap(self, ranked: Dict, order: List[int], top: int = None,
+               costs: List[Optional[Dict]] = None) -> Dict:
+        """
+        把按名称排序的排名结果换回请求顺序
+        
+        只做下标映射，值相同的技能按请求顺序排列，结果与直接对请求顺序排名一致
+        
+        Args:
+            ranked: 按名称排序的排名结果（_evaluate的输出及功能对照、场景交集）
+            order: 请求顺序下标按名称排序后的排列
+            top: 摘要模式N，只含前N名
+            costs: 请求顺序的上下文开销
+        """
+        position = [0] * len(order)
+        for p, i in enumerate(order):
+            position[i] = p
+        
+        values = {c: [column[p] for p in position] for c, column in ranked["values"].items()}
+        scores = [ranked["scores"][p] for p in position]
+        table = {
+            "values": values,
+            "rankings": {
+                c: _remap_ranking(ranking, order, values[c], top)
+                for c, ranking in ranked["rankings"].items()
             },
-            "agent-browser": {
-                "name": "agent-browser",
-                "source": "vercel",
-                "description": "AI操作浏览器",
-                "downloads": 3100,
-                "features": ["浏览器自动化", "网页测试", "数据抓取", "UI测试"],
-                "ratings": 4.6,
-                "use_cases": ["自动化测试", "网页抓取", "UI验证"],
-                "pros": ["自动化程度高", "测试全面", "节省时间"],
-                "cons": ["需要维护脚本"]
+            "scores": scores,
+            "overall": _remap_ranking(ranked["overall"], order, scores, top),
+            "use_case_overlap": list(ranked["use_case_overlap"])
+        }
+        if "features" in ranked:
+            table["features"] = {
+                feature: sorted(order[p] for p in holders)
+                for feature, holders in ranked["features"].items()
             }
+        if costs is not None:
+            table["costs"] = costs
+        return table
+    
+    def _feature_map(self, skills: List[Dict]) -> Dict[str, List[int]]:
+        """功能 → 支持该功能的技能下标（用预计算的功能集合一次构建倒排）"""
+        feature_map = {}
+        for i, skill in enumerate(skills):
+            for feature in self.metadata.feature_set(skill):
+                feature_map.setdefault(feature, []).append(i)
+        return feature_map
+    
+    def _use_case_overlap(self, skills: List[Dict]) -> List[str]:
+        """所有技能共同的使用场景（预计算集合求交集）"""
+        use_cases = [self.metadata.use_case_set(s) for s in skills]
+        if not use_cases:
+            return []
+        return list(use_cases[0].intersection(*use_cases[1:]))
+    
+    def _cache_key(self, skill_infos: List[Dict], criteria: List[str], costs: List[Dict] = None,
+                   top: int = None) -> str:
+        """
+        规范化缓存键：排序后的技能名、比较维度、摘要模式N、元数据版本与内容摘要、权重、上下文开销
+        
+        元数据或权重变化时键随之变化，旧结果不会被命中
+        """
+        return json.dumps([
+            [s["name"] for s in skill_infos],
+            list(criteria),
+            top,
+            self.metadata.version,
+            self.metadata.digest,
+            sorted(self.engine.weights.items()),
+            [
+                [cost["skill_md"]["tokens"], cost["skill_md"]["bytes"], cost["total"]["tokens"]] if cost else None
+                for cost in costs
+            ] if costs is not None else None
+        ], ensure_ascii=False)
+    
+    def _cache_put(self, key: str, ranked: Dict):
+        """写入LRU缓存，超出容量时淘汰最久未使用的结果"""
+        if self.cache_size <= 0:
+            return
+        
+        self.comparison_cache[key] = copy.deepcopy(ranked)
+        self.comparison_cache.move_to_end(key)
+        while len(self.comparison_cache) > self.cache_size:
+            self.comparison_cache.popitem(last=False)
+        
+        self._save_cache()
+    
+    def _load_cache(self):
+        """从磁盘加载比较结果缓存"""
+        if not self.cache_path:
+            return
+        
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        
+        if data.get("version") != CACHE_VERSION:
+            return
+        
+        for key, ranked in data.get("entries", [])[-self.cache_size:]:
+            self.comparison_cache[key] = ranked
+    
+    def _save_cache(self):
+        """把比较结果缓存写入磁盘（按LRU顺序）"""
+        if not self.cache_path:
+            return
+        
+        data = {
+            "version": CACHE_VERSION,
+            "entries": [[key, ranked] for key, ranked in self.comparison_cache.items()]
         }
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+    
+    def _get_skill_info(self, skill_name: str) -> Dict:
+        """获取技能信息（精确 → 忽略大小写 → 模糊匹配，返回副本）"""
+        return self.metadata.get_info(skill_name)
+    
+    @property
+    def similarity(self) -> SkillSimilarity:
+        """相似度索引（首次使用时加载，元数据有变化时增量更新）"""
+        if self._similarity is None:
+            self._similarity = SkillSimilarity(self.metadata)
+            self._similarity.update()
+        return self._similarity
+    
+    def alternatives(self, skill: str, k: int = 5) -> Dict:
+        """
+        查找技能在整个目录中最相近的替代技能
         
-        # 查找技能（支持模糊匹配）
-        skill_lower = skill_name.lower()
-        
-        # 精确匹配
-        if skill_name in skill_database:
-            return skill_database[skill_name]
-        
-        # 模糊匹配
-        for key, value in skill_database.items():
-            if skill_lower in key.lower() or key.lower() in skill_lower:
-                return value
-        
-        # 未找到
-        return {
-            "name": skill_name,
-            "source": "unknown",
-            "description": "未知技能",
-            "downloads": 0,
-            "features": [],
-            "ratings": 0,
-            "use_cases": [],
-            "pros": [],
-            "cons": []
+        Args:
+            skill: 技能名称（支持模糊匹配）
+            k: 返回数量，超过预计算的近邻数（DEFAULT_NEIGHBORS）时截断并在结果中说明
+            
+        Returns:
+            {"skill", "cluster", "alternatives": [{"name", "score", "cluster"}]}，截断时另有"note"
+        """
+        if k < 1:
+            return {"error": f"替代技能数量须为正数: {k}"}
+        
+        record = self.metadata.lookup(skill)
+        if record is None:
+            return {"error": f"未收录的技能: {skill}"}
+        
+        name = record["name"]
+        result = {
+            "skill": name,
+            "cluster": self.similarity.clusters.get(name),
+            "alternatives": self.similarity.alternatives(name, min(k, self.similarity.k))
         }
+        if k > self.similarity.k:
+            result["note"] = f"每个技能只预计算前{self.similarity.k}个近邻，最多返回{self.similarity.k}个"
+        return result
+    
+    @property
+    def cost_analyzer(self) -> SkillCostAnalyzer:
+        """上下文开销分析器（首次使用时创建）"""
+        if self._cost_analyzer is None:
+            self._cost_analyzer = SkillCostAnalyzer()
+        return self._cost_analyzer
+    
+    def _context_costs(self, skills: List[Dict]) -> List[Optional[Dict]]:
+        """各技能的上下文开销，未安装的技能为None"""
+        costs = [self.cost_analyzer.cost(s["name"]) for s in skills]
+        self.cost_analyzer.save()
+        return costs
+    
+    def _evaluate(self, skills: List[Dict], top: int = None, costs: List[Optional[Dict]] = None) -> Dict:
+        """
+        比较引擎评估，并在需要时加入context_cost维度
+        
+        context_cost取SKILL.md的近似token数（技能被触发时加载的部分），越小越好，开销未知的排在最后
+        """
+        table = self.engine.evaluate(skills, top)
+        if costs is None:
+            return table
+        
+        tokens = [cost["skill_md"]["tokens"] if cost else None for cost in costs]
+        table["values"]["context_cost"] = tokens
+        table["rankings"]["context_cost"] = _context_cost_ranking(
+            tokens, top if top is not None and top < len(skills) else None
+        )
+        table["costs"] = costs
+        return table
     
-    def _compare_by_criterion(self, skills: List[Dict], criterion: str) -> Dict:
-        """按特定维度比较"""
+    def _compare_by_criterion(self, skills: List[Dict], criterion: str, table: Dict = None) -> Dict:
+        """按特定维度比较（排名来自比较引擎的一次性评估）"""
         comparison = {
             "criterion": criterion,
             "winner": "",
             "rankings": []
         }
         
-        if criterion == "downloads":
-            sorted_skills = sorted(skills, key=lambda x: x.get("downloads", 0), reverse=True)
-            comparison["winner"] = sorted_skills[0]["name"] if sorted_skills else ""
-            comparison["rankings"] = [
-                {"name": s["name"], "value": s.get("downloads", 0)} 
-                for s in sorted_skills
-            ]
-            
-        elif criterion == "features":
-            sorted_skills = sorted(skills, key=lambda x: len(x.get("features", [])), reverse=True)
-            comparison["winner"] = sorted_skills[0]["name"] if sorted_skills else ""
+        if table is None:
+            costs = self._context_costs(skills) if criterion == "context_cost" else None
+            table = self._evaluate(skills, costs=costs)
+        
+        order = table["rankings"].get(criterion)
+        if not order:
+            return comparison
+        
+        values = table["values"][criterion]
+        comparison["winner"] = skills[order[0]]["name"]
+        if criterion == "features":
             comparison["rankings"] = [
-                {"name": s["name"], "value": len(s.get("features", [])), "features": s.get("features", [])} 
-                for s in sorted_skills
+                {"name": skills[i]["name"], "value": values[i], "features": skills[i].get("features", [])}
+                for i in order
             ]
-            
-        elif criterion == "ratings":
-            sorted_skills = sorted(skills, key=lambda x: x.get("ratings", 0), reverse=True)
-            comparison["winner"] = sorted_skills[0]["name"] if sorted_skills else ""
+        elif criterion == "context_cost":
+            costs = table["costs"]
             comparison["rankings"] = [
-                {"name": s["name"], "value": s.get("ratings", 0)} 
-                for s in sorted_skills
+                {
+                    "name": skills[i]["name"],
+                    "value": values[i],
+                    "total_tokens": costs[i]["total"]["tokens"] if costs[i] else None,
+                    "bytes": costs[i]["skill_md"]["bytes"] if costs[i] else None
+                }
+                for i in order
             ]
-            
-        elif criterion == "popularity":
-            # 综合考虑下载量和评分
-            def popularity_score(skill):
-                downloads = skill.get("downloads", 0)
-                ratings = skill.get("ratings", 0)
-                return downloads * ratings
-            
-            sorted_skills = sorted(skills, key=popularity_score, reverse=True)
-            comparison["winner"] = sorted_skills[0]["name"] if sorted_skills else ""
+        else:
             comparison["rankings"] = [
-                {"name": s["name"], "value": popularity_score(s)} 
-                for s in sorted_skills
+                {"name": skills[i]["name"], "value": values[i]}
+                for i in order
             ]
         
         return comparison
     
-    def _generate_summary(self, skills: List[Dict], criteria: List[str]) -> Dict:
-        """生成比较总结"""
+    def _generate_summary(self, skills: List[Dict], criteria: List[str], table: Dict = None,
+                          top: int = None) -> Dict:
+        """生成比较总结（摘要模式下跳过完整功能对照表）"""
         summary = {
             "total_skills": len(skills),
             "best_overall": "",
             "best_by_criterion": {},
+            "overall_scores": [],
             "feature_comparison": {},
             "use_case_overlap": []
         }
         
+        if table is None:
+            costs = self._context_costs(skills) if "context_cost" in criteria else None
+            table = self._evaluate(skills, top, costs)
+        
         # 找出每个维度的最佳技能
         for criterion in criteria:
-            if criterion == "downloads":
-                best = max(skills, key=lambda x: x.get("downloads", 0))
-                summary["best_by_criterion"]["downloads"] = {
-                    "skill": best["name"],
-                    "value": best.get("downloads", 0)
+            if criterion in ("downloads", "ratings") or (
+                criterion == "context_cost" and "context_cost" in table["values"]
+                and table["values"]["context_cost"][table["rankings"]["context_cost"][0]] is not None
+            ):
+                best = table["rankings"][criterion][0]
+                summary["best_by_criterion"][criterion] = {
+                    "skill": skills[best]["name"],
+                    "value": table["values"][criterion][best]
                 }
-            elif criterion == "ratings":
-                best = max(skills, key=lambda x: x.get("ratings", 0))
-                summary["best_by_criterion"]["ratings"] = {
-                    "skill": best["name"],
-                    "value": best.get("ratings", 0)
-                }
-        
-        # 功能对比
-        all_features = set()
-        for skill in skills:
-            all_features.update(skill.get("features", []))
         
-        for feature in all_features:
-            supporting_skills = [
-                s["name"] for s in skills 
-                if feature in s.get("features", [])
-            ]
-            summary["feature_comparison"][feature] = supporting_skills
+        # 功能对比：功能 → 支持技能（比较结果缓存中已有时直接使用）
+        if top is None:
+            feature_map = table.get("features")
+            if feature_map is None:
+                feature_map = self._feature_map(skills)
+            summary["feature_comparison"] = {
+                feature: [skills[i]["name"] for i in holders]
+                for feature, holders in feature_map.items()
+            }
         
         # 使用场景重叠
-        use_cases = [set(s.get("use_cases", [])) for s in skills]
-        if use_cases:
-            overlap = use_cases[0]
-            for uc in use_cases[1:]:
-                overlap &= uc
-            summary["use_case_overlap"] = list(overlap)
+        use_case_overlap = table.get("use_case_overlap")
+        summary["use_case_overlap"] = (
+            use_case_overlap if use_case_overlap is not None else self._use_case_overlap(skills)
+        )
         
-        # 综合最佳（下载量 * 评分）
-        best_overall = max(skills, key=lambda x: x.get("downloads", 0) * x.get("ratings", 0))
-        summary["best_overall"] = best_overall["name"]
+        # 综合最佳（按配置权重的归一化加权总分）
+        summary["overall_scores"] = [
+            {"name": skills[i]["name"], "score": round(table["scores"][i], 4)}
+            for i in table["overall"]
+        ]
+        summary["best_overall"] = skills[table["overall"][0]]["name"]
         
         return summary
     
@@ -489,7 +465,7 @@ class SkillComparer:
             best = summary.get("best_overall", "")
             if best:
                 recommendation += f"\n🏆 **综合推荐：{best}**\n"
-                recommendation += f"   理由：下载量和评分综合最高\n"
+                recommendation += f"   理由：按配置权重（{self._weights_text()}）加权总分最高\n"
             
             # 特定场景推荐
             recommendation += "\n📌 **场景建议：**\n"
@@ -504,7 +480,8 @@ class SkillComparer:
         else:
             # 多个技能比较
             recommendation = f"📊 比较了 {len(skills)} 个技能\n\n"
-            recommendation += f"🏆 **综合最佳：{summary.get('best_overall', 'N/A')}**\n\n"
+            recommendation += f"🏆 **综合最佳：{summary.get('best_overall', 'N/A')}**\n"
+            recommendation += f"   （按配置权重加权：{self._weights_text()}）\n\n"
             
             for criterion, result in summary.get("best_by_criterion", {}).items():
                 recommendation += f"✅ {criterion}最佳：{result['skill']} ({result['value']})\n"
@@ -513,35 +490,79 @@ class SkillComparer:
     
     def format_comparison(self, comparison: Dict) -> str:
         """格式化比较结果"""
+        return "".join(self.iter_comparison_sections(comparison))
+    
+    def iter_comparison_sections(self, comparison: Dict) -> Iterator[str]:
+        """逐段生成比较报告，调用方可以边生成边输出"""
         if "error" in comparison:
-            return f"❌ 错误：{comparison['error']}"
+            yield f"❌ 错误：{comparison['error']}"
+            return
         
-        output = f"""📊 技能比较报告
+        skills_compared = comparison["skills_compared"]
+        if comparison.get("top"):
+            skills_text = f"{len(skills_compared)} 个技能（每个维度显示前 {comparison['top']} 名）"
+        else:
+            skills_text = ', '.join(skills_compared)
+        
+        yield f"""📊 技能比较报告
 {'=' * 60}
 
-比较技能：{', '.join(comparison['skills_compared'])}
+比较技能：{skills_text}
 比较维度：{', '.join(comparison['criteria'])}
 
 """
         
         # 详细比较
         for criterion, details in comparison.get("detailed_comparison", {}).items():
-            output += f"\n**{criterion.upper()} 对比**\n"
-            output += f"胜出者：{details.get('winner', 'N/A')}\n"
-            output += "排名：\n"
+            section = f"\n**{criterion.upper()} 对比**\n"
+            section += f"胜出者：{details.get('winner', 'N/A')}\n"
+            section += "排名：\n"
             for rank in details.get("rankings", []):
-                output += f"  {rank['name']}: {rank['value']}\n"
+                if criterion == "context_cost":
+                    value = "未知（未安装）" if rank["value"] is None else (
+                        f"~{rank['value']:,} tokens（含引用文件 ~{rank['total_tokens']:,}）"
+                    )
+                else:
+                    value = rank["value"]
+                section += f"  {rank['name']}: {value}\n"
+            yield section
         
         # 总结
         summary = comparison.get("summary", {})
-        output += f"\n{'=' * 60}\n📈 总结\n{'=' * 60}\n"
-        output += f"综合最佳：{summary.get('best_overall', 'N/A')}\n"
+        section = f"\n{'=' * 60}\n📈 总结\n{'=' * 60}\n"
+        section += f"综合最佳：{summary.get('best_overall', 'N/A')}\n"
+        for entry in summary.get("overall_scores", []):
+            section += f"  {entry['name']}: {entry['score']}\n"
+        yield section
         
         # 推荐
-        output += f"\n{'=' * 60}\n"
-        output += comparison.get("recommendation", "")
-        
-        return output
+        yield f"\n{'=' * 60}\n" + comparison.get("recommendation", "")
+
+
+def _remap_ranking(ranking: List[int], order: List[int], values: List, top: int = None) -> List[int]:
+    """
+    按名称排序的排名 → 请求顺序下标，值相同时按请求顺序
+    
+    摘要模式下前N名边界处的并列值可能有未入选的，按请求顺序重新选取
+    """
+    mapped = [order[p] for p in ranking]
+    if top is not None and mapped:
+        last = values[mapped[-1]]
+        mapped = [i for i in mapped if values[i] != last]
+        mapped += [i for i, value in enumerate(values) if value == last][:top - len(mapped)]
+    # 排名中相同的值是连续的一段，只在段内按请求顺序排列
+    result = []
+    for _, run in groupby(mapped, values.__getitem__):
+        result.extend(sorted(run))
+    return result
+
+
+def _context_cost_ranking(tokens: List[Optional[int]], top: int = None) -> List[int]:
+    """context_cost排名：token数升序，开销未知的排在最后，相同时按下标"""
+    key = lambda i: (tokens[i] is None, tokens[i] or 0, i)
+    if top is None:
+        return sorted(range(len(tokens)), key=key)
+    return heapq.nsmallest(top, range(len(tokens)), key=key)
 
 
 def main():
@@ -551,20 +572,44 @@ def main():
     parser = argparse.ArgumentParser(description='技能比较工具')
     parser.add_argument('skills', nargs='+', help='要比较的技能名称')
     parser.add_argument('--criteria', nargs='+', 
-                       choices=['downloads', 'features', 'ratings', 'popularity'],
+                       choices=['downloads', 'features', 'ratings', 'popularity', 'context_cost'],
                        default=['downloads', 'features', 'ratings'],
                        help='比较维度')
     parser.add_argument('--json', action='store_true', help='以JSON格式输出')
+    parser.add_argument('--cache-file', help='比较结果缓存文件（跨进程复用）')
+    parser.add_argument('--top', type=int, metavar='N',
+                       help='摘要模式：每个维度只列出前N名，适合一次比较大量技能')
+    parser.add_argument('--alternatives', type=int, metavar='K',
+                       help='列出每个技能最相近的K个替代技能（不做比较）')
     
     args = parser.parse_args()
     
-    comparer = SkillComparer()
-    result = comparer.compare(args.skills, args.criteria)
+    comparer = SkillComparer(cache_path=args.cache_file)
+    
+    if args.alternatives:
+        results = [comparer.alternatives(skill, args.alternatives) for skill in args.skills]
+        if args.json:
+            print(json.dumps(results, indent=2, ensure_ascii=False))
+            return
+        for result in results:
+            if "error" in result:
+                print(f"❌ {result['error']}")
+                continue
+            print(f"🔁 {result['skill']} 的替代技能 [簇 {result['cluster']}]")
+            if "note" in result:
+                print(f"  ⚠️ {result['note']}")
+            for alt in result["alternatives"]:
+                print(f"  {alt['name']}: {alt['score']:.3f}  [簇 {alt['cluster']}]")
+        return
+    
+    result = comparer.compare(args.skills, args.criteria, top=args.top)
     
     if args.json:
         print(json.dumps(result, indent=2, ensure_ascii=False))
     else:
-        print(comparer.format_comparison(result))
+        for section in comparer.iter_comparison_sections(result):
+            print(section, end="")
+        print()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+技能上下文开销分析
+统计技能SKILL.md及其引用文件的字节数、行数和近似token数，按mtime缓存结果，
+供技能比较（context_cost维度）和技能搜索（--max-tokens过滤）使用
+"""
+import os
+import re
+import json
+import threading
+from typing import Dict, List, Optional
+
+# 缓存版本，统计口径变化时递增
+COST_VERSION = 2
+
+DEFAULT_COST_CACHE_PATH = os.path.expanduser("~/.trae-cn/cache/skill_cost.json")
+
+DEFAULT_SKILLS_DIRS = [os.path.expanduser("~/.trae-cn/skills")]
+
+# SKILL.md中对其他文件的引用：Markdown链接和反引号中的相对路径
+_MARKDOWN_LINK = re.compile(r'\]\(([^)\s#]+)(?:#[^)]*)?\)')
+_CODE_PATH = re.compile(r'`([\w./-]+\.[A-Za-z0-9]+)`')
+
+# 单个引用文件最多统计的字节数（避免误引用大文件时读入内存）
+MAX_REFERENCE_BYTES = 4 * 1024 * 1024
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    近似token数：ASCII字符约4个一个token，非ASCII字符（如中文）约1个一个token
+    """
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def measure_text(data: bytes, truncated: bool = False) -> Dict:
+    """
+    统计一段内容的字节数、行数和近似token数
+
+    Args:
+        data: 实际读取的内容，字节数按它统计
+        truncated: 内容是否在读取上限处截断（末尾可能是不完整的UTF-8字符，忽略而不计为替换字符）
+    """
+    text = data.decode('utf-8', errors='ignore' if truncated else 'replace')
+    return {
+        "bytes": len(data),
+        "lines": text.count('\n') + (1 if text and not text.endswith('\n') else 0),
+        "tokens": estimate_tokens(text)
+    }
+
+
+def find_references(skill_dir: str, content: str) -> List[str]:
+    """SKILL.md中引用的、位于技能目录内的文件（相对路径，去重并保持出现顺序）"""
+    root = os.path.realpath(skill_dir)
+    references = []
+    seen = set()
+    for match in list(_MARKDOWN_LINK.finditer(content)) + list(_CODE_PATH.finditer(content)):
+        target = match.group(1)
+        if "://" in target or target.startswith(("mailto:", "/")):
+            continue
+        path = os.path.realpath(os.path.join(root, target))
+        if not path.startswith(root + os.sep) or not os.path.isfile(path):
+            continue
+        rel_path = os.path.relpath(path, root).replace(os.sep, "/")
+        if rel_path == "SKILL.md" or rel_path in seen:
+            continue
+        seen.add(rel_path)
+        references.append(rel_path)
+    return references
+
+
+def _stat_key(path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+class SkillCostAnalyzer:
+    """技能上下文开销分析器"""
+
+    def __init__(self, skills_dirs: List[str] = None, cache_path: str = None):
+        """
+        初始化分析器
+
+        Args:
+            skills_dirs: 按名称查找技能时搜索的目录
+            cache_path: 结果缓存文件
+        """
+        self.skills_dirs = list(skills_dirs or DEFAULT_SKILLS_DIRS)
+        self.cache_path = cache_path or DEFAULT_COST_CACHE_PATH
+        self.entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        """加载缓存"""
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == COST_VERSION:
+            self.entries = data.get("entries", {})
+
+    def save(self):
+        """有变化时保存缓存"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {"version": COST_VERSION, "entries": self.entries}
+            self._dirty = False
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def find_skill(self, skill_name: str) -> Optional[str]:
+        """在技能目录中查找技能"""
+        for skills_dir in self.skills_dirs:
+            skill_dir = os.path.join(skills_dir, skill_name)
+            if os.path.isfile(os.path.join(skill_dir, "SKILL.md")):
+                return skill_dir
+        return None
+
+    def cost(self, skill_name: str) -> Optional[Dict]:
+        """按名称统计技能开销，未安装时返回None"""
+        skill_dir = self.find_skill(skill_name)
+        if skill_dir is None:
+            return None
+        return self.analyze(skill_dir)
+
+    def analyze(self, skill_dir: str) -> Optional[Dict]:
+        """
+        统计技能目录的上下文开销
+
+        SKILL.md及其引用文件的mtime/大小都未变化时直接返回缓存结果
+
+        Returns:
+            {
+                "skill_md": {"bytes", "lines", "tokens"},
+                "references": [{"path", "bytes", "lines", "tokens"}]（超过MAX_REFERENCE_BYTES的文件
+                    只统计前MAX_REFERENCE_BYTES字节，并带"truncated": True）,
+                "total": {"bytes", "lines", "tokens"}
+            }
+            SKILL.md不存在时返回None
+        """
+        skill_dir = os.path.abspath(skill_dir)
+        skill_md = os.path.join(skill_dir, "SKILL.md")
+        skill_md_key = _stat_key(skill_md)
+        if skill_md_key is None:
+            return None
+
+        cached = self.entries.get(skill_dir)
+        if cached and cached["files"].get("SKILL.md") == skill_md_key and all(
+            _stat_key(os.path.join(skill_dir, rel_path)) == key
+            for rel_path, key in cached["files"].items() if rel_path != "SKILL.md"
+        ):
+            return cached["cost"]
+
+        try:
+            with open(skill_md, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        files = {"SKILL.md": skill_md_key}
+        skill_md_cost = measure_text(data)
+        references = []
+        for rel_path in find_references(skill_dir, data.decode('utf-8', errors='replace')):
+            path = os.path.join(skill_dir, rel_path)
+            key = _stat_key(path)
+            try:
+                with open(path, 'rb') as f:
+                    # 多读1字节以判断是否超过上限
+                    ref_data = f.read(MAX_REFERENCE_BYTES + 1)
+            except OSError:
+                continue
+            truncated = len(ref_data) > MAX_REFERENCE_BYTES
+            if truncated:
+                ref_data = ref_data[:MAX_REFERENCE_BYTES]
+            files[rel_path] = key
+            # bytes是实际统计的字节数；截断时另有truncated标记
+            reference = dict(measure_text(ref_data, truncated), path=rel_path)
+            if truncated:
+                reference["truncated"] = True
+            references.append(reference)
+
+        total = {
+            field: skill_md_cost[field] + sum(ref[field] for ref in references)
+            for field in ("bytes", "lines", "tokens")
+        }
+        cost = {"skill_md": skill_md_cost, "references": references, "total": total}
+
+        with self._lock:
+            self.entries[skill_dir] = {"files": files, "cost": cost}
+            self._dirty = True
+        return cost
+
+
+def _is_path(target: str) -> bool:
+    """命令行参数是目录路径（而不是技能名称）"""
+    return os.sep in target or "/" in target or target.startswith((".", "~"))
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='技能上下文开销分析')
+    parser.add_argument('skills', nargs='*',
+                        help='技能名称或目录（含路径分隔符或以.、~开头时按目录处理；默认分析全部已安装技能）')
+    parser.add_argument('--json', action='store_true', help='以JSON格式输出')
+
+    args = parser.parse_args()
+
+    analyzer = SkillCostAnalyzer()
+    targets = args.skills
+    if not targets:
+        targets = sorted(
+            name for skills_dir in analyzer.skills_dirs if os.path.isdir(skills_dir)
+            for name in os.listdir(skills_dir)
+        )
+
+    results = {}
+    errors = {}
+    for target in targets:
+        if _is_path(target):
+            skill_dir = os.path.expanduser(target)
+            if os.path.isdir(skill_dir):
+                results[target] = analyzer.analyze(skill_dir)
+            else:
+                results[target] = None
+                errors[target] = "目录不存在"
+        else:
+            results[target] = analyzer.cost(target)
+            if results[target] is None:
+                errors[target] = "未安装的技能"
+                if os.path.isdir(target):
+                    errors[target] += f"（分析当前目录下的同名目录请用 ./{target}）"
+    analyzer.save()
+
+    if args.json:
+        print(json.dumps(results, indent=2, ensure_ascii=False))
+        return
+
+    for target, cost in sorted(results.items(), key=lambda x: x[1]["total"]["tokens"] if x[1] else float("inf")):
+        if cost is None:
+            print(f"❓ {target}: {errors.get(target, '未找到SKILL.md')}")
+            continue
+        print(f"🧮 {target}: SKILL.md ~{cost['skill_md']['tokens']:,} tokens "
+              f"({cost['skill_md']['bytes']:,} B, {cost['skill_md']['lines']} 行)，"
+              f"含引用文件共 ~{cost['total']['tokens']:,} tokens ({len(cost['references'])} 个引用)"
+              + ("，部分引用文件过大只统计了开头" if any(ref.get("truncated") for ref in cost["references"]) else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+本地技能索引
+只读取SKILL.md开头部分解析元数据，正文词集计算一次后缓存到磁盘
+"""
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# 头部解析最多读取的字节数（frontmatter + 首段）
+HEADER_READ_LIMIT = 8192
+
+# 索引缓存版本，结构变化时递增
+INDEX_VERSION = 1
+
+# 读取SKILL.md的线程数上限（网络挂载的家目录上I/O延迟占主导）
+SCAN_WORKERS = 16
+
+DEFAULT_INDEX_PATH = os.path.expanduser("~/.trae-cn/cache/skill_index.json")
+
+
+def parse_skill_header(skill_md: str, max_bytes: int = HEADER_READ_LIMIT) -> Dict:
+    """
+    解析SKILL.md头部
+
+    只读取前max_bytes字节，提取YAML frontmatter（简单的key: value）和首段描述
+
+    Args:
+        skill_md: SKILL.md路径
+        max_bytes: 最大读取字节数
+
+    Returns:
+        {"metadata": {...}, "description": "..."}
+    """
+    with open(skill_md, 'rb') as f:
+        head = f.read(max_bytes)
+
+    # 截断处可能切断多字节字符，忽略即可
+    lines = head.decode('utf-8', errors='ignore').split('\n')
+
+    metadata = {}
+    start = 0
+    if lines and lines[0].strip() == '---':
+        for i, line in enumerate(lines[1:], 1):
+            if line.strip() == '---':
+                start = i + 1
+                break
+            if ':' in line and not line.startswith((' ', '\t')):
+                key, value = line.split(':', 1)
+                metadata[key.strip()] = value.strip().strip('"\'')
+        else:
+            # frontmatter未在读取范围内闭合，按普通正文处理
+            metadata = {}
+
+    description = metadata.get("description", "")
+    if not description:
+        # 与原逻辑一致：跳过标题行，在随后的行中找第一行非标题文本
+        for line in lines[start + 1:start + 10]:
+            if line.strip() and not line.startswith('#'):
+                description = line.strip()
+                break
+
+    return {"metadata": metadata, "description": description[:200]}
+
+
+def tokenize_skill_file(skill_md: str) -> List[str]:
+    """读取完整SKILL.md并返回去重后的小写词列表"""
+    with open(skill_md, 'r', encoding='utf-8') as f:
+        content = f.read().lower()
+    return sorted(set(content.split()))
+
+
+class LocalSkillIndex:
+    """本地已安装技能索引"""
+
+    def __init__(self, skills_dir: str, index_path: str = None):
+        """初始化索引"""
+        self.skills_dir = skills_dir
+        self.index_path = index_path or DEFAULT_INDEX_PATH
+        self.entries = {}
+        self._token_sets = {}
+        self._dirty = False
+        self._lock = threading.RLock()
+        # 由SkillIndexWatcher维护时为True，此时索引始终是最新的，无需stat校验
+        self.watched = False
+        self._load()
+
+    def _load(self):
+        """加载磁盘缓存"""
+        if not os.path.exists(self.index_path):
+            return
+
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        if data.get("version") != INDEX_VERSION or data.get("skills_dir") != self.skills_dir:
+            return
+
+        self.entries = data.get("entries", {})
+
+    def save(self):
+        """保存索引到磁盘（仅在有变化时写入）"""
+        with self._lock:
+            if not self._dirty:
+                return
+            data = {
+                "version": INDEX_VERSION,
+                "skills_dir": self.skills_dir,
+                "entries": self.entries
+            }
+            self._dirty = False
+
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+    def names(self) -> List[str]:
+        """索引中的全部技能名"""
+        with self._lock:
+            return list(self.entries)
+
+    def scan(self, workers: int = SCAN_WORKERS) -> List[str]:
+        """
+        全量扫描技能目录，刷新变化的索引项并移除已删除的技能
+
+        使用os.scandir的DirEntry缓存类型信息判断目录，SKILL.md的校验和读取
+        在有界线程池中并发进行
+
+        Args:
+            workers: 线程池大小
+
+        Returns:
+            技能名列表（目录顺序）
+        """
+        try:
+            with os.scandir(self.skills_dir) as it:
+                skill_names = [entry.name for entry in it if entry.is_dir()]
+        except OSError:
+            skill_names = []
+
+        if skill_names:
+            workers = max(1, min(workers, len(skill_names)))
+            # 按线程数分片，避免每个技能提交一次任务的调度开销
+            chunks = [skill_names[i::workers] for i in range(workers)]
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # 消费迭代器以便传播异常
+                for _ in executor.map(self._refresh_many, chunks):
+                    pass
+
+        with self._lock:
+            for name in set(self.entries) - set(skill_names):
+                self.remove(name)
+
+        return skill_names
+
+    def _refresh_many(self, skill_names: List[str]):
+        """顺序刷新一组技能（线程池工作函数）"""
+        for name in skill_names:
+            self.refresh(name)
+
+    def get(self, skill_name: str, validate: bool = True) -> Optional[Dict]:
+        """
+        获取技能索引项，SKILL.md变化时自动重建
+
+        Args:
+            skill_name: 技能目录名
+            validate: 是否stat校验，刚执行过scan()时可传False
+
+        Returns:
+            索引项，技能目录不存在时返回None
+        """
+        if self.watched or not validate:
+            with self._lock:
+                return self.entries.get(skill_name)
+
+        return self.refresh(skill_name)
+
+    def refresh(self, skill_name: str) -> Optional[Dict]:
+        """按SKILL.md的mtime和大小校验并刷新单个技能的索引项"""
+        skill_path = os.path.join(self.skills_dir, skill_name)
+        skill_md = os.path.join(skill_path, "SKILL.md")
+
+        try:
+            st = os.stat(skill_md)
+            stamp = [st.st_mtime_ns, st.st_size]
+        except OSError:
+            if not os.path.isdir(skill_path):
+                self.remove(skill_name)
+                return None
+            stamp = None
+
+        with self._lock:
+            entry = self.entries.get(skill_name)
+            if entry is not None and entry.get("stamp") == stamp:
+                return entry
+
+        return self._build(skill_name, skill_path, skill_md, stamp)
+
+    def _build(self, skill_name: str, skill_path: str, skill_md: str, stamp: Optional[List]) -> Dict:
+        """构建索引项"""
+        entry = {
+            "path": skill_path,
+            "stamp": stamp,
+            "description": "",
+            "metadata": {},
+            "tokens": []
+        }
+
+        if stamp is not None:
+            try:
+                header = parse_skill_header(skill_md)
+                entry["description"] = header["description"]
+                entry["metadata"] = header["metadata"]
+                entry["tokens"] = tokenize_skill_file(skill_md)
+            except (OSError, UnicodeDecodeError):
+                pass
+
+        with self._lock:
+            self.entries[skill_name] = entry
+            self._token_sets.pop(skill_name, None)
+            self._dirty = True
+
+        return entry
+
+    def remove(self, skill_name: str):
+        """移除索引项"""
+        with self._lock:
+            if self.entries.pop(skill_name, None) is not None:
+                self._token_sets.pop(skill_name, None)
+                self._dirty = True
+
+    def tokens(self, skill_name: str, validate: bool = True) -> frozenset:
+        """获取技能正文词集"""
+        entry = self.get(skill_name, validate)
+        if entry is None:
+            return frozenset()
+
+        with self._lock:
+            token_set = self._token_sets.get(skill_name)
+            if token_set is None:
+                token_set = frozenset(entry["tokens"])
+                self._token_sets[skill_name] = token_set
+            return token_set
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+技能元数据存储
+从data/skill_metadata.json加载一次，构建只读记录和精确/忽略大小写/模糊查找表，
+供skill_compare.py等工具共用
+"""
+import os
+import json
+import hashlib
+import threading
+from types import MappingProxyType
+from typing import Dict, Optional
+
+DEFAULT_METADATA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data", "skill_metadata.json"
+)
+
+_load_lock = threading.Lock()
+_stores = {}
+
+
+def _freeze(record: Dict) -> MappingProxyType:
+    """把记录转换为只读映射，列表转为元组"""
+    return MappingProxyType({
+        key: tuple(value) if isinstance(value, list) else value
+        for key, value in record.items()
+    })
+
+
+def unknown_skill(skill_name: str) -> Dict:
+    """未收录技能的占位信息"""
+    return {
+        "name": skill_name,
+        "source": "unknown",
+        "description": "未知技能",
+        "downloads": 0,
+        "features": [],
+        "ratings": 0,
+        "use_cases": [],
+        "pros": [],
+        "cons": []
+    }
+
+
+class SkillMetadataStore:
+    """只读技能元数据及其查找表"""
+
+    def __init__(self, path: str = None):
+        """加载元数据文件并构建查找表"""
+        self.path = path or DEFAULT_METADATA_PATH
+
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        data = json.loads(raw.decode('utf-8'))
+
+        self.version = data.get("version", "")
+        # 内容摘要：版本号未更新但数据被修改时，依赖元数据的缓存也能失效
+        self.digest = hashlib.sha256(raw).hexdigest()[:16]
+
+        records = {}
+        for record in data.get("skills", []):
+            records.setdefault(record["name"], _freeze(record))
+
+        # 按目录顺序排列的名称；模糊匹配时取顺序最靠前的技能
+        self.names = tuple(records)
+        self.records = MappingProxyType(records)
+        self._order = MappingProxyType({name: i for i, name in enumerate(self.names)})
+
+        lower = {}
+        substrings = {}
+        for name in self.names:
+            key = name.lower()
+            lower.setdefault(key, name)
+            substrings.setdefault("", name)
+            for i in range(len(key)):
+                for j in range(i + 1, len(key) + 1):
+                    substrings.setdefault(key[i:j], name)
+
+        # 小写名称 → 最靠前的技能
+        self._lower = MappingProxyType(lower)
+        # 名称的任意子串 → 包含它的最靠前的技能
+        self._substrings = MappingProxyType(substrings)
+
+        # 每个技能的功能/使用场景集合，以及功能 → 技能的倒排索引
+        self.feature_sets = MappingProxyType({
+            name: frozenset(record.get("features", ())) for name, record in records.items()
+        })
+        self.use_case_sets = MappingProxyType({
+            name: frozenset(record.get("use_cases", ())) for name, record in records.items()
+        })
+        feature_index = {}
+        for name in self.names:
+            for feature in self.feature_sets[name]:
+                feature_index.setdefault(feature, []).append(name)
+        self.feature_index = MappingProxyType({
+            feature: tuple(names) for feature, names in feature_index.items()
+        })
+
+    def lookup(self, skill_name: str) -> Optional[MappingProxyType]:
+        """
+        查找技能：精确 → 忽略大小写 → 模糊（查询是名称的子串，或名称是查询的子串）
+
+        查找开销只与查询长度有关，与目录大小无关
+
+        Returns:
+            只读记录，未找到时返回None
+        """
+        record = self.records.get(skill_name)
+        if record is not None:
+            return record
+
+        query = skill_name.lower()
+        name = self._lower.get(query)
+        if name is not None:
+            return self.records[name]
+
+        candidates = []
+        name = self._substrings.get(query)
+        if name is not None:
+            candidates.append(name)
+
+        # 反向：查询的子串恰好是某个技能名称
+        for i in range(len(query)):
+            for j in range(i + 1, len(query) + 1):
+                name = self._lower.get(query[i:j])
+                if name is not None:
+                    candidates.append(name)
+
+        if not candidates:
+            return None
+        return self.records[min(candidates, key=self._order.__getitem__)]
+
+    def feature_set(self, info: Dict) -> frozenset:
+        """技能信息对应的功能集合（已收录技能直接使用预计算结果）"""
+        features = self.feature_sets.get(info.get("name"))
+        if features is None:
+            features = frozenset(info.get("features", ()))
+        return features
+
+    def use_case_set(self, info: Dict) -> frozenset:
+        """技能信息对应的使用场景集合（已收录技能直接使用预计算结果）"""
+        use_cases = self.use_case_sets.get(info.get("name"))
+        if use_cases is None:
+            use_cases = frozenset(info.get("use_cases", ()))
+        return use_cases
+
+    def get_info(self, skill_name: str) -> Dict:
+        """查找技能并返回可修改的副本，未找到时返回占位信息"""
+        record = self.lookup(skill_name)
+        if record is None:
+            return unknown_skill(skill_name)
+        return {
+            key: list(value) if isinstance(value, tuple) else value
+            for key, value in record.items()
+        }
+
+
+def get_store(path: str = None) -> SkillMetadataStore:
+    """获取（按路径只加载一次的）元数据存储"""
+    path = os.path.abspath(path or DEFAULT_METADATA_PATH)
+    store = _stores.get(path)
+    if store is None:
+        with _load_lock:
+            store = _stores.get(path)
+            if store is None:
+                store = SkillMetadataStore(path)
+                _stores[path] = store
+    return store
@@ -6,15 +6,21 @@
 import os
 import json
 import re
+import heapq
 import subprocess
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
+from concurrent.futures import ThreadPoolExecutor
 from difflib import SequenceMatcher
 import sys
 
 # 添加父目录到路径
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from skill_index import LocalSkillIndex
+from skill_catalog import SkillCatalog
+from skill_cost import SkillCostAnalyzer
+
 class SkillSearcher:
     """技能搜索器"""
     
@@ -23,6 +29,9 @@ class SkillSearcher:
         self.config = self._load_config(config_path)
         self.cache = {}
         self.local_skills_dir = os.path.expanduser("~/.trae-cn/skills")
+        self.index = LocalSkillIndex(self.local_skills_dir)
+        self.cost_analyzer = SkillCostAnalyzer([self.local_skills_dir])
+        self._catalog = None
         
     def _load_config(self, config_path: str = None) -> Dict:
         """加载配置"""
@@ -50,63 +59,163 @@ class SkillSearcher:
             }
         }
     
-    def search(self, query: str, source: str = "all", limit: int = 10) -> List[Dict]:
+    def search(self, query: str, source: str = "all", limit: int = 10, max_tokens: int = None) -> List[Dict]:
         """
         搜索技能
         
         Args:
             query: 搜索关键词
-            source: 搜索源 (local/github/vercel/all)
+            source: 搜索源 (local/github/vercel/openskills/all)
             limit: 返回结果数量
+            max_tokens: 只保留SKILL.md近似token数不超过该值的技能（开销未知的远程结果保留）
             
         Returns:
             技能列表
         """
-        results = []
-        
-        if source in ["local", "all"]:
-            local_results = self._search_local(query, limit)
-            results.extend(local_results)
+        results = list(self.search_iter(query, source, limit, max_tokens))
         
-        if source in ["github", "all"]:
-            github_results = self._search_github(query, limit)
-            results.extend(github_results)
+        # 按分数排序（稳定排序，同分时保持来源顺序）
+        return sorted(results, key=lambda x: x.get("score", 0), reverse=True)[:limit]
+    
+    def search_iter(self, query: str, source: str = "all", limit: int = 10,
+                    max_tokens: int = None) -> Iterator[Dict]:
+        """
+        流式搜索技能，每个来源完成后立即产出其结果
         
-        if source in ["vercel", "all"]:
-            vercel_results = self._search_vercel(query, limit)
-            results.extend(vercel_results)
+        各来源并发执行，按 local → github → vercel → openskills 的顺序产出；
+        同名技能只保留先出现的一个，无法进入当前前limit名的结果不再产出。
         
-        # 去重和排序
-        results = self._deduplicate_and_sort(results, query)
+        Args:
+            query: 搜索关键词
+            source: 搜索源 (local/github/vercel/openskills/all)
+            limit: 返回结果数量
+            max_tokens: 上下文开销上限，见search()
+            
+        Yields:
+            技能信息
+        """
+        if limit <= 0:
+            return
+        
+        searchers = [
+            (name, func) for name, func in [
+                ("local", self._search_local),
+                ("github", self._search_github),
+                ("vercel", self._search_vercel),
+                ("openskills", self._search_openskills),
+            ]
+            if source in [name, "all"]
+        ]
         
-        return results[:limit]
+        seen = set()
+        # 当前前limit名的堆：(分数, -产出序号)，堆顶是最先被挤出的结果
+        top_k = []
+        order = 0
+        
+        with ThreadPoolExecutor(max_workers=max(len(searchers), 1)) as executor:
+            futures = [
+                executor.submit(func, query, limit, max_tokens) if name == "local"
+                else executor.submit(func, query, limit)
+                for name, func in searchers
+            ]
+            
+            for future in futures:
+                for result in future.result():
+                    name = result["name"]
+                    if name in seen:
+                        continue
+                    seen.add(name)
+                    
+                    item = (result.get("score", 0), -order)
+                    if len(top_k) < limit:
+                        heapq.heappush(top_k, item)
+                    elif item[0] > top_k[0][0]:
+                        heapq.heapreplace(top_k, item)
+                    else:
+                        continue
+                    
+                    order += 1
+                    yield result
     
-    def _search_local(self, query: str, limit: int) -> List[Dict]:
-        """搜索本地技能"""
-        results = []
+    def _search_local(self, query: str, limit: int, max_tokens: int = None) -> List[Dict]:
+        """
+        搜索本地技能（附带上下文开销，超过max_tokens的技能被过滤）
         
-        if not os.path.exists(self.local_skills_dir):
-            return results
+        只有给出max_tokens时才为每个候选统计开销；否则只统计最终前limit名
+        """
+        results = []
         
         query_lower = query.lower()
         query_keywords = set(query_lower.split())
         
-        for skill_name in os.listdir(self.local_skills_dir):
+        # 监听模式下索引始终是最新的，无需再遍历目录；
+        # 否则扫描一次目录，之后的评分直接使用刚刷新的索引项
+        if self.index.watched:
+            skill_names = self.index.names()
+        else:
+            skill_names = self.index.scan()
+        
+        if limit <= 0:
+            return results
+        
+        min_score = self.config["search"]["min_score"]
+        # 当前前limit名的堆：(分数, -目录序号, 技能信息)，堆顶是最先被挤出的结果
+        top_k = []
+        
+        for order, skill_name in enumerate(skill_names):
             skill_path = os.path.join(self.local_skills_dir, skill_name)
             
-            if not os.path.isdir(skill_path):
+            # 同分时目录顺序靠前者优先，因此必须严格超过当前第limit名
+            beat = top_k[0][0] if len(top_k) >= limit else None
+            
+            # 计算匹配分数（上界无法进入前limit名时跳过昂贵阶段）
+            score = self._bounded_match_score(skill_name, query, skill_path, min_score, beat)
+            
+            if score is None or score < min_score or (beat is not None and score <= beat):
                 continue
             
-            # 计算匹配分数
-            score = self._calculate_match_score(skill_name, query, skill_path)
+            if max_tokens is not None:
+                cost = self.cost_analyzer.analyze(skill_path)
+                if cost and cost["skill_md"]["tokens"] > max_tokens:
+                    continue
+            
+            skill_info = self._get_skill_info(skill_path, skill_name)
+            skill_info["score"] = score
+            skill_info["source"] = "local"
             
-            if score >= self.config["search"]["min_score"]:
-                skill_info = self._get_skill_info(skill_path, skill_name)
-                skill_info["score"] = score
-                skill_info["source"] = "local"
-                results.append(skill_info)
+            item = (score, -order, skill_info)
+            if beat is None:
+                heapq.heappush(top_k, item)
+            else:
+                heapq.heapreplace(top_k, item)
         
-        return sorted(results, key=lambda x: x["score"], reverse=True)[:limit]
+        results = [item[2] for item in sorted(top_k, key=lambda x: (-x[0], -x[1]))]
+        
+        # 过滤时已统计过的技能直接命中分析器的缓存
+        for skill_info in results:
+            cost = self.cost_analyzer.analyze(os.path.join(self.local_skills_dir, skill_info["name"]))
+            if cost:
+                skill_info["context_tokens"] = cost["skill_md"]["tokens"]
+                skill_info["context_total_tokens"] = cost["total"]["tokens"]
+        
+        self.index.save()
+        self.cost_analyzer.save()
+        
+        return results
+    
+    def start_watch(self, on_change=None):
+        """
+        启动技能目录监听（用于常驻进程）
+        
+        Args:
+            on_change: 单个技能变化后的回调 (技能名, 索引项或None)
+            
+        Returns:
+            SkillIndexWatcher，使用完毕后调用stop()
+        """
+        from skill_watch import SkillIndexWatcher
+        
+        return SkillIndexWatcher(self.index, on_change=on_change).start()
     
     def _search_github(self, query: str, limit: int) -> List[Dict]:
         """搜索GitHub技能仓库"""
@@ -182,8 +291,52 @@ class SkillSearcher:
         
         return sorted(results, key=lambda x: x["score"], reverse=True)[:limit]
     
+    def _search_openskills(self, query: str, limit: int) -> List[Dict]:
+        """搜索OpenSkills官方仓库技能目录（与openskills_manager.py共用索引）"""
+        if self._catalog is None:
+            self._catalog = SkillCatalog.from_config(self.config)
+        
+        results = []
+        for skill in self._catalog.search(query, limit):
+            if skill["score"] < self.config["search"]["min_score"]:
+                continue
+            
+            path = skill.get("path", skill["name"])
+            results.append({
+                "name": skill["name"],
+                "full_name": f"{skill['repo']}/{path}",
+                "description": skill.get("description", ""),
+                "score": skill["score"],
+                "source": "openskills",
+                "url": f"https://github.com/{skill['repo']}/tree/HEAD/{path}"
+            })
+        
+        return results
+    
     def _calculate_match_score(self, skill_name: str, query: str, skill_path: str = None) -> float:
         """计算匹配分数"""
+        return self._bounded_match_score(skill_name, query, skill_path)
+    
+    def _bounded_match_score(self, skill_name: str, query: str, skill_path: str = None,
+                             min_score: float = None, beat: float = None) -> Optional[float]:
+        """
+        分阶段计算匹配分数，上界无法满足要求时提前返回None
+        
+        分数 = max(相似度, 关键词分数, 语义分数)。先用廉价的上界
+        （SequenceMatcher.real_quick_ratio/quick_ratio、语义分数上限0.6）
+        判断能否达到min_score并严格超过beat，不能则跳过后续阶段。
+        未被跳过时返回的分数与完整计算完全一致。
+        
+        Args:
+            skill_name: 技能名称
+            query: 搜索关键词
+            skill_path: 技能路径（提供时参与语义匹配）
+            min_score: 需达到的最低分数
+            beat: 需严格超过的分数（当前第limit名）
+            
+        Returns:
+            匹配分数，或None表示无法满足要求
+        """
         skill_lower = skill_name.lower()
         query_lower = query.lower()
         
@@ -198,46 +351,57 @@ class SkillSearcher:
         if skill_lower in query_lower:
             return 0.8
         
-        # 相似度匹配
-        similarity = SequenceMatcher(None, skill_lower, query_lower).ratio()
+        def admissible(bound: float) -> bool:
+            return (min_score is None or bound >= min_score) and (beat is None or bound > beat)
         
         # 关键词匹配
+        score = 0.0
         query_keywords = set(query_lower.split())
         skill_keywords = set(skill_lower.replace("-", " ").replace("_", " ").split())
         
         if query_keywords & skill_keywords:
             keyword_score = len(query_keywords & skill_keywords) / len(query_keywords)
-            similarity = max(similarity, keyword_score * 0.7)
+            score = keyword_score * 0.7
+        
+        # 相似度上界
+        matcher = SequenceMatcher(None, skill_lower, query_lower)
+        ratio_bound = matcher.real_quick_ratio()
+        
+        if not admissible(max(score, ratio_bound, 0.6 if skill_path else 0.0)):
+            return None
         
-        # 如果提供了技能路径，读取SKILL.md进行语义匹配
-        if skill_path and os.path.exists(skill_path):
-            semantic_score = self._semantic_match(skill_path, query_lower)
-            similarity = max(similarity, semantic_score)
+        # 如果提供了技能路径，使用SKILL.md词集进行语义匹配
+        if skill_path:
+            score = max(score, self._semantic_match(skill_path, query_lower))
         
-        return similarity
+        if score >= ratio_bound:
+            return score
+        
+        ratio_bound = matcher.quick_ratio()
+        if not admissible(max(score, ratio_bound)):
+            return None
+        
+        if score >= ratio_bound:
+            return score
+        
+        # 相似度匹配
+        return max(matcher.ratio(), score)
     
     def _semantic_match(self, skill_path: str, query: str) -> float:
-        """语义匹配"""
-        skill_md = os.path.join(skill_path, "SKILL.md")
+        """语义匹配（使用索引中缓存的正文词集）"""
+        content_words = self.index.tokens(os.path.basename(skill_path), validate=False)
         
-        if not os.path.exists(skill_md):
+        if not content_words:
             return 0.0
         
-        try:
-            with open(skill_md, 'r', encoding='utf-8') as f:
-                content = f.read().lower()
-            
-            # 检查描述和关键词
-            query_keywords = set(query.split())
-            content_words = set(content.split())
-            
-            overlap = query_keywords & content_words
-            if overlap:
-                return len(overlap) / len(query_keywords) * 0.6
-            
-            return 0.0
-        except:
-            return 0.0
+        # 检查描述和关键词
+        query_keywords = set(query.split())
+        
+        overlap = query_keywords & content_words
+        if overlap:
+            return len(overlap) / len(query_keywords) * 0.6
+        
+        return 0.0
     
     def _get_skill_info(self, skill_path: str, skill_name: str) -> Dict:
         """获取技能信息"""
@@ -248,37 +412,13 @@ class SkillSearcher:
             "installed": True
         }
         
-        # 读取SKILL.md
-        skill_md = os.path.join(skill_path, "SKILL.md")
-        if os.path.exists(skill_md):
-            try:
-                with open(skill_md, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # 提取描述（假设第一行是标题，第二行是描述）
-                    lines = content.split('\n')
-                    for line in lines[1:10]:
-                        if line.strip() and not line.startswith('#'):
-                            info["description"] = line.strip()[:200]
-                            break
-            except:
-                pass
+        # 描述来自SKILL.md头部（frontmatter或首段）
+        entry = self.index.get(skill_name, validate=False)
+        if entry:
+            info["description"] = entry["description"]
         
         return info
     
-    def _deduplicate_and_sort(self, results: List[Dict], query: str) -> List[Dict]:
-        """去重和排序"""
-        seen = set()
-        unique_results = []
-        
-        for result in results:
-            name = result["name"]
-            if name not in seen:
-                seen.add(name)
-                unique_results.append(result)
-        
-        # 按分数排序
-        return sorted(unique_results, key=lambda x: x.get("score", 0), reverse=True)
-    
     def format_results(self, results: List[Dict]) -> str:
         """格式化搜索结果"""
         if not results:
@@ -290,7 +430,8 @@ class SkillSearcher:
             source_icon = {
                 "local": "📁",
                 "github": "🐙",
-                "vercel": "▲"
+                "vercel": "▲",
+                "openskills": "📦"
             }.get(skill.get("source", "local"), "📦")
             
             score = skill.get("score", 0)
@@ -308,6 +449,9 @@ class SkillSearcher:
             if skill.get("downloads"):
                 output += f"   📥 {skill['downloads']:,} 下载\n"
             
+            if skill.get("context_tokens") is not None:
+                output += f"   🧮 ~{skill['context_tokens']:,} tokens（含引用文件 ~{skill['context_total_tokens']:,}）\n"
+            
             if skill.get("source") == "local":
                 output += f"   ✅ 已安装\n"
             elif skill.get("url"):
@@ -324,15 +468,23 @@ def main():
     
     parser = argparse.ArgumentParser(description='技能搜索工具')
     parser.add_argument('query', help='搜索关键词')
-    parser.add_argument('--source', choices=['local', 'github', 'vercel', 'all'], 
+    parser.add_argument('--source', choices=['local', 'github', 'vercel', 'openskills', 'all'], 
                        default='all', help='搜索源')
     parser.add_argument('--limit', type=int, default=10, help='返回结果数量')
     parser.add_argument('--json', action='store_true', help='以JSON格式输出')
+    parser.add_argument('--jsonl', action='store_true', help='每得到一个结果立即输出一行JSON')
+    parser.add_argument('--max-tokens', type=int, help='只保留SKILL.md近似token数不超过该值的技能')
     
     args = parser.parse_args()
     
     searcher = SkillSearcher()
-    results = searcher.search(args.query, args.source, args.limit)
+    
+    if args.jsonl:
+        for result in searcher.search_iter(args.query, args.source, args.limit, args.max_tokens):
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+        return
+    
+    results = searcher.search(args.query, args.source, args.limit, args.max_tokens)
     
     if args.json:
         print(json.dumps(results, indent=2, ensure_ascii=False))
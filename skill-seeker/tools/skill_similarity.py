@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+技能相似度索引
+基于功能、使用场景和描述字符二元组计算技能两两余弦相似度，只保留每个技能的前K个近邻（稀疏矩阵），
+随元数据发布的data/skill_similarity.json只读，运行时增量重建的结果写入~/.trae-cn/cache，并按相似度聚类
+"""
+import os
+import sys
+import json
+import math
+import hashlib
+from typing import Dict, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from skill_metadata import SkillMetadataStore, get_store
+
+# 相似度文件版本，向量定义或格式变化时递增
+SIMILARITY_VERSION = 1
+
+# 每个技能保留的近邻数（也是alternatives可返回的最大数量）
+DEFAULT_NEIGHBORS = 10
+
+# 运行时更新后的相似度写到这里，技能目录本身可能只读（如通过内容寻址存储安装）
+DEFAULT_CACHE_PATH = os.path.expanduser("~/.trae-cn/cache/skill_similarity.json")
+
+# 各向量的权重（各自的余弦相似度按权重相加）
+GROUP_WEIGHTS = {"features": 0.5, "use_cases": 0.3, "description": 0.2}
+
+# 相似度不低于该值的技能归为同一簇
+CLUSTER_THRESHOLD = 0.15
+
+
+def _bigrams(text: str) -> frozenset:
+    """字符二元组（中文短语没有空格分词，用二元组衡量部分重合，如 "UI测试" 与 "API测试"）"""
+    text = "".join(text.lower().split())
+    if len(text) < 2:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + 2] for i in range(len(text) - 1))
+
+
+def _phrases(items) -> frozenset:
+    """短语本身加上其字符二元组"""
+    tokens = set()
+    for item in items:
+        tokens.add(item.lower())
+        tokens |= _bigrams(item)
+    return frozenset(tokens)
+
+
+def skill_vectors(record) -> Dict[str, frozenset]:
+    """技能的各组二值向量（用集合表示）"""
+    return {
+        "features": _phrases(record.get("features", ())),
+        "use_cases": _phrases(record.get("use_cases", ())),
+        "description": _bigrams(record.get("description", ""))
+    }
+
+
+def entry_hash(record) -> str:
+    """参与相似度计算的字段摘要，用于增量重建"""
+    payload = json.dumps([
+        sorted(record.get("features", ())),
+        sorted(record.get("use_cases", ())),
+        record.get("description", "")
+    ], ensure_ascii=False)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()[:12]
+
+
+def similarity_rows(rows: List[str], columns: List[str], vectors: Dict[str, Dict]) -> List[List[float]]:
+    """
+    计算rows中每个技能与columns中每个技能的相似度
+
+    二值向量的余弦相似度为 |A∩B| / sqrt(|A|·|B|)，各组按GROUP_WEIGHTS加权相加；
+    有numpy时用矩阵乘法一次算出
+    """
+    if not rows or not columns:
+        return [[] for _ in rows]
+
+    if np is not None:
+        total = np.zeros((len(rows), len(columns)))
+        for group, weight in GROUP_WEIGHTS.items():
+            vocab = {}
+            for name in columns:
+                for token in vectors[name][group]:
+                    vocab.setdefault(token, len(vocab))
+            if not vocab:
+                continue
+
+            def matrix(names):
+                m = np.zeros((len(names), len(vocab)))
+                for i, name in enumerate(names):
+                    cols = [vocab[t] for t in vectors[name][group] if t in vocab]
+                    m[i, cols] = 1.0
+                norms = np.linalg.norm(m, axis=1, keepdims=True)
+                return np.divide(m, norms, out=np.zeros_like(m), where=norms > 0)
+
+            total += weight * (matrix(rows) @ matrix(columns).T)
+        return total.tolist()
+
+    result = []
+    for row in rows:
+        scores = []
+        for column in columns:
+            score = 0.0
+            for group, weight in GROUP_WEIGHTS.items():
+                a, b = vectors[row][group], vectors[column][group]
+                if a and b:
+                    score += weight * len(a & b) / math.sqrt(len(a) * len(b))
+            scores.append(score)
+        result.append(scores)
+    return result
+
+
+def _top_neighbors(name: str, columns: List[str], scores: List[float], k: int) -> List[Tuple[str, float]]:
+    """从一行相似度中选出前k个近邻（排除自身和0分）"""
+    pairs = [
+        (column, round(score, 6)) for column, score in zip(columns, scores)
+        if column != name and score > 1e-9
+    ]
+    pairs.sort(key=lambda p: -p[1])
+    return pairs[:k]
+
+
+class SkillSimilarity:
+    """稀疏相似度索引（每个技能的前K个近邻）及聚类"""
+
+    def __init__(self, store: SkillMetadataStore = None, path: str = None, k: int = DEFAULT_NEIGHBORS,
+                 cache_path: str = None):
+        """
+        初始化索引
+
+        Args:
+            store: 技能元数据，默认使用data/skill_metadata.json
+            path: 随元数据发布的相似度文件（只读），默认与元数据同目录的skill_similarity.json
+            k: 每个技能保留的近邻数
+            cache_path: 运行时更新结果的保存位置，默认~/.trae-cn/cache/skill_similarity.json
+        """
+        self.store = store or get_store()
+        self.path = path or os.path.join(os.path.dirname(self.store.path), "skill_similarity.json")
+        self.cache_path = cache_path or DEFAULT_CACHE_PATH
+        self.k = k
+        self.entries = {}
+        self.clusters = {}
+        # 优先使用运行时缓存，没有时使用发布的文件
+        self._load(self.cache_path) or self._load(self.path)
+
+    def _load(self, path: str) -> bool:
+        """加载持久化的相似度，文件不存在或版本不符时返回False"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+
+        if data.get("version") != SIMILARITY_VERSION or data.get("k") != self.k:
+            return False
+
+        self.entries = {
+            name: {"hash": entry["hash"], "neighbors": [tuple(n) for n in entry["neighbors"]]}
+            for name, entry in data.get("entries", {}).items()
+        }
+        self.clusters = data.get("clusters", {})
+        return True
+
+    def save(self, path: str = None):
+        """
+        保存相似度
+
+        Args:
+            path: 目标文件，默认写入运行时缓存；重新生成发布数据时传入self.path
+        """
+        path = path or self.cache_path
+        data = {
+            "version": SIMILARITY_VERSION,
+            "metadata_version": self.store.version,
+            "k": self.k,
+            "entries": {
+                name: {"hash": entry["hash"], "neighbors": [list(n) for n in entry["neighbors"]]}
+                for name, entry in self.entries.items()
+            },
+            "clusters": self.clusters
+        }
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=1)
+            f.write("\n")
+        os.replace(tmp_path, path)
+
+    def update(self, save: bool = True) -> Dict:
+        """
+        按元数据增量重建
+
+        只计算新增/变化技能与全体技能的相似度；未变化技能的近邻列表合并这些新分数，
+        若其原有近邻被修改或删除则整行重算
+
+        Returns:
+            {"changed": [...], "removed": [...], "recomputed": [...]}
+        """
+        names = list(self.store.names)
+        hashes = {name: entry_hash(self.store.records[name]) for name in names}
+
+        changed = [n for n in names if self.entries.get(n, {}).get("hash") != hashes[n]]
+        removed = [n for n in self.entries if n not in hashes]
+        report = {"changed": changed, "removed": removed, "recomputed": []}
+        if not changed and not removed:
+            return report
+
+        vectors = {name: skill_vectors(self.store.records[name]) for name in names}
+        stale = set(changed) | set(removed)
+        for name in removed:
+            del self.entries[name]
+
+        # 近邻中包含已变化/已删除技能的未变化技能需要整行重算
+        recompute = [
+            n for n in names
+            if n not in stale and any(other in stale for other, _ in self.entries[n]["neighbors"])
+        ]
+        report["recomputed"] = recompute
+
+        rows = changed + recompute
+        row_scores = similarity_rows(rows, names, vectors)
+        for name, scores in zip(rows, row_scores):
+            self.entries[name] = {
+                "hash": hashes[name],
+                "neighbors": _top_neighbors(name, names, scores, self.k)
+            }
+
+        # 其余技能：合并与变化技能之间的分数（相似度对称）
+        if changed:
+            order = {name: i for i, name in enumerate(names)}
+            full_rows = set(rows)
+            column_scores = row_scores[:len(changed)]
+            for j, name in enumerate(names):
+                if name in full_rows:
+                    continue
+                merged = dict(self.entries[name]["neighbors"])
+                merged.update(
+                    (other, round(scores[j], 6)) for other, scores in zip(changed, column_scores)
+                    if scores[j] > 1e-9
+                )
+                neighbors = sorted(merged.items(), key=lambda p: (-p[1], order[p[0]]))[:self.k]
+                self.entries[name]["neighbors"] = neighbors
+
+        # 保持目录顺序
+        self.entries = {name: self.entries[name] for name in names}
+        self.clusters = self._cluster()
+
+        if save:
+            try:
+                self.save()
+            except OSError:
+                pass
+        return report
+
+    def _cluster(self, threshold: float = CLUSTER_THRESHOLD) -> Dict[str, int]:
+        """并查集：相似度不低于阈值的近邻归为同一簇，簇编号按首个成员的目录顺序"""
+        parent = {name: name for name in self.entries}
+
+        def find(name):
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        order = {name: i for i, name in enumerate(self.entries)}
+        for name, entry in self.entries.items():
+            for other, score in entry["neighbors"]:
+                if score < threshold or other not in parent:
+                    continue
+                a, b = find(name), find(other)
+                if a != b:
+                    if order[a] > order[b]:
+                        a, b = b, a
+                    parent[b] = a
+
+        labels = {}
+        clusters = {}
+        for name in self.entries:
+            root = find(name)
+            clusters[name] = labels.setdefault(root, len(labels))
+        return clusters
+
+    def alternatives(self, skill_name: str, k: int = 5) -> List[Dict]:
+        """
+        最相近的k个替代技能（直接读取预计算的近邻列表）
+
+        Args:
+            skill_name: 技能名称
+            k: 返回数量，1到self.k（每个技能只保留前self.k个近邻）
+
+        Returns:
+            [{"name", "score", "cluster"}]，未收录技能返回空列表
+
+        Raises:
+            ValueError: k超出范围
+        """
+        if not 1 <= k <= self.k:
+            raise ValueError(f"替代技能数量须在1到{self.k}之间（每个技能只保留前{self.k}个近邻）: {k}")
+        record = self.store.lookup(skill_name)
+        if record is None:
+            return []
+        entry = self.entries.get(record["name"])
+        if entry is None:
+            return []
+        return [
+            {"name": name, "score": score, "cluster": self.clusters.get(name)}
+            for name, score in entry["neighbors"][:k]
+        ]
+
+    def cluster_of(self, skill_name: str) -> List[str]:
+        """与技能同簇的所有技能"""
+        record = self.store.lookup(skill_name)
+        if record is None or record["name"] not in self.clusters:
+            return []
+        label = self.clusters[record["name"]]
+        return [name for name, other in self.clusters.items() if other == label]
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='技能相似度索引')
+    parser.add_argument('skill', nargs='?', help='查询替代技能')
+    parser.add_argument('-k', type=int, default=5, help=f'替代技能数量（最多{DEFAULT_NEIGHBORS}）')
+    parser.add_argument('--rebuild', action='store_true', help='忽略已有结果，完全重建')
+    parser.add_argument('--write-data', action='store_true',
+                        help='把结果写回随元数据发布的data/skill_similarity.json（维护者更新数据时使用）')
+
+    args = parser.parse_args()
+
+    if not 1 <= args.k <= DEFAULT_NEIGHBORS:
+        parser.error(f"-k 须在1到{DEFAULT_NEIGHBORS}之间")
+
+    similarity = SkillSimilarity()
+    if args.rebuild:
+        similarity.entries = {}
+    report = similarity.update(save=not args.write_data)
+    if args.write_data:
+        similarity.save(similarity.path)
+    if report["changed"] or report["removed"]:
+        print(f"🔄 已更新 {len(report['changed'])} 个，删除 {len(report['removed'])} 个，"
+              f"重算 {len(report['recomputed'])} 个技能的近邻")
+
+    if args.skill:
+        for alt in similarity.alternatives(args.skill, args.k):
+            print(f"  {alt['name']}: {alt['score']:.3f}  [簇 {alt['cluster']}]")
+
+
+if __name__ == "__main__":
+    main()
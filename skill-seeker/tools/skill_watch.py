@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+技能目录监听工具
+监听~/.trae-cn/skills的变化，增量维护本地技能索引
+Linux下使用inotify，其他平台回退为轮询
+"""
+import os
+import sys
+import time
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+from typing import Callable, Dict, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from skill_index import LocalSkillIndex
+
+# inotify事件掩码（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_ONLYDIR = 0x01000000
+
+ROOT_MASK = IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_DELETE_SELF | IN_ONLYDIR
+SKILL_MASK = IN_CLOSE_WRITE | IN_MODIFY | IN_ATTRIB | IN_CREATE | IN_DELETE | IN_MOVED_FROM | IN_MOVED_TO | IN_ONLYDIR
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# 有变化但空闲多久后落盘索引（秒）
+SAVE_IDLE_SECONDS = 1.0
+
+
+class _Inotify:
+    """基于ctypes的最小inotify封装"""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+
+        self.fd = libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path: str, mask: int) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {path}")
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """读取事件，返回 (wd, mask, name) 列表"""
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0").decode("utf-8", errors="surrogateescape")
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def inotify_available() -> bool:
+    """当前平台是否支持inotify"""
+    return sys.platform.startswith("linux") and hasattr(os, "O_CLOEXEC")
+
+
+class SkillIndexWatcher:
+    """技能目录监听器"""
+
+    def __init__(self, index: LocalSkillIndex,
+                 on_change: Callable[[str, Optional[Dict]], None] = None,
+                 poll_interval: float = 1.0,
+                 use_inotify: bool = None):
+        """
+        初始化监听器
+
+        Args:
+            index: 要维护的本地技能索引
+            on_change: 单个技能变化后的回调 (技能名, 索引项或None)
+            poll_interval: 轮询模式的扫描间隔（秒）
+            use_inotify: 是否使用inotify，None表示自动检测
+        """
+        self.index = index
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.use_inotify = inotify_available() if use_inotify is None else use_inotify
+        self.mode = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._wake_r, self._wake_w = os.pipe()
+        self._closed = False
+
+    def start(self) -> "SkillIndexWatcher":
+        """全量扫描一次后启动后台监听线程"""
+        inotify = None
+        if self.use_inotify and os.path.isdir(self.index.skills_dir):
+            try:
+                inotify = _Inotify()
+                # 先订阅根目录再扫描，避免扫描期间的变化丢失
+                root_wd = inotify.add_watch(self.index.skills_dir, ROOT_MASK)
+            except (OSError, AttributeError):
+                inotify = None
+
+        # 轮询模式的初始快照同样先于扫描采集
+        snapshot = self._snapshot() if inotify is None else None
+        self.index.scan()
+
+        if inotify is not None:
+            self.mode = "inotify"
+            target = self._run_inotify
+            args = (inotify, root_wd)
+        else:
+            self.mode = "poll"
+            target = self._run_poll
+            args = (snapshot,)
+
+        self.index.watched = True
+        self._thread = threading.Thread(target=target, args=args, name="skill-index-watcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """停止监听并保存索引（可重复调用）"""
+        if self._closed:
+            return
+        self._closed = True
+        self._stop.set()
+        os.write(self._wake_w, b"\0")
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+        self.index.watched = False
+        self.index.save()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _apply(self, skill_name: str):
+        """刷新单个技能目录的索引项"""
+        entry = self.index.refresh(skill_name)
+        if self.on_change:
+            self.on_change(skill_name, entry)
+
+    def _run_inotify(self, inotify: _Inotify, root_wd: int):
+        """inotify事件循环"""
+        skills_dir = self.index.skills_dir
+        wd_to_skill = {}
+        skill_to_wd = {}
+
+        def watch_skill(name):
+            path = os.path.join(skills_dir, name)
+            try:
+                wd = inotify.add_watch(path, SKILL_MASK)
+            except OSError:
+                return
+            wd_to_skill[wd] = name
+            skill_to_wd[name] = wd
+
+        def unwatch_skill(name):
+            wd = skill_to_wd.pop(name, None)
+            if wd is not None:
+                wd_to_skill.pop(wd, None)
+                inotify.rm_watch(wd)
+
+        def rescan():
+            """事件队列溢出后全量扫描，同步技能目录的订阅，返回有变化的技能"""
+            before = {name: self.index.entries.get(name) for name in self.index.names()}
+            names = self.index.scan()
+            for name in names:
+                if name not in skill_to_wd:
+                    watch_skill(name)
+            for name in set(skill_to_wd) - set(names):
+                unwatch_skill(name)
+            after = {name: self.index.entries.get(name) for name in self.index.names()}
+            return [
+                name for name in list(before) + list(after)
+                if before.get(name) is not after.get(name)
+            ]
+
+        for name in self.index.names():
+            watch_skill(name)
+            # 补上扫描到订阅之间可能发生的SKILL.md变化
+            self.index.refresh(name)
+
+        last_change = None
+        try:
+            while not self._stop.is_set():
+                timeout = SAVE_IDLE_SECONDS if last_change is not None else None
+                ready, _, _ = select.select([inotify.fd, self._wake_r], [], [], timeout)
+
+                if not ready:
+                    self.index.save()
+                    last_change = None
+                    continue
+
+                if inotify.fd not in ready:
+                    continue
+
+                changed = []
+                for wd, mask, name in inotify.read_events():
+                    if mask & IN_Q_OVERFLOW:
+                        # 内核丢弃了事件，无法得知哪些技能变化，改为全量扫描
+                        changed.extend(rescan())
+                    elif wd == root_wd:
+                        if mask & IN_DELETE_SELF:
+                            self._stop.set()
+                            break
+                        # 技能目录也可能是指向目录的符号链接（如skill_store安装的技能，
+                        # 通过os.replace切换版本），此类事件不带IN_ISDIR
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            if not (mask & IN_ISDIR or os.path.isdir(os.path.join(skills_dir, name))):
+                                continue
+                            # 替换符号链接后原订阅仍指向旧目标，重新订阅
+                            unwatch_skill(name)
+                            watch_skill(name)
+                        elif mask & (IN_DELETE | IN_MOVED_FROM):
+                            if not (mask & IN_ISDIR or name in skill_to_wd
+                                    or self.index.get(name, validate=False) is not None):
+                                continue
+                            unwatch_skill(name)
+                        else:
+                            continue
+                        changed.append(name)
+                    elif mask & IN_IGNORED:
+                        skill = wd_to_skill.pop(wd, None)
+                        if skill is not None and skill_to_wd.get(skill) == wd:
+                            del skill_to_wd[skill]
+                    elif wd in wd_to_skill and name == "SKILL.md":
+                        changed.append(wd_to_skill[wd])
+
+                # 同一批事件中同一技能只刷新一次
+                for name in dict.fromkeys(changed):
+                    self._apply(name)
+                if changed:
+                    last_change = time.monotonic()
+        finally:
+            # 技能目录被删除等情况下退出循环后，索引回到按需校验模式
+            self.index.watched = False
+            inotify.close()
+
+    def _snapshot(self) -> Dict[str, tuple]:
+        """轮询模式：采集每个技能目录及其SKILL.md的状态"""
+        snapshot = {}
+        try:
+            entries = list(os.scandir(self.index.skills_dir))
+        except OSError:
+            return snapshot
+
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            try:
+                st = os.stat(os.path.join(entry.path, "SKILL.md"))
+                snapshot[entry.name] = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                snapshot[entry.name] = None
+        return snapshot
+
+    def _run_poll(self, previous: Dict[str, tuple]):
+        """轮询事件循环"""
+        while not self._stop.wait(self.poll_interval):
+            current = self._snapshot()
+            changed = [
+                name for name in set(previous) | set(current)
+                if previous.get(name, 0) != current.get(name, 0)
+            ]
+            for name in changed:
+                self._apply(name)
+            if changed:
+                self.index.save()
+            previous = current
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='技能目录监听工具（保持本地技能索引为最新）')
+    parser.add_argument('--dir', default=os.path.expanduser("~/.trae-cn/skills"), help='技能目录')
+    parser.add_argument('--poll', action='store_true', help='强制使用轮询模式')
+    parser.add_argument('--interval', type=float, default=1.0, help='轮询间隔（秒）')
+
+    args = parser.parse_args()
+
+    def report(skill_name, entry):
+        status = "🗑️ 已移除" if entry is None else "🔄 已更新"
+        print(f"{status}: {skill_name}", flush=True)
+
+    watcher = SkillIndexWatcher(
+        LocalSkillIndex(args.dir),
+        on_change=report,
+        poll_interval=args.interval,
+        use_inotify=False if args.poll else None
+    )
+    watcher.start()
+    print(f"👀 正在监听: {args.dir} [模式: {watcher.mode}]，按Ctrl+C退出", flush=True)
+
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.stop()
+
+
+if __name__ == "__main__":
+    main()
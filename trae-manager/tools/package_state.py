@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+已安装包状态缓存
+通过一次 pip list --format=json / npm ls -g --json --depth=0 记录已安装的包和版本，
+缓存到磁盘；安装目录有变化或缓存过期时才重新查询，用于跳过已满足的依赖安装
+"""
+import os
+import re
+import sys
+import json
+import time
+import threading
+import subprocess
+from typing import Dict, List, Optional, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from command_runner import run_command
+
+try:
+    from packaging.requirements import Requirement, InvalidRequirement
+except ImportError:
+    Requirement = None
+
+# 缓存版本，结构变化时递增
+STATE_VERSION = 1
+
+DEFAULT_STATE_PATH = os.path.expanduser("~/.trae-cn/cache/package_state.json")
+
+# 无法通过目录mtime判断变化时的最长缓存时间（秒）
+STATE_MAX_AGE = 24 * 3600
+
+_PIP_SPEC = re.compile(r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(.*)$')
+
+
+def normalize_pip_name(name: str) -> str:
+    """PEP 503 名称规范化"""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def split_npm_spec(spec: str) -> Tuple[str, str]:
+    """拆分npm包说明 "name@range" / "@scope/name@range"，返回 (名称, 版本范围)"""
+    at = spec.rfind("@")
+    if at > 0:
+        return spec[:at], spec[at + 1:]
+    return spec, ""
+
+
+def _pip_site_dirs() -> List[str]:
+    """当前解释器的site-packages目录（安装/卸载包时其mtime会变化）"""
+    import site
+    dirs = list(getattr(site, "getsitepackages", lambda: [])())
+    user_site = getattr(site, "getusersitepackages", lambda: None)()
+    if user_site:
+        dirs.append(user_site)
+    return [d for d in dirs if os.path.isdir(d)]
+
+
+def _mtimes(dirs: List[str]) -> List[int]:
+    result = []
+    for d in dirs:
+        try:
+            result.append(os.stat(d).st_mtime_ns)
+        except OSError:
+            result.append(None)
+    return result
+
+
+class PackageState:
+    """pip/npm全局已安装包状态"""
+
+    def __init__(self, state_path: str = None, max_age: float = STATE_MAX_AGE):
+        """
+        初始化状态缓存（不会立即查询，首次判断某个生态时才加载）
+
+        Args:
+            state_path: 缓存文件
+            max_age: 缓存最长有效时间（秒）
+        """
+        self.state_path = state_path or DEFAULT_STATE_PATH
+        self.max_age = max_age
+        self._lock = threading.RLock()
+        self._state = self._read()
+        self._checked = set()
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != STATE_VERSION:
+            return {}
+        return data.get("ecosystems", {})
+
+    def _write(self):
+        data = {"version": STATE_VERSION, "ecosystems": self._state}
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, self.state_path)
+        except OSError:
+            pass
+
+    def _scope(self, ecosystem: str) -> str:
+        """pip状态按解释器区分，npm全局只有一份"""
+        return f"pip:{sys.executable}" if ecosystem == "pip" else "npm"
+
+    def _is_fresh(self, entry: Dict) -> bool:
+        if time.time() - entry.get("refreshed_at", 0) > self.max_age:
+            return False
+        watch = entry.get("watch") or []
+        return _mtimes(watch) == entry.get("watch_mtimes")
+
+    def packages(self, ecosystem: str) -> Optional[Dict[str, Optional[str]]]:
+        """
+        已安装的包 {规范化名称: 版本}
+
+        每个进程内首次调用时校验缓存（目录mtime、过期时间），必要时查询一次
+
+        Returns:
+            无法查询（如npm不存在）时返回None
+        """
+        scope = self._scope(ecosystem)
+        with self._lock:
+            entry = self._state.get(scope)
+            if scope not in self._checked:
+                if entry is None or not self._is_fresh(entry):
+                    entry = self._query(ecosystem)
+                    if entry is None:
+                        self._state.pop(scope, None)
+                    else:
+                        self._state[scope] = entry
+                    self._write()
+                self._checked.add(scope)
+            return entry["packages"] if entry else None
+
+    def refresh(self, ecosystem: str = None):
+        """下次查询时重新获取（None表示全部生态）"""
+        with self._lock:
+            if ecosystem is None:
+                self._checked.clear()
+                self._state = {}
+            else:
+                self._checked.discard(self._scope(ecosystem))
+                self._state.pop(self._scope(ecosystem), None)
+
+    def _query(self, ecosystem: str) -> Optional[Dict]:
+        """调用pip list / npm ls获取已安装包"""
+        try:
+            if ecosystem == "pip":
+                watch = _pip_site_dirs()
+                result = run_command(
+                    [sys.executable, "-m", "pip", "list", "--format=json", "--disable-pip-version-check"],
+                    label="package_state.pip", capture_output=True, text=True, timeout=120
+                )
+                if result.returncode != 0:
+                    return None
+                packages = {
+                    normalize_pip_name(item["name"]): item.get("version")
+                    for item in json.loads(result.stdout or "[]")
+                }
+            else:
+                root = run_command(["npm", "root", "-g"], label="package_state.npm",
+                                   capture_output=True, text=True, timeout=60)
+                watch = [root.stdout.strip()] if root.returncode == 0 and root.stdout.strip() else []
+                result = run_command(["npm", "ls", "-g", "--json", "--depth=0"], label="package_state.npm",
+                                     capture_output=True, text=True, timeout=120)
+                # 存在问题依赖时npm ls返回非0，但仍输出完整JSON
+                data = json.loads(result.stdout or "{}")
+                packages = {
+                    name: info.get("version")
+                    for name, info in data.get("dependencies", {}).items()
+                }
+        except (OSError, ValueError, KeyError, AttributeError, subprocess.TimeoutExpired):
+            return None
+
+        return {
+            "refreshed_at": time.time(),
+            "watch": watch,
+            "watch_mtimes": _mtimes(watch),
+            "packages": packages
+        }
+
+    def is_satisfied(self, ecosystem: str, requirement: str) -> bool:
+        """
+        需求是否已满足
+
+        pip支持完整的版本说明（需要packaging，否则只判断==）；npm只判断精确版本，
+        其他版本范围一律视为未满足，交给npm处理
+        """
+        packages = self.packages(ecosystem)
+        if packages is None:
+            return False
+
+        if ecosystem == "pip":
+            if Requirement is not None:
+                try:
+                    req = Requirement(requirement)
+                except InvalidRequirement:
+                    return False
+                version = packages.get(normalize_pip_name(req.name), False)
+                if version is False:
+                    return False
+                if not req.specifier:
+                    return True
+                return version is not None and req.specifier.contains(version, prereleases=True)
+
+            match = _PIP_SPEC.match(requirement)
+            if not match:
+                return False
+            name, spec = match.group(1), match.group(2).strip()
+            version = packages.get(normalize_pip_name(name), False)
+            if version is False:
+                return False
+            if not spec:
+                return True
+            return spec.startswith("==") and version == spec[2:].strip()
+
+        name, spec = split_npm_spec(requirement)
+        version = packages.get(name, False)
+        if version is False:
+            return False
+        if not spec or spec in ("*", "latest"):
+            return True
+        return version == spec.lstrip("=v")
+
+    def missing(self, ecosystem: str, requirements: List[str]) -> List[str]:
+        """未满足的需求"""
+        return [req for req in requirements if not self.is_satisfied(ecosystem, req)]
+
+    def mark_installed(self, ecosystem: str, requirements: List[str]):
+        """
+        记录刚安装成功的包
+
+        版本未知，只用于满足不带版本的需求；目录mtime随之变化，下个进程会重新查询
+        """
+        scope = self._scope(ecosystem)
+        with self._lock:
+            entry = self._state.get(scope)
+            if entry is None:
+                return
+            for req in requirements:
+                if ecosystem == "pip":
+                    match = _PIP_SPEC.match(req)
+                    if not match:
+                        continue
+                    name = normalize_pip_name(match.group(1))
+                else:
+                    name = split_npm_spec(req)[0]
+                entry["packages"].setdefault(name, None)
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+内容寻址技能存储
+文件内容按sha256只存一份（objects/），每次安装记录一个版本清单（manifests/），
+版本目录由硬链接物化（trees/，不支持硬链接时复制），已安装技能目录是指向版本目录的符号链接，
+回滚只需原子替换链接；未被任何保留版本引用的对象由gc清理
+"""
+import os
+import json
+import stat
+import shutil
+import hashlib
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+DEFAULT_STORE_DIR = os.path.expanduser("~/.trae-cn/store")
+
+# 计算哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def _tmp_suffix() -> str:
+    """进程和线程内唯一的临时文件后缀（并发安装技能时各线程互不覆盖）"""
+    return f"{os.getpid()}.{threading.get_ident()}"
+
+
+def _atomic_write_json(path: str, data: Dict):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{_tmp_suffix()}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _remove(path: str):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.unlink(path)
+
+
+class SkillStore:
+    """内容寻址技能存储"""
+
+    def __init__(self, root: str = None):
+        """
+        初始化存储
+
+        Args:
+            root: 存储目录，默认 ~/.trae-cn/store
+        """
+        self.root = root or DEFAULT_STORE_DIR
+        self.objects_dir = os.path.join(self.root, "objects")
+        self.manifests_dir = os.path.join(self.root, "manifests")
+        self.trees_dir = os.path.join(self.root, "trees")
+        self.refs_dir = os.path.join(self.root, "refs")
+        # 本实例新写入的对象数
+        self.objects_created = 0
+        self._lock = threading.Lock()
+
+    # ---------- 对象 ----------
+
+    def object_path(self, digest: str, executable: bool = False) -> str:
+        """对象路径 objects/<前两位>/<哈希>[.x]（可执行文件单独存放，硬链接共享权限位）"""
+        name = f"{digest}.x" if executable else digest
+        return os.path.join(self.objects_dir, digest[:2], name)
+
+    def add_file(self, path: str, stats: Dict = None) -> Dict:
+        """
+        把文件存入对象库（已存在则不重复存储）
+
+        对象先写入同目录下的唯一临时文件再链接到最终路径；多个线程/进程同时写入同一对象时，
+        后到者发现对象已存在即视为成功
+
+        Args:
+            path: 文件路径
+            stats: 调用方的统计字典，新写入对象时其"new_objects"加1
+
+        Returns:
+            {"hash", "size", "executable"}
+        """
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+        digest = digest.hexdigest()
+        st = os.stat(path)
+        executable = bool(st.st_mode & stat.S_IXUSR)
+
+        target = self.object_path(digest, executable)
+        if not os.path.exists(target) and self._write_object(path, target, executable):
+            with self._lock:
+                self.objects_created += 1
+                if stats is not None:
+                    stats["new_objects"] = stats.get("new_objects", 0) + 1
+        return {"hash": digest, "size": st.st_size, "executable": executable}
+
+    def _write_object(self, path: str, target: str, executable: bool) -> bool:
+        """写入对象，返回是否由本次调用创建"""
+        object_dir = os.path.dirname(target)
+        os.makedirs(object_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=object_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as dst, open(path, 'rb') as src:
+                shutil.copyfileobj(src, dst, HASH_CHUNK_SIZE)
+            # 对象只读：通过硬链接安装的文件被原地修改时会报错，而不是悄悄改坏其他版本
+            os.chmod(tmp_path, 0o555 if executable else 0o444)
+            try:
+                os.link(tmp_path, target)
+                return True
+            except FileExistsError:
+                # 其他线程/进程已写入相同内容
+                return False
+            except OSError:
+                # 不支持硬链接时原子替换（内容相同，覆盖无害）
+                created = not os.path.exists(target)
+                os.replace(tmp_path, target)
+                return created
+        finally:
+            try:
+                os.unlink(tmp_path)
+            except FileNotFoundError:
+                pass
+
+    # ---------- 版本清单 ----------
+
+    def add_tree(self, source_dir: str, ignore: tuple = (), stats: Dict = None) -> Dict:
+        """
+        把目录存入对象库，返回版本清单
+
+        Args:
+            source_dir: 技能目录
+            ignore: 忽略的文件/目录名（如 ".git"）
+            stats: 统计字典，记录新写入的对象数（见add_file）
+
+        Returns:
+            {"id", "dirs": [...], "files": {相对路径: {"hash", "size", "executable"}}, "symlinks": {相对路径: 目标}}
+        """
+        dirs, files, symlinks = [], {}, {}
+        for root, dir_names, file_names in os.walk(source_dir):
+            dir_names[:] = sorted(d for d in dir_names if d not in ignore)
+            rel_root = os.path.relpath(root, source_dir)
+            for name in list(dir_names):
+                rel_path = os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, "/")
+                if os.path.islink(os.path.join(root, name)):
+                    dir_names.remove(name)
+                    symlinks[rel_path] = os.readlink(os.path.join(root, name))
+                else:
+                    dirs.append(rel_path)
+            for name in sorted(file_names):
+                if name in ignore:
+                    continue
+                path = os.path.join(root, name)
+                rel_path = os.path.normpath(os.path.join(rel_root, name)).replace(os.sep, "/")
+                if os.path.islink(path):
+                    symlinks[rel_path] = os.readlink(path)
+                else:
+                    files[rel_path] = self.add_file(path, stats)
+
+        manifest = {"dirs": dirs, "files": files, "symlinks": symlinks}
+        payload = json.dumps(manifest, sort_keys=True, ensure_ascii=False)
+        manifest["id"] = hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+        return manifest
+
+    def _manifest_path(self, skill_name: str, version_id: str) -> str:
+        return os.path.join(self.manifests_dir, skill_name, f"{version_id}.json")
+
+    def load_manifest(self, skill_name: str, version_id: str) -> Optional[Dict]:
+        """读取版本清单"""
+        try:
+            with open(self._manifest_path(skill_name, version_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def tree_path(self, skill_name: str, version_id: str) -> str:
+        """版本目录"""
+        return os.path.join(self.trees_dir, skill_name, version_id)
+
+    def materialize(self, skill_name: str, manifest: Dict) -> Dict:
+        """
+        物化版本目录：文件硬链接到对象（跨设备等不支持时复制），已存在则直接复用
+
+        Returns:
+            {"path", "linked", "copied"}
+        """
+        tree = self.tree_path(skill_name, manifest["id"])
+        stats = {"path": tree, "linked": 0, "copied": 0}
+        if os.path.isdir(tree):
+            return stats
+
+        os.makedirs(os.path.dirname(tree), exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(tree), prefix=f"{manifest['id']}.", suffix=".tmp")
+        # mkdtemp创建的目录权限为0700，改为普通目录权限
+        os.chmod(tmp_dir, 0o755)
+        for rel_path in manifest["dirs"]:
+            os.makedirs(os.path.join(tmp_dir, rel_path), exist_ok=True)
+        for rel_path, entry in manifest["files"].items():
+            source = self.object_path(entry["hash"], entry["executable"])
+            target = os.path.join(tmp_dir, rel_path)
+            try:
+                os.link(source, target)
+                stats["linked"] += 1
+            except OSError:
+                shutil.copy2(source, target)
+                stats["copied"] += 1
+        for rel_path, link_target in manifest["symlinks"].items():
+            os.symlink(link_target, os.path.join(tmp_dir, rel_path))
+
+        try:
+            os.replace(tmp_dir, tree)
+        except OSError:
+            # 其他进程已物化同一版本
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return stats
+
+    # ---------- 引用与指针 ----------
+
+    def _ref_path(self, skill_name: str) -> str:
+        return os.path.join(self.refs_dir, f"{skill_name}.json")
+
+    def load_ref(self, skill_name: str) -> Dict:
+        """技能的版本记录 {"current", "history": [按安装顺序的版本], "target"}"""
+        try:
+            with open(self._ref_path(skill_name), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"current": None, "history": [], "target": None}
+
+    def skills(self) -> List[str]:
+        """存储中的技能"""
+        if not os.path.isdir(self.refs_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.refs_dir) if name.endswith(".json"))
+
+    def _point(self, target_dir: str, tree: str) -> str:
+        """
+        让已安装目录指向版本目录
+
+        符号链接在临时路径建好后原子替换；已有真实目录时先删除；不支持符号链接时复制版本目录
+
+        Returns:
+            "symlink" 或 "copy"
+        """
+        os.makedirs(os.path.dirname(target_dir), exist_ok=True)
+        if os.path.isdir(target_dir) and not os.path.islink(target_dir):
+            shutil.rmtree(target_dir)
+
+        tmp_link = f"{target_dir}.{_tmp_suffix()}.link"
+        try:
+            _remove(tmp_link)
+            os.symlink(tree, tmp_link, target_is_directory=True)
+        except (OSError, NotImplementedError):
+            _remove(target_dir)
+            shutil.copytree(tree, target_dir, symlinks=True)
+            return "copy"
+        os.replace(tmp_link, target_dir)
+        return "symlink"
+
+    def install(self, skill_name: str, source_dir: str, target_dir: str, ignore: tuple = ()) -> Dict:
+        """
+        安装技能：存入对象库、物化版本目录并切换已安装目录
+
+        已安装目录若是旧式的真实目录，先作为一个版本收入存储，便于回滚
+
+        Returns:
+            {"version", "previous", "new_objects", "linked", "copied", "mode"}
+        """
+        ref = self.load_ref(skill_name)
+        if os.path.isdir(target_dir) and not os.path.islink(target_dir):
+            legacy = self.add_tree(target_dir)
+            self._record(skill_name, legacy, ref)
+
+        previous = ref["current"]
+        counts = {"new_objects": 0}
+        manifest = self.add_tree(source_dir, ignore, counts)
+        self._record(skill_name, manifest, ref)
+        stats = self.materialize(skill_name, manifest)
+
+        mode = self._point(target_dir, stats["path"])
+        ref["target"] = os.path.abspath(target_dir)
+        _atomic_write_json(self._ref_path(skill_name), ref)
+
+        return {
+            "version": manifest["id"],
+            "previous": previous,
+            "new_objects": counts["new_objects"],
+            "linked": stats["linked"],
+            "copied": stats["copied"],
+            "mode": mode
+        }
+
+    def _record(self, skill_name: str, manifest: Dict, ref: Dict):
+        """保存清单并追加到版本历史（与当前版本相同时不重复记录）"""
+        path = self._manifest_path(skill_name, manifest["id"])
+        if not os.path.exists(path):
+            _atomic_write_json(path, manifest)
+        history = ref["history"]
+        if manifest["id"] in history:
+            history.remove(manifest["id"])
+        history.append(manifest["id"])
+        ref["current"] = manifest["id"]
+
+    def rollback(self, skill_name: str, version_id: str = None) -> Dict:
+        """
+        回滚到指定版本（默认上一个版本），只替换已安装目录的符号链接
+
+        Returns:
+            {"success", "version", "previous"} 或 {"success": False, "error"}
+        """
+        ref = self.load_ref(skill_name)
+        history = ref["history"]
+        current = ref["current"]
+        if not history or not ref.get("target"):
+            return {"success": False, "error": f"存储中没有技能: {skill_name}"}
+
+        if version_id is None:
+            index = history.index(current) if current in history else len(history)
+            if index == 0:
+                return {"success": False, "error": f"没有更早的版本: {skill_name}"}
+            version_id = history[index - 1]
+        else:
+            matches = [v for v in history if v.startswith(version_id)]
+            if len(matches) != 1:
+                return {"success": False, "error": f"版本不存在或不唯一: {version_id}"}
+            version_id = matches[0]
+
+        tree = self.tree_path(skill_name, version_id)
+        if not os.path.isdir(tree):
+            manifest = self.load_manifest(skill_name, version_id)
+            if manifest is None:
+                return {"success": False, "error": f"版本清单缺失: {version_id}"}
+            self.materialize(skill_name, manifest)
+
+        self._point(ref["target"], tree)
+        ref["current"] = version_id
+        _atomic_write_json(self._ref_path(skill_name), ref)
+        return {"success": True, "version": version_id, "previous": current}
+
+    # ---------- 垃圾回收 ----------
+
+    def gc(self, keep: int = None) -> Dict:
+        """
+        清理存储
+
+        Args:
+            keep: 每个技能保留的最近版本数（当前版本总是保留）；None表示保留全部版本，只清理无引用对象
+
+        Returns:
+            {"versions_removed", "objects_removed", "bytes_freed"}
+        """
+        result = {"versions_removed": 0, "objects_removed": 0, "bytes_freed": 0}
+        referenced = set()
+
+        for skill_name in self.skills():
+            ref = self.load_ref(skill_name)
+            history = ref["history"]
+            if keep is not None:
+                kept = history[-keep:] if keep > 0 else []
+                if ref["current"] and ref["current"] not in kept:
+                    kept.append(ref["current"])
+                for version_id in history:
+                    if version_id in kept:
+                        continue
+                    _remove(self.tree_path(skill_name, version_id))
+                    _remove(self._manifest_path(skill_name, version_id))
+                    result["versions_removed"] += 1
+                ref["history"] = [v for v in history if v in kept]
+                _atomic_write_json(self._ref_path(skill_name), ref)
+
+            for version_id in ref["history"]:
+                manifest = self.load_manifest(skill_name, version_id)
+                if manifest is None:
+                    continue
+                for entry in manifest["files"].values():
+                    referenced.add(os.path.basename(self.object_path(entry["hash"], entry["executable"])))
+
+        if os.path.isdir(self.objects_dir):
+            for prefix in os.listdir(self.objects_dir):
+                prefix_dir = os.path.join(self.objects_dir, prefix)
+                for name in os.listdir(prefix_dir):
+                    if name in referenced:
+                        continue
+                    path = os.path.join(prefix_dir, name)
+                    result["bytes_freed"] += os.path.getsize(path)
+                    os.unlink(path)
+                    result["objects_removed"] += 1
+                if not os.listdir(prefix_dir):
+                    os.rmdir(prefix_dir)
+        return result
+
+    def versions(self, skill_name: str) -> List[Dict]:
+        """技能的版本列表（按安装顺序）"""
+        ref = self.load_ref(skill_name)
+        result = []
+        for version_id in ref["history"]:
+            manifest = self.load_manifest(skill_name, version_id) or {"files": {}}
+            result.append({
+                "version": version_id,
+                "current": version_id == ref["current"],
+                "files": len(manifest["files"]),
+                "bytes": sum(entry["size"] for entry in manifest["files"].values())
+            })
+        return result
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='内容寻址技能存储')
+    parser.add_argument('--root', default=None, help='存储目录（默认~/.trae-cn/store）')
+    subparsers = parser.add_subparsers(dest='command', help='命令')
+
+    list_cmd = subparsers.add_parser('list', help='列出技能及其版本')
+    list_cmd.add_argument('skill', nargs='?', help='技能名称')
+
+    install_cmd = subparsers.add_parser('install', help='把目录安装为技能的新版本')
+    install_cmd.add_argument('skill', help='技能名称')
+    install_cmd.add_argument('source', help='源目录')
+    install_cmd.add_argument('--target', help='已安装目录（默认~/.trae-cn/skills/<技能>）')
+
+    rollback_cmd = subparsers.add_parser('rollback', help='回滚技能版本')
+    rollback_cmd.add_argument('skill', help='技能名称')
+    rollback_cmd.add_argument('--to', help='版本（前缀即可，默认上一个版本）')
+
+    gc_cmd = subparsers.add_parser('gc', help='清理无引用的对象')
+    gc_cmd.add_argument('--keep', type=int, default=None, help='每个技能保留的最近版本数')
+
+    args = parser.parse_args()
+    store = SkillStore(args.root)
+
+    if args.command == 'list':
+        for skill_name in [args.skill] if args.skill else store.skills():
+            print(f"📦 {skill_name}")
+            for version in store.versions(skill_name):
+                marker = "*" if version["current"] else " "
+                print(f"  {marker} {version['version']}  {version['files']} 个文件  {version['bytes']:,} B")
+
+    elif args.command == 'install':
+        target = args.target or os.path.join(os.path.expanduser("~/.trae-cn/skills"), args.skill)
+        result = store.install(args.skill, args.source, target)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    elif args.command == 'rollback':
+        result = store.rollback(args.skill, args.to)
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+    elif args.command == 'gc':
+        result = store.gc(args.keep)
+        print(f"🧹 删除 {result['versions_removed']} 个版本、{result['objects_removed']} 个对象，"
+              f"释放 {result['bytes_freed']:,} B")
+
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
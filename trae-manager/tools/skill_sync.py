@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+技能目录增量同步
+类似rsync：按大小、mtime比较文件，mtime不同再比较内容哈希，只复制有变化的文件并删除多余文件；
+备份使用硬链接快照，重新部署的耗时与变化量成正比
+"""
+import os
+import shutil
+import hashlib
+from typing import Dict
+
+# 计算哈希时每次读取的字节数
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_hash(path: str) -> str:
+    """文件内容的sha256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _same_file(source: str, target: str, source_stat: os.stat_result, checksum: bool) -> bool:
+    """目标文件与源文件是否一致：大小不同即不同；大小和mtime都相同视为一致（checksum时仍比较哈希）"""
+    try:
+        target_stat = os.stat(target, follow_symlinks=False)
+    except OSError:
+        return False
+    if os.path.islink(target) or target_stat.st_size != source_stat.st_size:
+        return False
+    if target_stat.st_mtime_ns == source_stat.st_mtime_ns and not checksum:
+        return True
+    if file_hash(source) != file_hash(target):
+        return False
+    if target_stat.st_nlink > 1:
+        # 与备份快照共享inode：原地修改mtime会连带改掉快照中的文件，按变化处理（复制后替换，断开硬链接）
+        return False
+    # 内容相同只是mtime不同：同步mtime，下次直接按mtime判断
+    os.utime(target, ns=(source_stat.st_atime_ns, source_stat.st_mtime_ns))
+    return True
+
+
+def _replace_file(source: str, target: str):
+    """
+    复制到同目录下的临时文件再原子替换
+
+    替换而不是原地写入，目标文件与备份快照之间的硬链接随之断开，快照内容不受影响
+    """
+    tmp_path = f"{target}.{os.getpid()}.sync-tmp"
+    if os.path.islink(source):
+        os.symlink(os.readlink(source), tmp_path)
+    else:
+        shutil.copy2(source, tmp_path)
+    if os.path.isdir(target) and not os.path.islink(target):
+        shutil.rmtree(target)
+    os.replace(tmp_path, target)
+
+
+def _remove(path: str):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    else:
+        os.unlink(path)
+
+
+def sync_tree(source_dir: str, target_dir: str, checksum: bool = False) -> Dict:
+    """
+    把target_dir增量同步为source_dir的内容
+
+    Args:
+        source_dir: 源目录
+        target_dir: 目标目录（不存在时创建）
+        checksum: 大小和mtime都相同时也比较内容哈希
+
+    Returns:
+        {"copied": 复制文件数, "unchanged": 未变化文件数, "deleted": 删除的文件/目录数, "bytes": 复制字节数}
+    """
+    stats = {"copied": 0, "unchanged": 0, "deleted": 0, "bytes": 0}
+    os.makedirs(target_dir, exist_ok=True)
+
+    for root, dirs, files in os.walk(source_dir):
+        rel_root = os.path.relpath(root, source_dir)
+        target_root = target_dir if rel_root == "." else os.path.join(target_dir, rel_root)
+
+        # 源目录中的符号链接目录按链接本身同步
+        entries = set(files)
+        for name in list(dirs):
+            if os.path.islink(os.path.join(root, name)):
+                dirs.remove(name)
+                entries.add(name)
+
+        for name in dirs:
+            target = os.path.join(target_root, name)
+            if os.path.islink(target) or (os.path.exists(target) and not os.path.isdir(target)):
+                _remove(target)
+                stats["deleted"] += 1
+            os.makedirs(target, exist_ok=True)
+
+        for name in sorted(entries):
+            source = os.path.join(root, name)
+            target = os.path.join(target_root, name)
+            source_stat = os.stat(source, follow_symlinks=False)
+            if os.path.islink(source):
+                if os.path.islink(target) and os.readlink(target) == os.readlink(source):
+                    stats["unchanged"] += 1
+                    continue
+            elif _same_file(source, target, source_stat, checksum):
+                stats["unchanged"] += 1
+                continue
+            _replace_file(source, target)
+            stats["copied"] += 1
+            stats["bytes"] += source_stat.st_size
+
+        # 删除源目录中已不存在的文件和目录
+        keep = entries | set(dirs)
+        for name in os.listdir(target_root):
+            if name not in keep:
+                _remove(os.path.join(target_root, name))
+                stats["deleted"] += 1
+
+    return stats
+
+
+def snapshot(source_dir: str, snapshot_dir: str) -> Dict:
+    """
+    创建目录的硬链接快照（不支持硬链接时复制），替换已有快照
+
+    先在临时目录中建好再替换，快照过程中失败不会丢失旧快照
+
+    Returns:
+        {"linked": 硬链接文件数, "copied": 复制文件数}
+    """
+    stats = {"linked": 0, "copied": 0}
+
+    def link_or_copy(source, target):
+        try:
+            os.link(source, target)
+            stats["linked"] += 1
+        except OSError:
+            shutil.copy2(source, target)
+            stats["copied"] += 1
+
+    tmp_dir = f"{snapshot_dir}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_dir):
+        shutil.rmtree(tmp_dir)
+    shutil.copytree(source_dir, tmp_dir, symlinks=True, copy_function=link_or_copy)
+
+    if os.path.exists(snapshot_dir):
+        _remove(snapshot_dir)
+    os.replace(tmp_dir, snapshot_dir)
+    return stats
+
+
+def main():
+    """主函数"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description='技能目录增量同步')
+    parser.add_argument('source', help='源目录')
+    parser.add_argument('target', help='目标目录')
+    parser.add_argument('--checksum', action='store_true', help='始终比较内容哈希')
+    parser.add_argument('--backup', action='store_true', help='同步前为目标目录创建硬链接快照（<目标>.backup）')
+
+    args = parser.parse_args()
+
+    if args.backup and os.path.isdir(args.target):
+        snapshot(args.target, f"{args.target.rstrip(os.sep)}.backup")
+
+    stats = sync_tree(args.source, args.target, args.checksum)
+    print(f"🔄 复制 {stats['copied']} 个文件（{stats['bytes']:,} B），"
+          f"未变化 {stats['unchanged']} 个，删除 {stats['deleted']} 个")
+
+
+if __name__ == "__main__":
+    main()
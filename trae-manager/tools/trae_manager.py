@@ -8,21 +8,57 @@ import json
 import shutil
 import subprocess
 import sys
+import time
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import Dict, List, Optional
 from pathlib import Path
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from command_runner import run_command, summarize, format_summary
+from package_state import PackageState
+from skill_sync import sync_tree, snapshot
+from skill_store import SkillStore
+
+SKILL_CATEGORIES = ["core_skills", "document_skills", "development_skills", "tool_skills"]
+
+# 未配置install_priority的技能排在最后
+DEFAULT_INSTALL_PRIORITY = 100
+
+# 并发安装技能的线程数（依赖包安装仍串行）
+DEFAULT_INSTALL_WORKERS = 4
+
+# 批量安装依赖时每条npm/pip命令最多包含的包数
+PACKAGE_BATCH_SIZE = 50
+
 
 class TraeManager:
     """Trae管理器"""
     
-    def __init__(self):
-        """初始化管理器"""
+    def __init__(self, install_workers: int = DEFAULT_INSTALL_WORKERS, force: bool = False,
+                 use_store: bool = False):
+        """
+        初始化管理器
+        
+        Args:
+            install_workers: 并发安装技能的线程数
+            force: 忽略已安装包状态，总是执行npm/pip安装
+            use_store: 本地技能安装到内容寻址存储（~/.trae-cn/store），技能目录为指向版本的链接
+        """
         self.trae_skills_dir = os.path.expanduser("~/.trae-cn/skills")
         self.mcp_dir = "./mcp-servers"
         self.config_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         self.deps_file = os.path.join(self.config_dir, "data", "dependencies.json")
         
+        self.install_workers = install_workers
+        self._package_lock = threading.Lock()
+        self.force = force
+        self.package_state = PackageState()
+        self.skill_store = SkillStore() if use_store else None
+        
         # 加载依赖配置
         self.dependencies = self._load_dependencies()
     
@@ -33,13 +69,14 @@ class TraeManager:
                 return json.load(f)
         return {}
     
-    def setup(self, mode: str = "full", auto_install: bool = False) -> Dict:
+    def setup(self, mode: str = "full", auto_install: bool = False, batched: bool = True) -> Dict:
         """
         设置完整环境
         
         Args:
             mode: 设置模式 (full/skills/mcp/deps)
             auto_install: 是否自动安装
+            batched: 依赖是否批量安装
             
         Returns:
             设置结果
@@ -70,7 +107,7 @@ class TraeManager:
         
         # 4. 安装依赖
         if mode in ["full", "deps"]:
-            deps_result = self._install_all_dependencies()
+            deps_result = self._install_all_dependencies(batched)
             results["steps"].append({"name": "依赖安装", "result": deps_result})
         
         results["success"] = all(s["result"].get("success", False) for s in results["steps"])
@@ -92,7 +129,7 @@ class TraeManager:
         if skills == "--all":
             # 安装所有技能
             all_skills = []
-            for category in ["core_skills", "document_skills", "development_skills", "tool_skills"]:
+            for category in SKILL_CATEGORIES:
                 all_skills.extend(self.dependencies.get(category, {}).keys())
             skill_list = all_skills
         elif skills == "core":
@@ -102,29 +139,116 @@ class TraeManager:
             # 安装指定技能
             skill_list = skills.split(",")
         
-        results = []
-        for skill in skill_list:
-            skill = skill.strip()
-            result = self._install_single_skill(skill)
-            results.append({"skill": skill, "result": result})
-        
+        results = self._schedule_skill_installs(skill_list)
         success = all(r["result"].get("success", False) for r in results)
         
         return {
             "success": success,
             "installed": len([r for r in results if r["result"].get("success")]),
             "failed": len([r for r in results if not r["result"].get("success")]),
+            "duration": round(sum(r["duration"] for r in results), 3),
+            "wall_time": round(max((r["finished"] for r in results), default=0.0), 3),
             "details": results
         }
     
+    def _schedule_skill_installs(self, skill_list: List[str]) -> List[Dict]:
+        """
+        按依赖关系并发安装技能
+        
+        技能配置中可选的 requires 列出需要先安装的技能（只考虑本次要安装的技能）；
+        就绪的技能按 (install_priority, 列表顺序) 出队，由有界线程池并发安装。
+        前置技能失败或存在循环依赖的技能不会安装。
+        
+        Returns:
+            按列表顺序排列的 {"skill", "result", "duration", "started", "finished"}
+        """
+        names = []
+        for skill in skill_list:
+            skill = skill.strip()
+            if skill and skill not in names:
+                names.append(skill)
+        
+        configs = {name: self._find_skill_config(name) or {} for name in names}
+        position = {name: i for i, name in enumerate(names)}
+        
+        # 依赖图：前置技能 → 依赖它的技能
+        dependents = {name: [] for name in names}
+        waiting = {}
+        for name in names:
+            requires = [r for r in configs[name].get("requires", []) if r in position and r != name]
+            waiting[name] = set(requires)
+            for required in requires:
+                dependents[required].append(name)
+        
+        def ready_item(name):
+            priority = configs[name].get("install_priority", DEFAULT_INSTALL_PRIORITY)
+            return (priority, position[name], name)
+        
+        ready = [ready_item(name) for name in names if not waiting[name]]
+        heapq.heapify(ready)
+        
+        outcomes = {}
+        start = time.perf_counter()
+        
+        def run(name):
+            started = time.perf_counter() - start
+            result = self._install_single_skill(name)
+            finished = time.perf_counter() - start
+            return {"skill": name, "result": result, "duration": round(finished - started, 3),
+                    "started": round(started, 3), "finished": round(finished, 3)}
+        
+        def not_installed(name, error):
+            return {"skill": name, "result": {"success": False, "error": error},
+                    "duration": 0.0, "started": None, "finished": 0.0}
+        
+        def fail_dependents(name):
+            for dependent in dependents[name]:
+                if dependent not in outcomes:
+                    outcomes[dependent] = not_installed(dependent, f"依赖的技能安装失败: {name}")
+                    fail_dependents(dependent)
+        
+        workers = max(1, self.install_workers)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            running = {}
+            while ready or running:
+                while ready and len(running) < workers:
+                    _, _, name = heapq.heappop(ready)
+                    if name not in outcomes:
+                        running[executor.submit(run, name)] = name
+                
+                if not running:
+                    break
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    outcomes[name] = future.result()
+                    if not outcomes[name]["result"].get("success"):
+                        fail_dependents(name)
+                        continue
+                    for dependent in dependents[name]:
+                        waiting[dependent].discard(name)
+                        if not waiting[dependent] and dependent not in outcomes:
+                            heapq.heappush(ready, ready_item(dependent))
+        
+        # 剩下的技能处在依赖环中
+        for name in names:
+            if name not in outcomes:
+                outcomes[name] = not_installed(name, "存在循环依赖")
+        
+        return [outcomes[name] for name in names]
+    
+    def _find_skill_config(self, skill_name: str) -> Optional[Dict]:
+        """查找技能配置"""
+        for category in SKILL_CATEGORIES:
+            if skill_name in self.dependencies.get(category, {}):
+                return self.dependencies[category][skill_name]
+        return None
+    
     def _install_single_skill(self, skill_name: str) -> Dict:
         """安装单个技能"""
         # 查找技能配置
-        skill_config = None
-        for category in ["core_skills", "document_skills", "development_skills", "tool_skills"]:
-            if skill_name in self.dependencies.get(category, {}):
-                skill_config = self.dependencies[category][skill_name]
-                break
+        skill_config = self._find_skill_config(skill_name)
         
         if not skill_config:
             return {"success": False, "error": f"未找到技能配置: {skill_name}"}
@@ -140,36 +264,51 @@ class TraeManager:
             return {"success": False, "error": f"未知的技能来源: {source}"}
     
     def _install_local_skill(self, skill_name: str, config: Dict) -> Dict:
-        """安装本地技能"""
+        """安装本地技能（增量同步，只复制有变化的文件）"""
         try:
             source_path = config.get("path", skill_name)
             target_dir = os.path.join(self.trae_skills_dir, skill_name)
             
+            if not os.path.exists(source_path):
+                return {"success": False, "error": f"源路径不存在: {source_path}"}
+            
             # 确保目标目录存在
             os.makedirs(self.trae_skills_dir, exist_ok=True)
             
-            # 备份已存在的技能
+            if self.skill_store is not None:
+                return self._install_stored_skill(skill_name, source_path, target_dir, config)
+            
+            # 备份已存在的技能（硬链接快照，同步时被替换的文件不影响备份）
             if os.path.exists(target_dir):
-                backup_dir = f"{target_dir}.backup"
-                if os.path.exists(backup_dir):
-                    shutil.rmtree(backup_dir)
-                shutil.move(target_dir, backup_dir)
+                snapshot(target_dir, f"{target_dir}.backup")
                 print(f"  📦 已备份: {skill_name}")
             
-            # 复制技能
-            if os.path.exists(source_path):
-                shutil.copytree(source_path, target_dir)
-                
-                # 安装依赖
-                self._install_skill_dependencies(target_dir, config.get("dependencies", {}))
-                
-                return {"success": True, "message": f"✅ 技能安装成功: {skill_name}"}
-            else:
-                return {"success": False, "error": f"源路径不存在: {source_path}"}
+            # 之前通过存储安装的技能是指向版本目录的链接，改为独立目录，避免写入存储
+            if os.path.islink(target_dir):
+                os.unlink(target_dir)
+            
+            # 同步技能
+            stats = sync_tree(source_path, target_dir)
+            print(f"  🔄 {skill_name}: 复制 {stats['copied']} 个文件，"
+                  f"未变化 {stats['unchanged']} 个，删除 {stats['deleted']} 个")
+            
+            # 安装依赖
+            self._install_skill_dependencies(target_dir, config.get("dependencies", {}))
+            
+            return {"success": True, "message": f"✅ 技能安装成功: {skill_name}", "sync": stats}
                 
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def _install_stored_skill(self, skill_name: str, source_path: str, target_dir: str, config: Dict) -> Dict:
+        """通过内容寻址存储安装本地技能（旧版本保留在存储中，可用skill_store.py rollback回滚）"""
+        stats = self.skill_store.install(skill_name, source_path, target_dir)
+        print(f"  🗃️ {skill_name}: 版本 {stats['version']}，新增 {stats['new_objects']} 个对象")
+        
+        self._install_skill_dependencies(target_dir, config.get("dependencies", {}))
+        
+        return {"success": True, "message": f"✅ 技能安装成功: {skill_name}", "store": stats}
+    
     def _install_core_skill(self, skill_name: str, config: Dict) -> Dict:
         """安装核心技能"""
         # 核心技能假设已存在，只需安装依赖
@@ -186,16 +325,26 @@ class TraeManager:
             return {"success": False, "error": str(e)}
     
     def _install_skill_dependencies(self, skill_dir: str, dependencies: Dict):
-        """安装技能依赖"""
-        # npm依赖
-        if "npm" in dependencies and dependencies["npm"]:
-            for pkg in dependencies["npm"]:
-                subprocess.run(["npm", "install", "-g", pkg], capture_output=True)
+        """
+        安装技能依赖（全局npm和pip安装会修改共享环境，并发安装技能时串行执行）
         
-        # pip依赖
-        if "pip" in dependencies and dependencies["pip"]:
-            for pkg in dependencies["pip"]:
-                subprocess.run([sys.executable, "-m", "pip", "install", pkg], capture_output=True)
+        已安装且满足版本要求的包跳过（force时总是安装）
+        """
+        commands = {
+            "npm": ["npm", "install", "-g"],
+            "pip": [sys.executable, "-m", "pip", "install"]
+        }
+        for ecosystem, command in commands.items():
+            packages = dependencies.get(ecosystem) or []
+            if not packages:
+                continue
+            with self._package_lock:
+                if not self.force:
+                    packages = self.package_state.missing(ecosystem, packages)
+                for pkg in packages:
+                    result = run_command(command + [pkg], capture_output=True)
+                    if result.returncode == 0:
+                        self.package_state.mark_installed(ecosystem, [pkg])
     
     def install_mcp(self, mcp: str) -> Dict:
         """
@@ -252,8 +401,8 @@ class TraeManager:
             
             if source == "npm":
                 # npm安装
-                subprocess.run(["npm", "init", "-y"], cwd=install_dir, check=True, capture_output=True)
-                result = subprocess.run(
+                run_command(["npm", "init", "-y"], cwd=install_dir, check=True, capture_output=True)
+                result = run_command(
                     ["npm", "install", package],
                     cwd=install_dir,
                     capture_output=True,
@@ -293,7 +442,7 @@ class TraeManager:
     def _check_command(self, cmd: str, arg: str) -> Dict:
         """检查命令是否存在"""
         try:
-            result = subprocess.run(
+            result = run_command(
                 [cmd, arg],
                 capture_output=True,
                 text=True,
@@ -306,39 +455,28 @@ class TraeManager:
         except:
             return {"ok": False, "version": None}
     
-    def _install_all_dependencies(self) -> Dict:
-        """安装所有依赖"""
+    def _install_all_dependencies(self, batched: bool = True) -> Dict:
+        """
+        安装所有依赖
+        
+        Args:
+            batched: 每个生态只调用一次npm/pip（超过PACKAGE_BATCH_SIZE时分块），
+                     失败时二分定位到具体的包；False时逐个安装
+        """
         print("📦 安装所有依赖...")
         
-        # 收集所有依赖
+        # 收集所有依赖（去重、排序，保证每次的命令一致）
         npm_deps = set()
         pip_deps = set()
         
-        for category in ["core_skills", "document_skills", "development_skills", "tool_skills"]:
+        for category in SKILL_CATEGORIES:
             for skill_name, skill_config in self.dependencies.get(category, {}).items():
                 deps = skill_config.get("dependencies", {})
                 npm_deps.update(deps.get("npm", []))
                 pip_deps.update(deps.get("pip", []))
         
-        # 安装npm依赖
-        npm_results = []
-        for pkg in npm_deps:
-            result = subprocess.run(
-                ["npm", "install", "-g", pkg],
-                capture_output=True,
-                text=True
-            )
-            npm_results.append({"package": pkg, "success": result.returncode == 0})
-        
-        # 安装pip依赖
-        pip_results = []
-        for pkg in pip_deps:
-            result = subprocess.run(
-                [sys.executable, "-m", "pip", "install", pkg],
-                capture_output=True,
-                text=True
-            )
-            pip_results.append({"package": pkg, "success": result.returncode == 0})
+        npm_results = self._install_ecosystem("npm", ["npm", "install", "-g"], sorted(npm_deps), batched)
+        pip_results = self._install_ecosystem("pip", [sys.executable, "-m", "pip", "install"], sorted(pip_deps), batched)
         
         return {
             "success": all(r["success"] for r in npm_results + pip_results),
@@ -346,6 +484,61 @@ class TraeManager:
             "pip": pip_results
         }
     
+    def _install_ecosystem(self, ecosystem: str, command: List[str], packages: List[str],
+                           batched: bool = True) -> List[Dict]:
+        """安装一个生态的依赖，已满足的包标记为skipped，结果保持输入顺序"""
+        pending = packages if self.force else self.package_state.missing(ecosystem, packages)
+        
+        if batched:
+            installed = self._install_packages_batched(command, pending)
+        else:
+            installed = [self._install_packages(command, [pkg])[0] for pkg in pending]
+        self.package_state.mark_installed(ecosystem, [r["package"] for r in installed if r["success"]])
+        
+        by_package = {r["package"]: r for r in installed}
+        return [
+            by_package.get(pkg) or {"package": pkg, "success": True, "skipped": True}
+            for pkg in packages
+        ]
+    
+    def _install_packages(self, command: List[str], packages: List[str]) -> List[Dict]:
+        """用一条命令安装一组包，结果按包列出（整体成功或整体失败）"""
+        try:
+            result = run_command(command + packages, capture_output=True, text=True)
+            success = result.returncode == 0
+            error = None if success else (result.stderr or result.stdout).strip()[-500:]
+        except Exception as e:
+            success, error = False, str(e)
+        
+        results = []
+        for pkg in packages:
+            entry = {"package": pkg, "success": success}
+            if error:
+                entry["error"] = error
+            results.append(entry)
+        return results
+    
+    def _install_packages_batched(self, command: List[str], packages: List[str]) -> List[Dict]:
+        """
+        分块批量安装，失败的块二分重试，直到定位出失败的单个包
+        
+        全部成功时每个生态只需一次解析；k个坏包约需 2k·log(n) 次额外调用
+        """
+        results = []
+        for i in range(0, len(packages), PACKAGE_BATCH_SIZE):
+            results.extend(self._bisect_install(command, packages[i:i + PACKAGE_BATCH_SIZE]))
+        return results
+    
+    def _bisect_install(self, command: List[str], packages: List[str]) -> List[Dict]:
+        """安装一组包，失败时拆成两半分别重试"""
+        results = self._install_packages(command, packages)
+        if results[0]["success"] or len(packages) == 1:
+            return results
+        
+        middle = len(packages) // 2
+        return (self._bisect_install(command, packages[:middle]) +
+                self._bisect_install(command, packages[middle:]))
+    
     def export_config(self, full: bool = False) -> Dict:
         """
         导出配置
@@ -433,10 +626,17 @@ def main():
     setup_cmd.add_argument('--mode', choices=['full', 'skills', 'mcp', 'deps'], 
                           default='full', help='设置模式')
     setup_cmd.add_argument('--auto-install', action='store_true', help='自动安装')
+    setup_cmd.add_argument('--workers', type=int, default=DEFAULT_INSTALL_WORKERS, help='并发安装技能的线程数')
+    setup_cmd.add_argument('--no-batch', action='store_true', help='逐个安装依赖包（默认每个生态批量安装）')
+    setup_cmd.add_argument('--force', action='store_true', help='忽略已安装包状态，重新安装所有依赖')
+    setup_cmd.add_argument('--store', action='store_true', help='通过内容寻址存储安装技能（硬链接去重，可回滚）')
     
     # install-skills
     install_skills_cmd = subparsers.add_parser('install-skills', help='安装技能')
     install_skills_cmd.add_argument('skills', help='技能名称或--all/core')
+    install_skills_cmd.add_argument('--workers', type=int, default=DEFAULT_INSTALL_WORKERS, help='并发安装技能的线程数')
+    install_skills_cmd.add_argument('--force', action='store_true', help='忽略已安装包状态，重新安装依赖')
+    install_skills_cmd.add_argument('--store', action='store_true', help='通过内容寻址存储安装技能（硬链接去重，可回滚）')
     
     # install-mcp
     install_mcp_cmd = subparsers.add_parser('install-mcp', help='安装MCP')
@@ -445,6 +645,10 @@ def main():
     # check-env
     subparsers.add_parser('check-env', help='检查环境')
     
+    # telemetry
+    telemetry_cmd = subparsers.add_parser('telemetry', help='汇总外部命令执行耗时')
+    telemetry_cmd.add_argument('--json', action='store_true', help='以JSON格式输出')
+    
     # export
     export_cmd = subparsers.add_parser('export', help='导出配置')
     export_cmd.add_argument('--full', action='store_true', help='导出完整配置')
@@ -456,10 +660,14 @@ def main():
     
     args = parser.parse_args()
     
-    manager = TraeManager()
+    manager = TraeManager(
+        install_workers=getattr(args, 'workers', DEFAULT_INSTALL_WORKERS),
+        force=getattr(args, 'force', False),
+        use_store=getattr(args, 'store', False)
+    )
     
     if args.command == 'setup':
-        result = manager.setup(args.mode, args.auto_install)
+        result = manager.setup(args.mode, args.auto_install, batched=not args.no_batch)
         print(json.dumps(result, indent=2, ensure_ascii=False))
     
     elif args.command == 'install-skills':
@@ -474,6 +682,13 @@ def main():
         result = manager.check_env()
         print(json.dumps(result, indent=2, ensure_ascii=False))
     
+    elif args.command == 'telemetry':
+        summary = summarize()
+        if args.json:
+            print(json.dumps(summary, indent=2, ensure_ascii=False))
+        else:
+            print(format_summary(summary))
+    
     elif args.command == 'export':
         result = manager.export_config(args.full)
         print(json.dumps(result, indent=2, ensure_ascii=False))